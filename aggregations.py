@@ -0,0 +1,101 @@
+"""Dashboard metrics computed with GROUP BY in SQLite.
+
+The metric tiles, pie charts and the "Queries Over Time" chart only need a
+handful of numbers, so they are aggregated in the database and returned as
+small dicts/lists instead of pulling client_queries into pandas.
+"""
+import counters
+import rollups
+from query_builder import HOT_TABLE, QueryFilter, build_where
+
+STATUSES = ['Open', 'In Progress', 'Resolved']
+PRIORITIES = ['Low', 'Medium', 'High']
+
+COUNT_SQL = "SELECT COUNT(*) FROM {table} {where}"
+GROUPED_SQL = "SELECT {column}, COUNT(*) FROM {table} {where} GROUP BY {column}"
+
+
+def _grouped(db, column, filters, tables=None):
+    filters = filters or QueryFilter()
+    counts = {}
+    for table in tables or filters.tables():
+        where, params = build_where(filters, table)
+        for value, n in db.execute(
+            GROUPED_SQL.format(column=column, table=table, where=where), params
+        ):
+            counts[value] = counts.get(value, 0) + n
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def _client_only(filters):
+    """True if filters select all tickets or all of one client's tickets"""
+    return filters is None or filters == QueryFilter(
+        client_name=filters.client_name, include_archive=filters.include_archive
+    )
+
+
+def status_counts(db, filters=None):
+    """Return {status: count} for tickets matching filters"""
+    if not _client_only(filters):
+        return _grouped(db, "status", filters)
+    # Hot tickets come from the maintained counter tables in constant time
+    counts = counters.status_counts(db, filters.client_name if filters else None)
+    if filters is not None and filters.include_archive:
+        for status, n in counters.archive_status_counts(db, filters.client_name).items():
+            counts[status] = counts.get(status, 0) + n
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def priority_counts(db, filters=None):
+    """Return {priority: count} for tickets matching filters"""
+    return _grouped(db, "priority", filters)
+
+
+def total_count(db, filters=None):
+    filters = filters or QueryFilter()
+    total = 0
+    for table in filters.tables():
+        if _client_only(filters):
+            counts = (counters.status_counts(db, filters.client_name) if table == HOT_TABLE
+                      else counters.archive_status_counts(db, filters.client_name))
+            total += sum(counts.values())
+            continue
+        where, params = build_where(filters, table)
+        total += db.execute(COUNT_SQL.format(table=table, where=where), params).fetchone()[0]
+    return total
+
+
+def daily_created_counts(db, filters=None):
+    """Return [(YYYY-MM-DD, count), ...] of tickets created per day, oldest first"""
+    if filters is None or filters in (QueryFilter(), QueryFilter(include_archive=True)):
+        # The rollup already covers archived tickets
+        return rollups.daily_created(db)
+    days = {}
+    for table in filters.tables():
+        where, params = build_where(filters, table)
+        for day, n in db.execute(
+            f"SELECT substr(query_created_time, 1, 10) AS day, COUNT(*) "
+            f"FROM {table} {where} GROUP BY day",
+            params
+        ):
+            days[day] = days.get(day, 0) + n
+    return sorted(days.items())
+
+
+def time_series(db, filters=None, granularity='day', start=None, end=None):
+    """[(period, created, resolved, open_at_end), ...] from the daily rollups.
+
+    Only status/priority filters apply; the rollup is not kept per client.
+    """
+    filters = filters or QueryFilter()
+    statuses = filters.statuses or (() if filters.status == 'All' else (filters.status,))
+    return rollups.series(db, granularity, start, end,
+                          priorities=filters.priorities, statuses=statuses)
+
+
+def dashboard_summary(db, filters=None):
+    """Status tiles for a page: total plus one count per known status"""
+    counts = status_counts(db, filters)
+    summary = {status: counts.get(status, 0) for status in STATUSES}
+    summary['Total'] = sum(counts.values())
+    return summary
@@ -1,6 +1,5 @@
 import subprocess
 import sys
-import hashlib
 
 def install_packages():
     """Install required packages"""
@@ -16,15 +15,10 @@ def install_packages():
 def setup_database():
     """Setup database with tables and default users"""
     try:
-        from db_connection import create_tables, get_db
+        from db_connection import create_tables
+        import repository
         
         if create_tables():
-            db = get_db()
-            cursor = db.cursor()
-            
-            def hash_pw(password):
-                return hashlib.sha256(password.encode()).hexdigest()
-            
             default_users = [
                 ("client1", "password123", "Client", "client1@example.com"),
                 ("support1", "password123", "Support", "support1@example.com"),
@@ -33,17 +27,10 @@ def setup_database():
             
             for username, password, role, email in default_users:
                 try:
-                    cursor.execute(
-                        "INSERT INTO users (username, password, role, email) VALUES (?, ?, ?, ?)",
-                        (username, hash_pw(password), role, email)
-                    )
+                    repository.register(username, password, role, email)
                 except:
                     pass
             
-            db.commit()
-            cursor.close()
-            db.close()
-            
             print("✅ Database setup completed!")
             print("Default users created:")
             print("Client: username='client1', password='password123'")
@@ -0,0 +1,226 @@
+"""Cold storage for tickets resolved long ago.
+
+Tickets Resolved more than ARCHIVE_AFTER_DAYS days ago are moved, in
+small batched transactions, from client_queries into query_archive
+(migration 9), which has the same columns plus archived_at and its own
+full-text index. Every live page query keeps reading only the hot table,
+so triage cost follows the open backlog rather than the whole history.
+
+History-wide data is unaffected: the daily rollups and resolution times
+skip archive moves (their triggers check query_archive), so charts and
+SLA percentiles still cover archived tickets. Searches and breakdowns
+include the archive when a QueryFilter sets include_archive=True.
+
+The move runs in a background thread started by startup.ensure_started()
+when ARCHIVE_AFTER_DAYS is set, or on demand:
+
+    python archive.py --days 90
+    python archive.py --restore 17 42
+"""
+import os
+import sys
+import threading
+import time
+
+import timestamps
+
+HOT_TABLE = "client_queries"
+ARCHIVE_TABLE = "query_archive"
+
+# Every client_queries column, in table order
+COLUMNS = (
+    'query_id', 'client_name', 'mail_id', 'mobile_number', 'query_heading',
+    'query_description', 'status', 'priority', 'query_created_time',
+    'query_closed_time', 'assigned_to', 'source_ref', 'version',
+)
+
+# Columns shared by all_tickets() for history-wide aggregates
+UNION_COLUMNS = (
+    'query_id', 'client_name', 'status', 'priority',
+    'query_created_time', 'query_closed_time', 'assigned_to',
+)
+
+AFTER_DAYS = os.environ.get("ARCHIVE_AFTER_DAYS")
+BATCH_SIZE = 500
+INTERVAL_SECONDS = float(os.environ.get("ARCHIVE_INTERVAL", "3600"))
+# Pause between batches so page writes are never queued behind a long move
+BATCH_PAUSE = 0.05
+
+SELECT_CANDIDATES = """
+    SELECT query_id, client_name FROM client_queries
+    WHERE status = 'Resolved' AND query_closed_time < ?
+    ORDER BY query_closed_time LIMIT ?
+"""
+
+
+def not_archived(row):
+    """Trigger WHEN clause: skip rows that are moving to or from the archive"""
+    return f"NOT EXISTS (SELECT 1 FROM query_archive WHERE query_id = {row}.query_id)"
+
+
+def archive_exists(db):
+    return db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (ARCHIVE_TABLE,)
+    ).fetchone() is not None
+
+
+def all_tickets(db):
+    """FROM-clause source over hot and archived tickets (UNION_COLUMNS only)"""
+    if not archive_exists(db):
+        return HOT_TABLE
+    columns = ", ".join(UNION_COLUMNS)
+    return (f"(SELECT {columns} FROM {HOT_TABLE} "
+            f"UNION ALL SELECT {columns} FROM {ARCHIVE_TABLE})")
+
+
+def _move(db, query_ids, source, target):
+    marks = ", ".join("?" * len(query_ids))
+    columns = ", ".join(COLUMNS)
+    db.execute(
+        f"INSERT INTO {target} ({columns}) "
+        f"SELECT {columns} FROM {source} WHERE query_id IN ({marks})",
+        query_ids
+    )
+    db.execute(f"DELETE FROM {source} WHERE query_id IN ({marks})", query_ids)
+
+
+def archive_batch(db, cutoff, batch_size=BATCH_SIZE):
+    """Move up to batch_size tickets resolved before cutoff (caller commits).
+
+    Returns (moved, client names touched).
+    """
+    db.execute("BEGIN IMMEDIATE")
+    rows = db.execute(SELECT_CANDIDATES, (cutoff, batch_size)).fetchall()
+    if rows:
+        _move(db, [query_id for query_id, _ in rows], HOT_TABLE, ARCHIVE_TABLE)
+    return len(rows), {client_name for _, client_name in rows}
+
+
+def restore_tickets(db, query_ids):
+    """Move archived tickets back into client_queries (caller commits).
+
+    Returns (restored, client names touched).
+    """
+    query_ids = [int(query_id) for query_id in query_ids]
+    if not query_ids:
+        return 0, set()
+    db.execute("BEGIN IMMEDIATE")
+    rows = db.execute(
+        f"SELECT query_id, client_name FROM {ARCHIVE_TABLE} "
+        f"WHERE query_id IN ({', '.join('?' * len(query_ids))})",
+        query_ids
+    ).fetchall()
+    if rows:
+        _move(db, [query_id for query_id, _ in rows], ARCHIVE_TABLE, HOT_TABLE)
+    return len(rows), {client_name for _, client_name in rows}
+
+
+def archive_resolved(days, batch_size=BATCH_SIZE, max_batches=None, pause=BATCH_PAUSE):
+    """Archive everything resolved more than days ago, one short transaction per batch"""
+    from db_connection import db_session
+    from query_cache import cache
+
+    cutoff = timestamps.ago(days)
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with db_session() as db:
+            moved, owners = archive_batch(db, cutoff, batch_size)
+        for owner in owners:
+            cache.invalidate_client(owner)
+        total += moved
+        batches += 1
+        if moved < batch_size:
+            break
+        time.sleep(pause)
+    return total
+
+
+def restore(query_ids):
+    """Bring archived tickets back into the hot table; returns how many moved"""
+    from db_connection import db_session
+    from query_cache import cache
+
+    with db_session() as db:
+        restored, owners = restore_tickets(db, query_ids)
+    for owner in owners:
+        cache.invalidate_client(owner)
+    return restored
+
+
+class Archiver:
+    """Daemon thread that archives old resolved tickets every interval"""
+
+    def __init__(self, days, interval=INTERVAL_SECONDS):
+        self.days = days
+        self.interval = interval
+        self.runs = 0
+        self.archived = 0
+        self.last_error = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="archiver", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.archived += archive_resolved(self.days)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self.runs += 1
+            time.sleep(self.interval)
+
+    def stats(self):
+        return {
+            'days': self.days,
+            'runs': self.runs,
+            'archived': self.archived,
+            'last_error': self.last_error,
+        }
+
+
+archiver = None
+_archiver_lock = threading.Lock()
+
+
+def start_archiver(days=AFTER_DAYS):
+    """Start the background archiver once per process if days is configured"""
+    global archiver
+    if archiver is not None or not days:
+        return archiver
+    with _archiver_lock:
+        if archiver is None:
+            archiver = Archiver(int(days))
+            archiver.start()
+    return archiver
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_connection import create_tables, db_session
+
+    parser = argparse.ArgumentParser(description="Archive old resolved tickets")
+    parser.add_argument("--days", type=int, default=int(AFTER_DAYS or 90),
+                        help="archive tickets resolved more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--restore", type=int, nargs="+", metavar="QUERY_ID",
+                        help="move these tickets back to the hot table instead")
+    args = parser.parse_args()
+
+    if not create_tables():
+        sys.exit(1)
+    if args.restore:
+        print(f"✅ Restored {restore(args.restore)} tickets")
+    else:
+        start = time.perf_counter()
+        moved = archive_resolved(args.days, args.batch_size)
+        print(f"✅ Archived {moved} tickets resolved before {timestamps.ago(args.days)} "
+              f"in {time.perf_counter() - start:.2f}s")
+    with db_session() as db:
+        hot = db.execute(f"SELECT COUNT(*) FROM {HOT_TABLE}").fetchone()[0]
+        cold = db.execute(f"SELECT COUNT(*) FROM {ARCHIVE_TABLE}").fetchone()[0]
+    print(f"📦 {hot} hot tickets, {cold} archived")
@@ -0,0 +1,205 @@
+"""Load-balanced auto-assignment of tickets to Support agents.
+
+Each process keeps a min-heap of (weighted open workload, agent) over the
+Support users, where an open ticket weighs PRIORITY_WEIGHTS[priority]. A
+ticket goes to the agent at the top of the heap, whose load then grows by
+the ticket's weight: O(log agents) per assignment, no per-ticket queries.
+
+The heap is rebuilt from the database (one grouped read over the
+assigned_to/status index from migration 11) on startup, whenever a Support
+user registers, and at most REFRESH_SECONDS after the last rebuild, which
+absorbs resolutions, manual reassignments and other processes' writes.
+
+New tickets are assigned inside the writer's batch transaction; tickets
+that are still unassigned (imports, older data) are swept in batches:
+
+    python assignment.py --limit 5000
+"""
+import heapq
+import os
+import sys
+import threading
+import time
+
+from db_connection import db_session
+import instrumentation
+from query_cache import cache
+
+ENABLED = os.environ.get("AUTO_ASSIGN", "1") != "0"
+
+OPEN_STATUSES = ('Open', 'In Progress')
+
+PRIORITY_WEIGHTS = {'High': 3, 'Medium': 2, 'Low': 1}
+DEFAULT_WEIGHT = PRIORITY_WEIGHTS['Medium']
+
+BATCH_SIZE = 500
+REFRESH_SECONDS = 60.0
+
+SELECT_AGENTS = "SELECT username FROM users WHERE role = 'Support'"
+SELECT_LOADS = f"""
+    SELECT assigned_to, priority, COUNT(*) FROM client_queries
+    WHERE assigned_to IS NOT NULL AND status IN ({', '.join('?' * len(OPEN_STATUSES))})
+    GROUP BY assigned_to, priority
+"""
+# One (assigned_to, status, created) index range per status, merged in created order
+SELECT_UNASSIGNED = " UNION ALL ".join(
+    "SELECT query_id, client_name, priority, query_created_time FROM client_queries "
+    "WHERE assigned_to IS NULL AND status = ?"
+    for _ in OPEN_STATUSES
+) + " ORDER BY query_created_time LIMIT ?"
+ASSIGN = """
+    UPDATE client_queries SET assigned_to = ?, version = version + 1
+    WHERE query_id = ? AND assigned_to IS NULL
+"""
+
+
+def weight(priority):
+    return PRIORITY_WEIGHTS.get(priority, DEFAULT_WEIGHT)
+
+
+class AssignmentEngine:
+    """Thread-safe workload heap shared by the pages and the ticket writer"""
+
+    def __init__(self, refresh_seconds=REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._heap = []  # [(load, agent)], one entry per agent
+        self._loads = {}
+        self._built_at = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.assigned = 0
+
+    def rebuild(self, db):
+        """Reload agents and their open workload from the database"""
+        loads = {agent: 0 for (agent,) in db.execute(SELECT_AGENTS)}
+        for agent, priority, n in db.execute(SELECT_LOADS, OPEN_STATUSES):
+            if agent in loads:
+                loads[agent] += weight(priority) * n
+        with self._lock:
+            self._loads = loads
+            self._heap = [(load, agent) for agent, load in loads.items()]
+            heapq.heapify(self._heap)
+            self._built_at = time.monotonic()
+            self.rebuilds += 1
+
+    def invalidate(self):
+        """Force a rebuild before the next assignment (e.g. a new agent registered)"""
+        with self._lock:
+            self._built_at = None
+
+    def _stale(self):
+        return (self._built_at is None
+                or time.monotonic() - self._built_at > self.refresh_seconds)
+
+    def choose(self, priorities):
+        """Pick an agent per priority, least-loaded first; None if there are no agents"""
+        with self._lock:
+            if not self._heap:
+                return [None] * len(priorities)
+            agents = []
+            for priority in priorities:
+                load, agent = self._heap[0]
+                load += weight(priority)
+                heapq.heapreplace(self._heap, (load, agent))
+                self._loads[agent] = load
+                agents.append(agent)
+            return agents
+
+    def assign(self, db, tickets):
+        """Assign [(query_id, priority), ...] in the caller's transaction.
+
+        Returns [(query_id, agent), ...] for the tickets that were assigned.
+        If the transaction later rolls back, call invalidate().
+        """
+        if not tickets:
+            return []
+        if self._stale():
+            self.rebuild(db)
+        with instrumentation.timer("assignment_seconds"):
+            agents = self.choose([priority for _, priority in tickets])
+            pairs = [(agent, query_id)
+                     for (query_id, _), agent in zip(tickets, agents) if agent is not None]
+            updated = db.executemany(ASSIGN, pairs).rowcount if pairs else 0
+        if updated != len(pairs):
+            # Someone else assigned some of these first; our loads are off
+            self.invalidate()
+        self.assigned += updated
+        return [(query_id, agent) for agent, query_id in pairs]
+
+    def loads(self):
+        """{agent: weighted open workload}"""
+        with self._lock:
+            return dict(self._loads)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'agents': len(self._loads),
+                'assigned': self.assigned,
+                'rebuilds': self.rebuilds,
+            }
+
+
+engine = AssignmentEngine()
+
+
+def assign_new(db, tickets):
+    """Route just-inserted [(query_id, priority), ...] unless AUTO_ASSIGN=0"""
+    return engine.assign(db, tickets) if ENABLED else []
+
+
+def assign_batch(db, batch_size=BATCH_SIZE):
+    """Assign up to batch_size of the oldest unassigned open tickets (caller commits).
+
+    Returns (assigned, client names touched).
+    """
+    db.execute("BEGIN IMMEDIATE")
+    rows = db.execute(SELECT_UNASSIGNED, OPEN_STATUSES + (batch_size,)).fetchall()
+    assigned = engine.assign(db, [(query_id, priority) for query_id, _, priority, _ in rows])
+    done = {query_id for query_id, _ in assigned}
+    return len(assigned), {client for query_id, client, _, _ in rows if query_id in done}
+
+
+def assign_unassigned(limit=None, batch_size=BATCH_SIZE):
+    """Sweep unassigned open tickets, one short transaction per batch; returns how many"""
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        try:
+            with db_session() as db:
+                assigned, owners = assign_batch(db, size)
+        except Exception:
+            engine.invalidate()
+            raise
+        for owner in owners:
+            cache.invalidate_client(owner)
+        total += assigned
+        if assigned < size:
+            break
+    return total
+
+
+def warm():
+    """Build the heap once at startup so the first submission does not pay for it"""
+    if ENABLED and engine.rebuilds == 0:
+        with db_session() as db:
+            engine.rebuild(db)
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_connection import create_tables
+
+    parser = argparse.ArgumentParser(description="Auto-assign unassigned open tickets")
+    parser.add_argument("--limit", type=int, default=None, help="assign at most this many")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if not create_tables():
+        sys.exit(1)
+    start = time.perf_counter()
+    assigned = assign_unassigned(args.limit, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Assigned {assigned} tickets in {elapsed:.2f}s")
+    for agent, load in sorted(engine.loads().items(), key=lambda item: -item[1]):
+        print(f"  {agent:<20} load {load}")
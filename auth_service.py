@@ -0,0 +1,260 @@
+"""In-process authentication service: session cache and login rate limiting.
+
+login() throttles attempts per username and per client address with token
+buckets, verifies the password through repository.authenticate(), and on
+success issues a session token: "username|role|issued_at|nonce", HMAC
+signed. The verified session is kept in a bounded cache keyed on that
+token, so validating a session on every rerun is a signature check plus a
+dict lookup and never touches the users table. Each use pushes the idle
+timeout (SESSION_TTL) forward, up to SESSION_MAX_AGE after login.
+
+The cache is not the only record of a session: a signed token that misses
+it (evicted, or the process restarted) is checked against SESSION_MAX_AGE
+and re-admitted with one users lookup. Tokens that logged out or went idle
+are remembered until they are past SESSION_MAX_AGE anyway.
+
+The client address comes from the connection peer, or from
+X-Forwarded-For only when TRUSTED_PROXY_HOPS says proxies append to it.
+
+Both limiters and the session cache are LRU-bounded, so a credential-stuffing
+burst across millions of usernames cannot grow memory without limit.
+Counters are exposed by stats().
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import repository
+
+SECRET = os.environ.get("AUTH_SECRET", "").encode() or secrets.token_bytes(32)
+
+SESSION_TTL = 30 * 60  # idle timeout, extended on every use
+SESSION_MAX_AGE = 12 * 60 * 60  # from login, however active the session
+MAX_SESSIONS = 10000
+
+# Token buckets: (capacity, tokens refilled per second)
+USERNAME_BUCKET = (5, 1 / 12)
+ADDRESS_BUCKET = (20, 1.0)
+MAX_BUCKETS = 10000
+
+# Reverse proxies in front of Streamlit that each append the address they saw
+# to X-Forwarded-For. 0 ignores the header, which any client can set itself.
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "0"))
+
+# Support users who may open the Performance page
+ADMIN_USERS = frozenset(
+    name.strip() for name in os.environ.get("ADMIN_USERS", "admin").split(",") if name.strip()
+)
+
+
+def is_admin(user):
+    return user is not None and user.role == "Support" and user.username in ADMIN_USERS
+
+
+def client_address(peer, forwarded_for, trusted_hops=TRUSTED_PROXY_HOPS):
+    """Address to rate-limit logins by, or None to rely on the username buckets.
+
+    Behind trusted_hops proxies the peer is the nearest proxy, so the address
+    is the X-Forwarded-For entry the outermost trusted proxy appended,
+    trusted_hops from the right. Entries left of it are client-supplied.
+    """
+    if trusted_hops <= 0:
+        return peer or None
+    entries = [entry.strip() for entry in (forwarded_for or "").split(",")]
+    if len(entries) < trusted_hops:
+        return None
+    return entries[-trusted_hops] or None
+
+
+class RateLimited(Exception):
+    """Too many login attempts for this username or address"""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Too many login attempts ({scope}); retry in {retry_after:.0f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets with LRU eviction of idle keys"""
+
+    def __init__(self, capacity, refill_per_sec, max_keys=MAX_BUCKETS):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Take one token; returns 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_sec)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.refill_per_sec
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AuthService:
+    def __init__(self, secret=SECRET, session_ttl=SESSION_TTL, max_sessions=MAX_SESSIONS,
+                 max_age=SESSION_MAX_AGE):
+        self.secret = secret
+        self.session_ttl = session_ttl
+        self.max_age = max_age
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # token -> (idle_expires_at, User)
+        self._revoked = OrderedDict()  # token -> issued_at, for logged-out or idle tokens
+        self._lock = threading.Lock()
+        self.user_limiter = TokenBucketLimiter(*USERNAME_BUCKET)
+        self.address_limiter = TokenBucketLimiter(*ADDRESS_BUCKET)
+        self.counters = {
+            'session_hits': 0,
+            'session_misses': 0,
+            'session_restores': 0,
+            'logins_ok': 0,
+            'logins_failed': 0,
+            'rejected_username': 0,
+            'rejected_address': 0,
+            'hash_count': 0,
+            'hash_seconds': 0.0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _sign(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()
+
+    def _issue(self, user):
+        payload = (f"{user.username}|{user.role}|{int(time.time())}|"
+                   f"{secrets.token_hex(16)}").encode()
+        token = (base64.urlsafe_b64encode(payload).decode() + "." +
+                 base64.urlsafe_b64encode(self._sign(payload)).decode())
+        with self._lock:
+            self._cache(token, user, time.monotonic())
+        return token
+
+    def _cache(self, token, user, now):
+        self._sessions[token] = (now + self.session_ttl, user)
+        self._sessions.move_to_end(token)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _claims(self, token):
+        """(username, role, issued_at) of a correctly signed token, else None"""
+        try:
+            encoded, signature = token.split(".")
+            payload = base64.urlsafe_b64decode(encoded)
+            if not hmac.compare_digest(self._sign(payload), base64.urlsafe_b64decode(signature)):
+                return None
+            username, role, issued_at, _ = payload.decode().rsplit("|", 3)
+            return username, role, int(issued_at)
+        except (ValueError, TypeError):
+            return None
+
+    def _revoke(self, token, issued_at):
+        """Refuse token from now on (caller holds the lock)"""
+        self._sessions.pop(token, None)
+        self._revoked[token] = issued_at
+        cutoff = time.time() - self.max_age
+        # Oldest first: drop entries the max age already refuses, then cap the size
+        while self._revoked and (next(iter(self._revoked.values())) < cutoff
+                                 or len(self._revoked) > self.max_sessions):
+            self._revoked.popitem(last=False)
+
+    def login(self, username, password, role, address=None):
+        """Return (User, token) on success or (None, None); raises RateLimited"""
+        wait = self.user_limiter.acquire(username.lower())
+        if wait:
+            self._count('rejected_username')
+            raise RateLimited('username', wait)
+        if address:
+            wait = self.address_limiter.acquire(address)
+            if wait:
+                self._count('rejected_address')
+                raise RateLimited('address', wait)
+
+        start = time.perf_counter()
+        try:
+            user = repository.authenticate(username, password, role)
+        finally:
+            self._count('hash_count')
+            self._count('hash_seconds', time.perf_counter() - start)
+        if user is None:
+            self._count('logins_failed')
+            return None, None
+        self._count('logins_ok')
+        return user, self._issue(user)
+
+    def validate(self, token):
+        """Return the User for a live session token, or None.
+
+        Every successful call extends the session's idle timeout.
+        """
+        claims = self._claims(token) if token else None
+        if claims is None or claims[2] + self.max_age <= time.time():
+            self._count('session_misses')
+            return None
+        username, role, issued_at = claims
+        now = time.monotonic()
+        with self._lock:
+            if token in self._revoked:
+                self.counters['session_misses'] += 1
+                return None
+            entry = self._sessions.get(token)
+            if entry is not None:
+                if entry[0] <= now:
+                    self._revoke(token, issued_at)
+                    self.counters['session_misses'] += 1
+                    return None
+                self._cache(token, entry[1], now)
+                self.counters['session_hits'] += 1
+                return entry[1]
+
+        # Signed and within the max age, but not cached here: check the user still exists
+        user = repository.get_user(username, role)
+        with self._lock:
+            if user is None or token in self._revoked:
+                self.counters['session_misses'] += 1
+                return None
+            self._cache(token, user, now)
+            self.counters['session_restores'] += 1
+        return user
+
+    def logout(self, token):
+        claims = self._claims(token) if token else None
+        with self._lock:
+            self._sessions.pop(token, None)
+            if claims is not None:
+                self._revoke(token, claims[2])
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['sessions'] = len(self._sessions)
+            stats['revoked_sessions'] = len(self._revoked)
+        stats['tracked_usernames'] = len(self.user_limiter)
+        stats['tracked_addresses'] = len(self.address_limiter)
+        stats['avg_hash_ms'] = (
+            stats['hash_seconds'] / stats['hash_count'] * 1000 if stats['hash_count'] else 0.0
+        )
+        return stats
+
+
+service = AuthService()
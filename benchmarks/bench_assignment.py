@@ -0,0 +1,109 @@
+"""Benchmark: auto-assignment throughput, balance and My Queue latency.
+
+Seeds a scratch database with Support agents, a pre-assigned open backlog
+and a pile of unassigned tickets, then measures:
+
+    heap choose     picking agents in memory (the heap alone)
+    batch sweep     assignment.assign_unassigned(), UPDATEs included
+    rebuild         reloading the heap from the assigned_to/status index
+    my queue        one agent's first page through the assignee index
+
+and how evenly the weighted load ended up spread across agents.
+
+    python benchmarks/bench_assignment.py --agents 50 --tickets 50000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import assignment
+import db_connection
+from query_builder import QueryFilter, fetch_page
+
+PRIORITIES = list(assignment.PRIORITY_WEIGHTS)
+
+
+def seed(agents, tickets, assigned):
+    rng = random.Random(0)
+    names = [f"agent{i}" for i in range(agents)]
+    with db_connection.db_session() as db:
+        db.executemany(
+            "INSERT INTO users (username, password, role, email) VALUES (?, 'x', 'Support', ?)",
+            ((name, f"{name}@example.com") for name in names)
+        )
+        db.executemany("""
+            INSERT INTO client_queries
+            (client_name, mail_id, mobile_number, query_heading, query_description,
+             status, priority, query_created_time, assigned_to)
+            VALUES (?, ?, '9876543210', 'Login page not loading', 'Details', ?, ?, ?, ?)
+        """, (
+            (f"client{i % 200}", f"client{i % 200}@example.com",
+             rng.choice(assignment.OPEN_STATUSES), rng.choice(PRIORITIES),
+             f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00",
+             rng.choice(names) if i < assigned else None)
+            for i in range(assigned + tickets)
+        ))
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--tickets", type=int, default=50000, help="unassigned tickets to route")
+    parser.add_argument("--assigned", type=int, default=10000, help="pre-assigned open backlog")
+    parser.add_argument("--batch-size", type=int, default=assignment.BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_connection.DB_PATH = os.path.join(tmp, "assignment.sqlite")
+        db_connection.create_tables()
+        names = seed(args.agents, args.tickets, args.assigned)
+        print(f"{args.agents} agents, {args.assigned} assigned + {args.tickets} unassigned tickets")
+
+        with db_connection.db_session() as db:
+            start = time.perf_counter()
+            assignment.engine.rebuild(db)
+            rebuild = time.perf_counter() - start
+
+        # Heap only, on a throwaway engine so the sweep starts from the real loads
+        scratch = assignment.AssignmentEngine()
+        scratch._heap = [(0, name) for name in names]
+        priorities = [random.choice(PRIORITIES) for _ in range(args.tickets)]
+        start = time.perf_counter()
+        scratch.choose(priorities)
+        choose = time.perf_counter() - start
+
+        start = time.perf_counter()
+        swept = assignment.assign_unassigned(batch_size=args.batch_size)
+        sweep = time.perf_counter() - start
+
+        loads = assignment.engine.loads()
+        with db_connection.db_session() as db:
+            filters = QueryFilter(assigned_to=names[0], statuses=assignment.OPEN_STATUSES)
+            runs = 50
+            start = time.perf_counter()
+            for _ in range(runs):
+                fetch_page(db, filters, 50)
+            queue_ms = (time.perf_counter() - start) / runs * 1000
+            queued = db.execute(
+                "SELECT COUNT(*) FROM client_queries WHERE assigned_to = ?", (names[0],)
+            ).fetchone()[0]
+        db_connection.get_pool().close_all()
+
+    print(f"{'step':<16}{'items':>10}{'seconds':>10}{'items/s':>12}")
+    print(f"{'heap choose':<16}{args.tickets:>10}{choose:>10.3f}{args.tickets / choose:>12.0f}")
+    print(f"{'batch sweep':<16}{swept:>10}{sweep:>10.3f}{swept / sweep:>12.0f}")
+    print(f"rebuild: {rebuild * 1000:.1f} ms   my queue page ({queued} tickets): {queue_ms:.2f} ms")
+    print(f"weighted load per agent: min {min(loads.values())}, max {max(loads.values())}, "
+          f"spread {max(loads.values()) - min(loads.values())}")
+
+
+if __name__ == "__main__":
+    main()
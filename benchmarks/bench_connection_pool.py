@@ -0,0 +1,113 @@
+"""Benchmark: page reruns per second with and without the connection pool.
+
+Simulates concurrent Streamlit sessions, each rerun issuing the same queries
+as main_app.py and pages/1_Client_Page.py, against a scratch database.
+
+    python benchmarks/bench_connection_pool.py --sessions 50 --seconds 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+
+RERUN_QUERIES = (
+    ("SELECT COUNT(*) FROM client_queries WHERE client_name=?", True),
+    ("SELECT status FROM client_queries WHERE client_name=?", True),
+    ("""SELECT query_id, mail_id, query_heading, status, priority, query_created_time
+        FROM client_queries WHERE client_name=?
+        ORDER BY query_created_time DESC""", True),
+)
+
+
+def seed(rows, clients):
+    """Create tables and fill client_queries with synthetic rows"""
+    db_connection.create_tables()
+    start = datetime(2025, 1, 1)
+    with db_connection.db_session() as db:
+        db.executemany("""
+            INSERT INTO client_queries
+            (client_name, mail_id, mobile_number, query_heading,
+             query_description, status, priority, query_created_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (f"client{i % clients}", f"client{i % clients}@example.com", "9876543210",
+             "Bug Report", "Form validation not working properly.",
+             random.choice(["Open", "In Progress", "Resolved"]),
+             random.choice(["Low", "Medium", "High"]),
+             (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'))
+            for i in range(rows)
+        ))
+
+
+def rerun_direct(client):
+    # Baseline: the pre-pool pattern of one connect/close per query
+    for sql, by_client in RERUN_QUERIES:
+        conn = sqlite3.connect(db_connection.DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute(sql, (client,) if by_client else ())
+        cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+
+def rerun_pooled(client):
+    for sql, by_client in RERUN_QUERIES:
+        with db_connection.db_session() as db:
+            db.execute(sql, (client,) if by_client else ()).fetchall()
+
+
+def run(rerun, sessions, seconds, clients):
+    counts = [0] * sessions
+    stop = threading.Event()
+
+    def session(idx):
+        client = f"client{idx % clients}"
+        while not stop.is_set():
+            rerun(client)
+            counts[idx] += 1
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_connection.DB_PATH = os.path.join(tmp, "bench.sqlite")
+        seed(args.rows, args.clients)
+
+        before = run(rerun_direct, args.sessions, args.seconds, args.clients)
+        after = run(rerun_pooled, args.sessions, args.seconds, args.clients)
+        db_connection.get_pool().close_all()
+
+    print(f"Sessions: {args.sessions}, rows: {args.rows}")
+    print(f"connect-per-query : {before:10.1f} reruns/s")
+    print(f"pooled            : {after:10.1f} reruns/s")
+    print(f"speedup           : {after / before:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: CSV import throughput and re-import cost.
+
+Writes a CSV of --rows tickets in synthetic_client_queries.csv format (the
+sample rows repeated, each with a unique query_id and a numbered
+description so the duplicate index hashes distinct texts), then times:
+
+    import      import_csv() into an empty database
+    re-import   the same file again; every row is already loaded
+
+and checks that the re-import neither inserts rows nor moves the
+client_queries AUTOINCREMENT sequence.
+
+    python benchmarks/bench_import.py --rows 2000000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+import import_csv
+
+SAMPLE = os.path.join(parent_dir, "synthetic_client_queries.csv")
+
+
+def write_csv(path, rows):
+    with open(SAMPLE, newline='', encoding='utf-8') as f:
+        sample = list(csv.DictReader(f))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(sample[0]))
+        writer.writeheader()
+        for i in range(rows):
+            row = dict(sample[i % len(sample)])
+            row['query_id'] = f"B{i:09d}"
+            row['query_description'] = f"{row['query_description']} (ticket {i})"
+            writer.writerow(row)
+
+
+def sequence():
+    with db_connection.db_session() as db:
+        row = db.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'client_queries'"
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--batch-size", type=int, default=import_csv.BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "import.csv")
+        write_csv(path, args.rows)
+        db_connection.DB_PATH = os.path.join(tmp, "import.sqlite")
+        db_connection.create_tables()
+
+        def progress(read, inserted, seconds):
+            print(f"  {read:,} rows read ({read / seconds:,.0f} rows/s)", end="\r", flush=True)
+
+        first = import_csv.import_csv(path, args.batch_size, progress=progress)
+        before = sequence()
+        again = import_csv.import_csv(path, args.batch_size)
+        after = sequence()
+        db_connection.get_pool().close_all()
+
+    print(f"\n{'step':<12}{'read':>12}{'inserted':>12}{'seconds':>10}{'rows/s':>12}")
+    for name, stats in (("import", first), ("re-import", again)):
+        print(f"{name:<12}{stats['read']:>12}{stats['inserted']:>12}"
+              f"{stats['seconds']:>10.1f}{stats['rows_per_sec']:>12.0f}")
+    print(f"sqlite_sequence: {before} after import, {after} after re-import")
+    if after != before or again['inserted']:
+        print("❌ Re-import used up AUTOINCREMENT ids")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
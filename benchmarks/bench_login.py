@@ -0,0 +1,107 @@
+"""Benchmark: login latency and throughput at the configured hashing cost.
+
+Runs concurrent repository.authenticate() calls (which verify on the
+passwords thread pool) and reports latency percentiles and logins/s.
+Pass --max-p95-ms / --min-throughput to turn it into a pass/fail check
+that pins login cost, e.g. after changing PASSWORD_SCRYPT_N.
+
+    python benchmarks/bench_login.py --users 20 --seconds 10 --max-p95-ms 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+import passwords
+import repository
+
+PASSWORD = "password123"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--users", type=int, default=20, help="concurrent login threads")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--max-p95-ms", type=float, default=None)
+    parser.add_argument("--min-throughput", type=float, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_connection.DB_PATH = os.path.join(tmp, "login.sqlite")
+        db_connection.create_tables()
+        hashed = passwords.hash_password(PASSWORD)
+        with db_connection.db_session() as db:
+            db.executemany(
+                "INSERT INTO users (username, password, role, email) VALUES (?, ?, ?, ?)",
+                [(f"user{i}", hashed, "Client", f"user{i}@example.com")
+                 for i in range(args.accounts)]
+            )
+
+        latencies = []
+        failures = []
+        busy = []
+        stop = threading.Event()
+        lock = threading.Lock()
+
+        def user(idx):
+            local, n = [], idx
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    ok = repository.authenticate(f"user{n % args.accounts}", PASSWORD, "Client")
+                except passwords.PasswordServiceBusy:
+                    busy.append(1)
+                    continue
+                local.append(time.perf_counter() - start)
+                if not ok:
+                    failures.append(n)
+                n += args.users
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=user, args=(i,)) for i in range(args.users)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        db_connection.get_pool().close_all()
+
+    latencies.sort()
+    throughput = len(latencies) / args.seconds
+    p95 = percentile(latencies, 95) * 1000
+    hasher = passwords.hasher
+    print(f"Hasher: {hasher.algorithm} {vars(hasher)}, pool workers: {passwords.MAX_WORKERS}")
+    print(f"Logins: {len(latencies):,} ({throughput:.1f}/s), failures: {len(failures)}, "
+          f"rejected busy: {len(busy)}")
+    print(f"Latency p50 {percentile(latencies, 50) * 1000:.1f}ms  p95 {p95:.1f}ms  "
+          f"p99 {percentile(latencies, 99) * 1000:.1f}ms")
+
+    ok = not failures
+    if args.max_p95_ms is not None and p95 > args.max_p95_ms:
+        print(f"❌ p95 {p95:.1f}ms exceeds {args.max_p95_ms:.1f}ms")
+        ok = False
+    if args.min_throughput is not None and throughput < args.min_throughput:
+        print(f"❌ throughput {throughput:.1f}/s below {args.min_throughput:.1f}/s")
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark: peak memory per Support page rerun, DataFrames vs ticket records.
+
+"dataframe" replays the old page: fetch every column of every ticket,
+build a DataFrame, .copy() it for filtering and again for display.
+"records" uses the repository: one page of Ticket tuples, converted to a
+DataFrame only for the rendered rows.
+
+Each mode runs in its own subprocess so peak RSS is measured cleanly.
+
+    python benchmarks/bench_memory.py --rows 200000 --sessions 20
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import tracemalloc
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pandas as pd
+
+import db_connection
+
+ALL_COLUMNS = [
+    'query_id', 'client_name', 'mail_id', 'mobile_number', 'query_heading',
+    'query_description', 'status', 'priority', 'query_created_time',
+    'query_closed_time', 'assigned_to'
+]
+
+
+def seed(rows):
+    db_connection.create_tables()
+    with db_connection.db_session() as db:
+        db.executemany("""
+            INSERT INTO client_queries
+            (client_name, mail_id, mobile_number, query_heading,
+             query_description, status, priority, query_created_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (f"client{i % 500}", f"client{i % 500}@example.com", "9876543210",
+             "Form validation not working", "Describe the issue in detail. " * 8,
+             random.choice(["Open", "In Progress", "Resolved"]),
+             random.choice(["Low", "Medium", "High"]),
+             f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00")
+            for i in range(rows)
+        ))
+
+
+def rerun_dataframe():
+    with db_connection.db_session() as db:
+        data = db.execute(
+            f"SELECT {', '.join(ALL_COLUMNS)} FROM client_queries ORDER BY query_created_time DESC"
+        ).fetchall()
+    df = pd.DataFrame(data, columns=ALL_COLUMNS)
+    filtered_df = df.copy()
+    filtered_df = filtered_df[filtered_df['priority'].isin(['Low', 'Medium', 'High'])]
+    display_df = filtered_df[['query_id', 'client_name', 'mail_id', 'query_heading',
+                              'status', 'priority', 'query_created_time']].copy()
+    return len(display_df)
+
+
+def rerun_records():
+    import repository
+    from query_builder import QueryFilter, LIST_COLUMNS
+
+    filters = QueryFilter(priorities=('Low', 'Medium', 'High'))
+    tickets, _ = repository.list_queries(filters, 50, None)
+    display_df = repository.to_frame(tickets, LIST_COLUMNS)
+    return len(display_df)
+
+
+def child(mode, sessions):
+    """Run inside the subprocess: measure one rerun, then `sessions` concurrent reruns"""
+    rerun = rerun_dataframe if mode == "dataframe" else rerun_records
+    rerun()  # warm imports and the connection pool
+    from query_cache import cache
+    cache.clear()
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    rerun()
+    _, single_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cache.clear()
+
+    threads = [threading.Thread(target=rerun) for _ in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'mode': mode,
+        'rerun_peak_kb': single_peak / 1024,
+        'rss_growth_kb': peak_rss - baseline_rss,
+        'rss_growth_per_session_kb': (peak_rss - baseline_rss) / sessions,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--child", choices=["dataframe", "records"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        db_connection.DB_PATH = args.db
+        child(args.child, args.sessions)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.sqlite")
+        db_connection.DB_PATH = db_path
+        seed(args.rows)
+        db_connection.get_pool().close_all()
+
+        print(f"{args.rows:,} tickets, {args.sessions} concurrent sessions "
+              f"(ru_maxrss is KB on Linux, bytes on macOS)")
+        print(f"{'mode':<12}{'rerun peak':>14}{'RSS growth':>14}{'per session':>14}")
+        for mode in ("dataframe", "records"):
+            out = subprocess.check_output([
+                sys.executable, os.path.abspath(__file__), "--child", mode,
+                "--db", db_path, "--sessions", str(args.sessions)
+            ]).decode().strip().splitlines()[-1]
+            r = json.loads(out)
+            print(f"{mode:<12}{r['rerun_peak_kb']:>12.0f}KB{r['rss_growth_kb']:>12.0f}KB"
+                  f"{r['rss_growth_per_session_kb']:>12.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: FTS5 search against the old pandas str.contains scan.
+
+Builds scratch databases of 10k, 100k and 1M tickets using headings and
+descriptions from synthetic_client_queries.csv, then times both search paths
+for a few typical search terms.
+
+    python benchmarks/bench_search.py --sizes 10000 100000 1000000
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+from query_builder import QueryFilter, count_matching
+from search import search
+
+CSV_PATH = os.path.join(parent_dir, "synthetic_client_queries.csv")
+TERMS = ["validation", "tab focus", "refund", "export csv", "joshua"]
+
+
+def load_samples():
+    with open(CSV_PATH, newline='', encoding='utf-8') as f:
+        return [
+            (row['client_email'], row['query_heading'], row['query_description'])
+            for row in csv.DictReader(f)
+        ]
+
+
+def build_db(path, rows, samples):
+    db_connection.DB_PATH = path
+    db_connection.create_tables()
+    start = datetime(2024, 1, 1)
+    with db_connection.db_session() as db:
+        db.executemany("""
+            INSERT INTO client_queries
+            (client_name, mail_id, mobile_number, query_heading,
+             query_description, status, priority, query_created_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (f"client{i % 500}", mail, "9876543210", heading, description,
+             random.choice(["Open", "In Progress", "Resolved"]),
+             random.choice(["Low", "Medium", "High"]),
+             (start + timedelta(seconds=30 * i)).strftime('%Y-%m-%d %H:%M:%S'))
+            for i, (mail, heading, description) in
+            ((i, random.choice(samples)) for i in range(rows))
+        ))
+
+
+def time_call(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_size(rows, samples, tmp):
+    build_db(os.path.join(tmp, f"search_{rows}.sqlite"), rows, samples)
+    with db_connection.db_session() as db:
+        df = pd.DataFrame(
+            db.execute("SELECT query_id, query_heading, mail_id FROM client_queries").fetchall(),
+            columns=['query_id', 'query_heading', 'mail_id']
+        )
+        results = []
+        for term in TERMS:
+            pandas_ms = time_call(lambda: df[
+                df['query_heading'].str.contains(term, case=False, na=False) |
+                df['mail_id'].str.contains(term, case=False, na=False)
+            ])
+            count_ms = time_call(lambda: count_matching(db, QueryFilter(search=term)))
+            ranked_ms = time_call(lambda: search(db, term, limit=10))
+            results.append((term, pandas_ms, count_ms, ranked_ms))
+    db_connection.get_pool().close_all()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    samples = load_samples()
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            print(f"\n{rows:,} tickets")
+            print(f"{'term':<14}{'pandas scan':>14}{'fts count':>14}{'fts top-10':>14}")
+            for term, pandas_ms, count_ms, ranked_ms in bench_size(rows, samples, tmp):
+                print(f"{term:<14}{pandas_ms:>12.2f}ms{count_ms:>12.2f}ms{ranked_ms:>12.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
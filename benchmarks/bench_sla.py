@@ -0,0 +1,138 @@
+"""Benchmark: SLA report from the resolution histogram vs OFFSET seeks.
+
+Seeds a scratch database with resolved tickets in query_resolution (the
+histogram triggers run for every row) plus an open backlog, then times:
+
+    offset      the previous method by priority: COUNT per group plus one
+                ORDER BY seconds LIMIT 1 OFFSET n seek per percentile
+    histogram   sla.resolution_percentiles() from query_resolution_hist
+    report      the whole sla_report(), hot tickets and include_archive
+
+and the worst relative error of the histogram percentiles against exact
+nearest-rank values.
+
+    python benchmarks/bench_sla.py --resolved 1000000 --agents 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+import sla
+from query_builder import QueryFilter
+
+PRIORITIES = list(sla.SLA_HOURS)
+
+
+def seed(resolved, agents, backlog):
+    rng = random.Random(0)
+    names = [f"agent{i}" for i in range(agents)] + [None]
+    with db_connection.db_session() as db:
+        start = time.perf_counter()
+        db.executemany(
+            "INSERT INTO query_resolution (query_id, priority, assigned_to, seconds, archived) "
+            "VALUES (?, ?, ?, ?, ?)",
+            ((i, rng.choice(PRIORITIES), rng.choice(names), int(rng.lognormvariate(11, 1.3)),
+              int(i < resolved // 3))
+             for i in range(1, resolved + 1))
+        )
+        db.executemany("""
+            INSERT INTO client_queries
+            (client_name, mail_id, mobile_number, query_heading, query_description,
+             status, priority, query_created_time)
+            VALUES (?, ?, '9876543210', 'Login page not loading', 'Details', ?, ?, ?)
+        """, (
+            (f"client{i % 200}", f"client{i % 200}@example.com",
+             rng.choice(sla.OPEN_STATUSES), rng.choice(PRIORITIES),
+             f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00")
+            for i in range(backlog)
+        ))
+    return time.perf_counter() - start
+
+
+def offset_percentiles(db):
+    """The pre-histogram method over hot tickets, on the (archived, priority, seconds) index"""
+    result = {}
+    groups = db.execute(
+        "SELECT priority, COUNT(*) FROM query_resolution WHERE archived = 0 GROUP BY priority"
+    ).fetchall()
+    for group, count in groups:
+        stats = {'count': count}
+        for p in sla.PERCENTILES:
+            rank = max(0, -(-p * count // 100) - 1)
+            stats[f'p{p}'] = db.execute(
+                "SELECT seconds FROM query_resolution WHERE archived = 0 AND priority = ? "
+                "ORDER BY seconds LIMIT 1 OFFSET ?", (group, rank)
+            ).fetchone()[0]
+        result[group] = stats
+    return result
+
+
+def exact_percentiles(db, by):
+    """Nearest-rank percentiles over hot tickets, sorting everything (not timed)"""
+    groups = {}
+    for group, seconds in db.execute(
+        f"SELECT {by}, seconds FROM query_resolution WHERE archived = 0 ORDER BY {by}, seconds"
+    ):
+        groups.setdefault(group, []).append(seconds)
+    return {
+        group: {f'p{p}': times[max(1, -(-p * len(times) // 100)) - 1] for p in sla.PERCENTILES}
+        for group, times in groups.items()
+    }
+
+
+def timed(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        value = fn()
+    return value, (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolved", type=int, default=1000000)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--backlog", type=int, default=20000, help="open tickets")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_connection.DB_PATH = os.path.join(tmp, "sla.sqlite")
+        db_connection.create_tables()
+        seconds = seed(args.resolved, args.agents, args.backlog)
+        print(f"{args.resolved} resolved ({args.agents} agents), {args.backlog} open; "
+              f"seeded at {args.resolved / seconds:.0f} rows/s with histogram triggers")
+
+        print(f"{'step':<28}{'ms':>10}")
+        with db_connection.db_session() as db:
+            _, offset_ms = timed(lambda: offset_percentiles(db), args.runs)
+            print(f"{'offset by priority':<28}{offset_ms:>10.1f}")
+            for by in sla.GROUP_COLUMNS:
+                exact = exact_percentiles(db, by)
+                estimate, hist_ms = timed(lambda: sla.resolution_percentiles(db, by), args.runs)
+                error = max(
+                    abs(estimate[group][name] - value) / value
+                    for group, stats in exact.items()
+                    for name, value in stats.items() if value
+                )
+                print(f"{'histogram by ' + by:<28}{hist_ms:>10.1f}   max error {error:.1%}")
+            _, report_ms = timed(lambda: sla.sla_report(db), args.runs)
+            _, archive_ms = timed(
+                lambda: sla.sla_report(db, QueryFilter(include_archive=True)), args.runs
+            )
+            rows = db.execute("SELECT COUNT(*) FROM query_resolution_hist").fetchone()[0]
+        print(f"{'report (hot)':<28}{report_ms:>10.1f}")
+        print(f"{'report (include_archive)':<28}{archive_ms:>10.1f}")
+        print(f"histogram rows: {rows}")
+        db_connection.get_pool().close_all()
+
+
+if __name__ == "__main__":
+    main()
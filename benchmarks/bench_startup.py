@@ -0,0 +1,239 @@
+"""Cold-start and first-render time per page, for regression tracking.
+
+Each page runs in a fresh interpreter under Streamlit's AppTest harness
+with a logged-in session, so the numbers include every import the page
+pulls in. For each page we record:
+
+    import_ms        importing streamlit and the app modules the page uses
+    first_render_ms  the first script run (schema setup, lazy pandas/plotly)
+    rerun_ms         a second run in the same process (the steady state)
+    heavy_modules    which of pandas / plotly were loaded by the end
+
+plus a -X importtime breakdown of the app's own modules.
+
+    python benchmarks/bench_startup.py --rows 20000
+    python benchmarks/bench_startup.py --compare benchmarks/results/startup-base.json \\
+        --max-regression 0.25
+
+With --max-regression the script exits 1 if any page's import or
+first-render time grew by more than that fraction over the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+PAGES = {
+    'main': ("main_app.py", None),
+    'client': ("pages/1_Client_Page.py", ("client1", "Client")),
+    'support': ("pages/2_Support_Page.py", ("admin", "Support")),
+    'performance': ("pages/3_Performance_Page.py", ("admin", "Support")),
+}
+
+APP_MODULES = (
+    "db_connection", "repository", "auth_service", "live_view",
+    "write_queue", "csv_loader", "instrumentation", "startup",
+)
+HEAVY_MODULES = ("pandas", "plotly")
+
+PASSWORD = "password123"
+
+
+def seed(rows):
+    """Run inside the parent: create users and tickets in QUERY_DB_PATH"""
+    import db_connection
+    import repository
+
+    db_connection.create_tables()
+    for username, role in (("client1", "Client"), ("admin", "Support")):
+        repository.register(username, PASSWORD, role, f"{username}@example.com")
+    rng = random.Random(0)
+    with db_connection.db_session() as db:
+        db.executemany("""
+            INSERT INTO client_queries
+            (client_name, mail_id, mobile_number, query_heading,
+             query_description, status, priority, query_created_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (f"client{i % 50}", f"client{i % 50}@example.com", "9876543210",
+             "Login page not loading", "Describe the issue in detail. " * 4,
+             rng.choice(["Open", "In Progress", "Resolved"]),
+             rng.choice(["Low", "Medium", "High"]),
+             f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00")
+            for i in range(rows)
+        ))
+    db_connection.get_pool().close_all()
+
+
+def child(page):
+    """Run inside the subprocess: time imports, first render and a rerun of one page"""
+    path, login = PAGES[page]
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import auth_service
+    imported = time.perf_counter()
+
+    app = AppTest.from_file(os.path.join(parent_dir, path), default_timeout=120)
+    if login:
+        username, role = login
+        user, token = auth_service.service.login(username, PASSWORD, role)
+        app.session_state["logged_in"] = True
+        app.session_state["username"] = user.username
+        app.session_state["role"] = user.role
+        app.session_state["email"] = user.email
+        app.session_state["auth_token"] = token
+    rendered = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - rendered
+    rerun_start = time.perf_counter()
+    app.run()
+    rerun = time.perf_counter() - rerun_start
+
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'first_render_ms': first * 1000,
+        'rerun_ms': rerun * 1000,
+        'errors': [str(e.value) for e in app.exception],
+        'heavy_modules': sorted(m for m in HEAVY_MODULES if m in sys.modules),
+    }))
+
+
+def import_breakdown(env, top=10):
+    """Slowest app-module imports from -X importtime: [(module, cumulative_ms), ...]"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(APP_MODULES)}"],
+        cwd=parent_dir, env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda row: -row[1])[:top]
+
+
+def run_page(page, env):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", page],
+        cwd=parent_dir, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(report, baseline, threshold):
+    found = []
+    for page, r in report.items():
+        base = baseline.get(page)
+        if not base:
+            continue
+        for metric in ('import_ms', 'first_render_ms'):
+            if base[metric] and r[metric] > base[metric] * (1 + threshold):
+                found.append(f"{page} {metric}: {base[metric]:.0f} -> {r[metric]:.0f} ms")
+    return found
+
+
+def print_report(report, baseline=None):
+    print(f"{'page':<13}{'import ms':>11}{'first ms':>11}{'rerun ms':>11}   loaded")
+    for page, r in report.items():
+        line = (f"{page:<13}{r['import_ms']:>11.0f}{r['first_render_ms']:>11.0f}"
+                f"{r['rerun_ms']:>11.0f}   {', '.join(r['heavy_modules']) or '-'}")
+        if baseline and page in baseline and baseline[page]['first_render_ms']:
+            change = (r['first_render_ms'] / baseline[page]['first_render_ms'] - 1) * 100
+            line += f"   first render {change:+.1f}% vs baseline"
+        print(line)
+        for error in r['errors']:
+            print(f"    ❌ {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--label", default=None, help="result file name (default: timestamp)")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="previous result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="fail if import/first render grows by more than this fraction")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, QUERY_DB_PATH=os.path.join(tmp, "startup.sqlite"))
+        os.environ["QUERY_DB_PATH"] = env["QUERY_DB_PATH"]
+        import db_connection
+        db_connection.DB_PATH = env["QUERY_DB_PATH"]
+        print(f"Seeding {args.rows:,} tickets...")
+        seed(args.rows)
+        report = {}
+        for page in args.pages:
+            print(f"Starting {page}...")
+            report[page] = run_page(page, env)
+        breakdown = import_breakdown(env)
+
+    result = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'rows': args.rows,
+            'python': platform.python_version(),
+        },
+        'pages': report,
+        'slowest_imports': breakdown,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['pages']
+    print_report(report, baseline)
+    print("\nSlowest app-module imports (cumulative ms):")
+    for name, ms in breakdown:
+        print(f"  {name:<40}{ms:>8.1f}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    label = args.label or "startup-" + datetime.now().strftime('%Y%m%d-%H%M%S')
+    out_path = os.path.join(args.output_dir, f"{label}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {out_path}")
+
+    if baseline and args.max_regression is not None:
+        found = regressions(report, baseline, args.max_regression)
+        if found:
+            print("❌ Startup regressions:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print("✅ No startup regressions")
+
+
+if __name__ == "__main__":
+    main()
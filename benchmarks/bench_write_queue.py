@@ -0,0 +1,84 @@
+"""Benchmark: ticket submission throughput, commit-per-row vs group commit.
+
+Many threads submit tickets at once, first through repository.create_query
+(one transaction per row, as the Client page used to do) and then through
+write_queue.create_query (batched by the background writer).
+
+    python benchmarks/bench_write_queue.py --threads 50 --per-thread 200
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+import repository
+import write_queue
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def run(submit, threads, per_thread):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(idx):
+        local = []
+        for i in range(per_thread):
+            start = time.perf_counter()
+            try:
+                submit(f"client{idx}", f"client{idx}@example.com", "9876543210",
+                       "Bug Report", f"Submission {i} from thread {idx}", "Medium")
+            except (sqlite3.OperationalError, write_queue.WriteQueueFull) as e:
+                errors.append(e)
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, percentile(latencies, 50), percentile(latencies, 99), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--per-thread", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_connection.DB_PATH = os.path.join(tmp, "writes.sqlite")
+        db_connection.create_tables()
+        print(f"{args.threads} threads x {args.per_thread} submissions")
+        print(f"{'path':<18}{'rows/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for label, submit in (("commit-per-row", repository.create_query),
+                              ("group commit", write_queue.create_query)):
+            rate, p50, p99, errors = run(submit, args.threads, args.per_thread)
+            print(f"{label:<18}{rate:>10.0f}{p50 * 1000:>10.2f}{p99 * 1000:>10.2f}{errors:>8}")
+        stats = write_queue.writer.stats()
+        print(f"Writer: {stats['batches']} batches, {stats['avg_batch']:.1f} rows/batch")
+        db_connection.get_pool().close_all()
+
+
+if __name__ == "__main__":
+    main()
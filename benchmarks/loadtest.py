@@ -0,0 +1,293 @@
+"""Load test for the query workflows, with JSON results for regression tracking.
+
+Generates synthetic tickets that follow the distributions in
+synthetic_client_queries.csv (headings, descriptions, open/closed ratio,
+email domains, date range), then runs many concurrent simulated users
+against the same data-access paths the app uses: login, register, client
+submit and list, and the Support page list, filter and update.
+
+    python benchmarks/loadtest.py --rows 100000 --users 50 --seconds 30
+    python benchmarks/loadtest.py --compare benchmarks/results/previous.json
+
+Each run writes benchmarks/results/<label>.json with p50/p95/p99 latency
+and throughput per operation.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+import passwords
+import repository
+from query_builder import QueryFilter
+from query_cache import cache
+
+CSV_PATH = os.path.join(parent_dir, "synthetic_client_queries.csv")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Relative frequency of each operation in the simulated traffic
+DEFAULT_MIX = {
+    'login': 5,
+    'register': 1,
+    'client_submit': 10,
+    'client_list': 30,
+    'support_list': 25,
+    'support_filter': 20,
+    'support_update': 9,
+}
+
+PASSWORD = "password123"
+
+
+class Distribution:
+    """Field distributions sampled from the synthetic CSV"""
+
+    def __init__(self, path=CSV_PATH):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.texts = [(r['query_heading'], r['query_description']) for r in rows]
+        self.domains = [r['client_email'].split('@')[-1] for r in rows]
+        self.open_ratio = sum(r['status'].lower().startswith('open') for r in rows) / len(rows)
+        dates = sorted(r['date_raised'] for r in rows if r['date_raised'])
+        self.first_day = datetime.strptime(dates[0], '%Y-%m-%d')
+        self.span_days = (datetime.strptime(dates[-1], '%Y-%m-%d') - self.first_day).days or 1
+        self.words = sorted({w.lower() for h, _ in self.texts for w in h.split() if len(w) > 3})
+
+    def ticket(self, rng, client):
+        heading, description = rng.choice(self.texts)
+        created = self.first_day + timedelta(seconds=rng.randrange(self.span_days * 86400))
+        if rng.random() < self.open_ratio:
+            status, closed = rng.choice(['Open', 'In Progress']), None
+        else:
+            status = 'Resolved'
+            closed = (created + timedelta(hours=rng.randrange(1, 240))).strftime('%Y-%m-%d %H:%M:%S')
+        return (
+            client, f"{client}@{rng.choice(self.domains)}", str(rng.randrange(6000000000, 9999999999)),
+            heading, description, status, rng.choice(['Low', 'Medium', 'High']),
+            created.strftime('%Y-%m-%d %H:%M:%S'), closed
+        )
+
+
+def seed(dist, rows, clients, agents, rng):
+    """Create the schema, users and `rows` synthetic tickets"""
+    db_connection.create_tables()
+    hashed = passwords.hash_password(PASSWORD)  # one salt for all seeded users
+    with db_connection.db_session() as db:
+        db.executemany(
+            "INSERT INTO users (username, password, role, email) VALUES (?, ?, ?, ?)",
+            [(f"client{i}", hashed, "Client", f"client{i}@example.com")
+             for i in range(clients)] +
+            [(f"agent{i}", hashed, "Support", f"agent{i}@example.com")
+             for i in range(agents)]
+        )
+        for start in range(0, rows, 10000):
+            db.executemany("""
+                INSERT INTO client_queries
+                (client_name, mail_id, mobile_number, query_heading, query_description,
+                 status, priority, query_created_time, query_closed_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [dist.ticket(rng, f"client{rng.randrange(clients)}")
+                  for _ in range(min(10000, rows - start))])
+
+
+class Workload:
+    """The app's data-access paths, one method per operation"""
+
+    def __init__(self, dist, clients):
+        self.dist = dist
+        self.clients = clients
+        self._registered = 0
+        self._lock = threading.Lock()
+
+    def login(self, rng):
+        repository.authenticate(f"client{rng.randrange(self.clients)}", PASSWORD, "Client")
+
+    def register(self, rng):
+        with self._lock:
+            self._registered += 1
+            username = f"new{self._registered}_{rng.randrange(10**9)}"
+        repository.register(username, PASSWORD, "Client", f"{username}@example.com")
+
+    def client_submit(self, rng):
+        client = f"client{rng.randrange(self.clients)}"
+        ticket = self.dist.ticket(rng, client)
+        repository.create_query(client, *ticket[1:5], priority=ticket[6])
+
+    def client_list(self, rng):
+        client = f"client{rng.randrange(self.clients)}"
+        repository.summary(QueryFilter(client_name=client))
+        repository.list_queries_for_client(client)
+
+    def support_list(self, rng):
+        repository.summary()
+        repository.status_breakdown()
+        repository.daily_counts()
+        repository.count_queries(QueryFilter())
+        repository.list_queries(QueryFilter(), 50, None)
+
+    def support_filter(self, rng):
+        filters = QueryFilter(
+            status=rng.choice(['All', 'Open', 'In Progress', 'Resolved']),
+            priorities=tuple(rng.sample(['Low', 'Medium', 'High'], rng.randint(1, 3))),
+            search=rng.choice(self.dist.words) if rng.random() < 0.5 else ''
+        )
+        repository.count_queries(filters)
+        repository.list_queries(filters, 50, None)
+
+    def support_update(self, rng):
+        with db_connection.db_session() as db:
+            max_id = db.execute("SELECT MAX(query_id) FROM client_queries").fetchone()[0]
+        repository.update_status(rng.randint(1, max_id), rng.choice(repository.STATUSES))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+def run(workload, users, seconds, mix, seed_value=0):
+    """Drive the workload from `users` threads; returns per-operation samples"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = {name: [] for name in names}
+    errors = Counter()
+    stop = threading.Event()
+
+    def user(idx):
+        rng = random.Random(seed_value * 1000 + idx)
+        local = {name: [] for name in names}
+        while not stop.is_set():
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                getattr(workload, name)(rng)
+            except sqlite3.Error:
+                errors[name] += 1
+                continue
+            local[name].append(time.perf_counter() - start)
+        for name in names:
+            samples[name].extend(local[name])
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return samples, errors
+
+
+def summarize(samples, errors, seconds):
+    report = {}
+    for name, values in samples.items():
+        values.sort()
+        report[name] = {
+            'count': len(values),
+            'errors': errors.get(name, 0),
+            'throughput_per_sec': len(values) / seconds,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+        }
+    return report
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f"{'operation':<16}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, r in report.items():
+        line = (f"{name:<16}{r['throughput_per_sec']:>10.1f}{r['p50_ms']:>10.2f}"
+                f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}")
+        if baseline and name in baseline and baseline[name]['p95_ms']:
+            change = (r['p95_ms'] / baseline[name]['p95_ms'] - 1) * 100
+            line += f"   p95 {change:+.1f}% vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="bypass the query cache")
+    parser.add_argument("--label", default=None, help="result file name (default: timestamp)")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="previous result JSON to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    dist = Distribution()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_connection.DB_PATH = os.path.join(tmp, "loadtest.sqlite")
+        print(f"Seeding {args.rows:,} tickets...")
+        seed(dist, args.rows, args.clients, args.agents, rng)
+        cache.clear()
+        if args.no_cache:
+            cache.max_entries = 0
+        workload = Workload(dist, args.clients)
+        print(f"Running {args.users} users for {args.seconds:.0f}s...")
+        samples, errors = run(workload, args.users, args.seconds, DEFAULT_MIX, args.seed)
+        db_connection.get_pool().close_all()
+
+    report = summarize(samples, errors, args.seconds)
+    result = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'rows': args.rows,
+            'clients': args.clients,
+            'users': args.users,
+            'seconds': args.seconds,
+            'cache': not args.no_cache,
+            'cache_stats': cache.stats(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'operations': report,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['operations']
+    print_report(report, baseline)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    label = args.label or datetime.now().strftime('%Y%m%d-%H%M%S')
+    out_path = os.path.join(args.output_dir, f"{label}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
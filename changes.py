@@ -0,0 +1,83 @@
+"""Change feed over client_queries.
+
+query_changes (migration 8) is an append-only log written by triggers: one
+row per insert, update or delete with a monotonically increasing seq. A
+reader remembers the last seq it has seen and asks for what changed since,
+so a dashboard can patch the rows it already shows instead of re-running
+its full query. The log is pruned by age; a reader whose cursor has fallen
+off the end (or who is too far behind) is told to reload instead.
+"""
+import sys
+from typing import List, NamedTuple
+
+# More pending changes than this and a full reload is cheaper than patching
+MAX_CHANGES = 500
+
+RETENTION_DAYS = 7
+
+SELECT_SINCE = "SELECT seq, query_id FROM query_changes WHERE seq > ? ORDER BY seq LIMIT ?"
+SELECT_CLIENT_SINCE = (
+    "SELECT seq, query_id FROM query_changes "
+    "WHERE client_name = ? AND seq > ? ORDER BY seq LIMIT ?"
+)
+
+
+class ChangeBatch(NamedTuple):
+    cursor: int            # pass back as `since` on the next poll
+    query_ids: List[int]   # distinct tickets changed after `since`, oldest change first
+    overflow: bool         # True if the caller must reload rather than patch
+
+
+def record_sql(row, op):
+    """Trigger body appending one change for the given row"""
+    return f"""
+        INSERT INTO query_changes (query_id, client_name, op)
+        VALUES ({row}.query_id, {row}.client_name, '{op}');"""
+
+
+def latest(db):
+    """The newest seq, i.e. a cursor that sees only future changes"""
+    return db.execute("SELECT coalesce(max(seq), 0) FROM query_changes").fetchone()[0]
+
+
+def since(db, cursor, client_name=None, limit=MAX_CHANGES):
+    """Tickets changed after cursor, optionally only one client's"""
+    oldest = db.execute("SELECT min(seq) FROM query_changes").fetchone()[0]
+    if oldest is not None and cursor < oldest - 1:
+        # Changes the reader never saw have already been pruned
+        return ChangeBatch(latest(db), [], True)
+    if client_name is None:
+        rows = db.execute(SELECT_SINCE, (cursor, limit + 1)).fetchall()
+    else:
+        rows = db.execute(SELECT_CLIENT_SINCE, (client_name, cursor, limit + 1)).fetchall()
+    if len(rows) > limit:
+        return ChangeBatch(latest(db), [], True)
+    if not rows:
+        return ChangeBatch(cursor, [], False)
+    return ChangeBatch(rows[-1][0], list(dict.fromkeys(query_id for _, query_id in rows)), False)
+
+
+def prune(db, days=RETENTION_DAYS):
+    """Drop log entries older than days; returns how many were removed"""
+    return db.execute(
+        "DELETE FROM query_changes WHERE changed_at < datetime('now', ?)", (f"-{days} days",)
+    ).rowcount
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_connection import create_tables, db_session
+
+    parser = argparse.ArgumentParser(description="Inspect or prune the change feed")
+    parser.add_argument("--prune-days", type=int, help="drop entries older than this many days")
+    args = parser.parse_args()
+
+    if not create_tables():
+        sys.exit(1)
+    with db_session() as db:
+        if args.prune_days is not None:
+            print(f"✅ Pruned {prune(db, args.prune_days)} change log entries")
+        count, oldest = db.execute(
+            "SELECT COUNT(*), min(changed_at) FROM query_changes"
+        ).fetchone()
+        print(f"📜 {count} change log entries since {oldest or '-'}, latest seq {latest(db)}")
@@ -0,0 +1,164 @@
+"""Constant-time ticket counts from the maintained counter tables.
+
+query_counts (per client and status) and query_counts_global (per status)
+are created by migration 4 and kept up to date by triggers on
+client_queries, inside the same transaction as every insert, delete and
+status change. Tickets without a client are counted under client_name ''.
+query_archive_counts and query_archive_counts_global (migration 13) do the
+same for query_archive, so archive-inclusive totals need no scan either.
+
+    python counters.py --check      report counters that drifted (the default)
+    python counters.py --rebuild    recompute all counters, then check them
+"""
+import argparse
+import sys
+
+
+def client_status_counts(db, client_name):
+    """Return {status: count} for one client"""
+    return dict(db.execute(
+        "SELECT status, n FROM query_counts WHERE client_name = ? AND n > 0",
+        (client_name or '',)
+    ).fetchall())
+
+
+def global_status_counts(db):
+    """Return {status: count} over all tickets"""
+    return dict(db.execute(
+        "SELECT status, n FROM query_counts_global WHERE n > 0"
+    ).fetchall())
+
+
+def archive_status_counts(db, client_name=None):
+    """Return {status: count} over archived tickets, from query_archive_counts"""
+    if client_name is None:
+        return dict(db.execute(
+            "SELECT status, n FROM query_archive_counts_global WHERE n > 0"
+        ).fetchall())
+    return dict(db.execute(
+        "SELECT status, n FROM query_archive_counts WHERE client_name = ? AND n > 0",
+        (client_name or '',)
+    ).fetchall())
+
+
+def archive_count_sql(row, delta):
+    """Trigger body adding delta to the archive counters for one query_archive row"""
+    return f"""
+        INSERT INTO query_archive_counts (client_name, status, n)
+        VALUES (coalesce({row}.client_name, ''), coalesce({row}.status, ''), {delta})
+        ON CONFLICT (client_name, status) DO UPDATE SET n = n + ({delta});
+        INSERT INTO query_archive_counts_global (status, n)
+        VALUES (coalesce({row}.status, ''), {delta})
+        ON CONFLICT (status) DO UPDATE SET n = n + ({delta});"""
+
+
+def status_counts(db, client_name=None):
+    if client_name is None:
+        return global_status_counts(db)
+    return client_status_counts(db, client_name)
+
+
+def total(db, client_name=None):
+    return sum(status_counts(db, client_name).values())
+
+
+# (scope label, counted table, per-client counters, per-status counters)
+COUNTER_TABLES = (
+    ('', 'client_queries', 'query_counts', 'query_counts_global'),
+    ('archive ', 'query_archive', 'query_archive_counts', 'query_archive_counts_global'),
+)
+
+
+def _actual(db, table):
+    per_client = {
+        (client, status): n for client, status, n in db.execute(f"""
+            SELECT coalesce(client_name, ''), coalesce(status, ''), COUNT(*)
+            FROM {table} GROUP BY 1, 2
+        """)
+    }
+    per_status = {}
+    for (_, status), n in per_client.items():
+        per_status[status] = per_status.get(status, 0) + n
+    return per_client, per_status
+
+
+def check_consistency(db):
+    """Return a list of (scope, key, stored, actual) for every counter that is wrong.
+
+    scope is 'client' or 'global', prefixed 'archive ' for the query_archive counters.
+    """
+    problems = []
+    for prefix, table, client_counts, global_counts in COUNTER_TABLES:
+        per_client, per_status = _actual(db, table)
+        stored_client = {
+            (client, status): n for client, status, n
+            in db.execute(f"SELECT client_name, status, n FROM {client_counts}")
+        }
+        stored_status = dict(db.execute(f"SELECT status, n FROM {global_counts}").fetchall())
+
+        for key in set(per_client) | set(stored_client):
+            stored, actual = stored_client.get(key, 0), per_client.get(key, 0)
+            if stored != actual:
+                problems.append((prefix + 'client', key, stored, actual))
+        for key in set(per_status) | set(stored_status):
+            stored, actual = stored_status.get(key, 0), per_status.get(key, 0)
+            if stored != actual:
+                problems.append((prefix + 'global', key, stored, actual))
+    return problems
+
+
+def rebuild(db):
+    """Recompute both counter tables from client_queries (caller commits)"""
+    db.execute("DELETE FROM query_counts")
+    db.execute("DELETE FROM query_counts_global")
+    db.execute("""
+        INSERT INTO query_counts (client_name, status, n)
+        SELECT coalesce(client_name, ''), coalesce(status, ''), COUNT(*)
+        FROM client_queries GROUP BY 1, 2
+    """)
+    db.execute("""
+        INSERT INTO query_counts_global (status, n)
+        SELECT status, SUM(n) FROM query_counts GROUP BY status
+    """)
+
+
+def rebuild_archive(db):
+    """Recompute the archive counter tables from query_archive (caller commits)"""
+    db.execute("DELETE FROM query_archive_counts")
+    db.execute("DELETE FROM query_archive_counts_global")
+    db.execute("""
+        INSERT INTO query_archive_counts (client_name, status, n)
+        SELECT coalesce(client_name, ''), coalesce(status, ''), COUNT(*)
+        FROM query_archive GROUP BY 1, 2
+    """)
+    db.execute("""
+        INSERT INTO query_archive_counts_global (status, n)
+        SELECT status, SUM(n) FROM query_archive_counts GROUP BY status
+    """)
+
+
+if __name__ == "__main__":
+    from db_connection import create_tables, db_session
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the ticket counters")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--check", action="store_true",
+                        help="compare counters with a recount; exit 1 on drift (default)")
+    action.add_argument("--rebuild", action="store_true",
+                        help="recompute counters from scratch, then check")
+    args = parser.parse_args()
+
+    if not create_tables():
+        sys.exit(1)
+    with db_session() as db:
+        if args.rebuild:
+            db.execute("BEGIN IMMEDIATE")
+            rebuild(db)
+            rebuild_archive(db)
+            print("✅ Counters rebuilt")
+        problems = check_consistency(db)
+    if problems:
+        for scope, key, stored, actual in problems:
+            print(f"❌ {scope} {key}: stored {stored}, actual {actual}")
+        sys.exit(1)
+    print("✅ Counters are consistent")
@@ -0,0 +1,108 @@
+"""Cached, streaming access to synthetic_client_queries.csv.
+
+The Client page shows counts, a preview table and a download button for the
+sample dataset. Everything here is computed once per file version (keyed on
+path, mtime and size) and shared by every session in the process. Counts
+come from a streaming pass and the preview holds PREVIEW_ROWS rows, so
+replacing the file with a multi-GB export keeps the page responsive.
+
+The download button is the exception: st.download_button needs the whole
+payload in memory, so only files up to DOWNLOAD_LIMIT_BYTES are offered,
+and their bytes are kept once per process rather than per session.
+"""
+import csv
+import os
+import threading
+
+import instrumentation
+
+PREVIEW_ROWS = 1000
+
+# Files larger than this are not offered through the download button; the
+# bytes stay resident for as long as the file is unchanged
+DOWNLOAD_LIMIT_BYTES = 20 * 1024 * 1024
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _cached(kind, path, build):
+    key = (kind, os.path.abspath(path))
+    signature = file_signature(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] == signature:
+            return entry[1]
+    with instrumentation.timer("csv_load_seconds", kind=kind):
+        value = build(path)
+    with _cache_lock:
+        _cache[key] = (signature, value)
+    return value
+
+
+def normalize_status(status):
+    """Map CSV status values ('Closed', 'Opened', ...) onto Open/Closed"""
+    status = (status or '').strip().lower()
+    if status.startswith('close'):
+        return 'Closed'
+    if status.startswith('open'):
+        return 'Open'
+    return status.title()
+
+
+def _count_statuses(path):
+    counts = {'Total': 0, 'Closed': 0, 'Open': 0}
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return counts
+        status_idx = header.index('status')
+        for row in reader:
+            if not row:
+                continue
+            counts['Total'] += 1
+            status = normalize_status(row[status_idx] if status_idx < len(row) else '')
+            counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def _read_preview(path):
+    import pandas as pd
+
+    return pd.read_csv(path, nrows=PREVIEW_ROWS)
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def status_summary(path):
+    """Total/Closed/Open counts from a single streaming pass over the file"""
+    return _cached('summary', path, _count_statuses)
+
+
+def preview(path):
+    """DataFrame of the first PREVIEW_ROWS rows"""
+    return _cached('preview', path, _read_preview)
+
+
+def download_bytes(path):
+    """Raw file bytes for the download button, or None if the file is too large"""
+    if file_signature(path)[1] > DOWNLOAD_LIMIT_BYTES:
+        # Do not keep an earlier, smaller version of the file resident either
+        with _cache_lock:
+            _cache.pop(('bytes', os.path.abspath(path)), None)
+        return None
+    return _cached('bytes', path, _read_bytes)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -1,50 +1,319 @@
 import sqlite3
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'query_db.sqlite')
+import instrumentation
+from migrations import run_migrations
 
-def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
+DB_PATH = os.environ.get(
+    "QUERY_DB_PATH", os.path.join(os.path.dirname(__file__), 'query_db.sqlite')
+)
+
+# Connection pool settings
+POOL_SIZE = int(os.environ.get("QUERY_DB_POOL_SIZE", "16"))
+POOL_TIMEOUT = 10.0
+
+# Pragmas applied to every new connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def open_connection(path=None):
+    """Open a new tuned SQLite connection"""
+    with instrumentation.timer("db_connect_seconds"):
+        conn = sqlite3.connect(
+            path or DB_PATH,
+            timeout=POOL_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+    instrumentation.count("db_connections_opened")
     return conn
 
+
+def _record_query(label, seconds):
+    instrumentation.registry.observe("db_query_seconds", seconds, track_slowest=True, sql=label)
+
+
+class TimedCursor:
+    """Cursor proxy that keeps timing a SELECT until its rows have been read.
+
+    Only time spent inside sqlite3 (the execute and every fetch) counts.
+    db_query_seconds is recorded once the rows run out, or when the cursor
+    is closed or dropped early.
+    """
+
+    ITER_CHUNK = 256
+
+    def __init__(self, cursor, label, seconds):
+        self._cursor = cursor
+        self._label = label
+        self._seconds = seconds
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self._seconds += time.perf_counter() - start
+
+    def _finish(self):
+        if self._label is not None:
+            label, self._label = self._label, None
+            _record_query(label, self._seconds)
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self._cursor.arraysize if size is None else size
+        rows = self._timed(self._cursor.fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self.ITER_CHUNK)
+            yield from rows
+            if len(rows) < self.ITER_CHUNK:
+                return
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __del__(self):
+        self._finish()
+
+
+class PooledConnection:
+    """Connection proxy whose close() hands the connection back to the pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def _live(self):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a released connection.")
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._live(), name)
+
+    def execute(self, sql, parameters=()):
+        conn = self._live()
+        if not instrumentation.ENABLED:
+            return conn.execute(sql, parameters)
+        label = instrumentation.sql_label(sql)
+        start = time.perf_counter()
+        try:
+            cursor = conn.execute(sql, parameters)
+        except Exception:
+            _record_query(label, time.perf_counter() - start)
+            raise
+        seconds = time.perf_counter() - start
+        if cursor.description is None:
+            # No rows to read (DML, DDL, PRAGMA assignments): done already
+            _record_query(label, seconds)
+            return cursor
+        return TimedCursor(cursor, label, seconds)
+
+    def executemany(self, sql, seq_of_parameters):
+        conn = self._live()
+        with instrumentation.timer("db_query_seconds", track_slowest=True,
+                                   sql=instrumentation.sql_label(sql)):
+            return conn.executemany(sql, seq_of_parameters)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared across reruns"""
+
+    def __init__(self, path, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = open_connection(self.path)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError("Timed out waiting for a database connection")
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                self._discard(conn)
+                return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        return {"size": self.size, "open": self._created, "idle": self._idle.qsize()}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None or _pool.path != DB_PATH:
+        with _pool_lock:
+            if _pool is None or _pool.path != DB_PATH:
+                if _pool is not None:
+                    _pool.close_all()
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def get_db():
+    """Get database connection from the pool (close() returns it)"""
+    with instrumentation.timer("db_acquire_seconds"):
+        return get_pool().acquire()
+
+
+@contextmanager
+def db_session():
+    """Borrow a pooled connection, commit on success and always return it"""
+    db = get_db()
+    try:
+        yield db
+        if db.in_transaction:
+            db.commit()
+    except Exception:
+        if db.in_transaction:
+            db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 def create_tables():
     """Create all necessary tables"""
     try:
-        db = get_db()
-        cursor = db.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS client_queries (
-                query_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_name TEXT,
-                mail_id TEXT NOT NULL,
-                mobile_number TEXT NOT NULL,
-                query_heading TEXT NOT NULL,
-                query_description TEXT NOT NULL,
-                status TEXT DEFAULT 'Open',
-                priority TEXT DEFAULT 'Medium',
-                query_created_time DATETIME NOT NULL,
-                query_closed_time DATETIME,
-                assigned_to TEXT
-            )
-        """)
-        
-        db.commit()
-        cursor.close()
-        db.close()
+        with db_session() as db:
+            cursor = db.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    email TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS client_queries (
+                    query_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    client_name TEXT,
+                    mail_id TEXT NOT NULL,
+                    mobile_number TEXT NOT NULL,
+                    query_heading TEXT NOT NULL,
+                    query_description TEXT NOT NULL,
+                    status TEXT DEFAULT 'Open',
+                    priority TEXT DEFAULT 'Medium',
+                    query_created_time DATETIME NOT NULL,
+                    query_closed_time DATETIME,
+                    assigned_to TEXT
+                )
+            """)
+
+            db.commit()
+            cursor.close()
+
+            applied = run_migrations(db)
         print("✅ Tables created successfully!")
+        if applied:
+            print(f"✅ Applied migrations: {applied}")
         return True
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -55,4 +324,4 @@ if __name__ == "__main__":
     if create_tables():
         print("✅ Database setup complete!")
     else:
-        print("❌ Database setup failed!")
\ No newline at end of file
+        print("❌ Database setup failed!")
@@ -0,0 +1,299 @@
+"""Near-duplicate ticket detection with MinHash and LSH banding.
+
+A ticket's heading and description are normalised (lowercase words) and
+cut into SHINGLE_SIZE-character shingles, hashed with CRC32 (one-to-one
+on 4-byte shingles). The shingle set gets a NUM_PERM value MinHash
+signature, one min of (a * x + b) mod PRIME per permutation, split into
+BANDS bands of ROWS values; each band hashes to one 64-bit key. Two
+tickets whose shingle sets have Jaccard similarity s share at least one
+band key with probability 1 - (1 - s**ROWS)**BANDS: about 0.67 at s = 0.6,
+0.75 at s = 0.63 and 0.99 at s = 0.85.
+
+query_lsh (migration 12) holds (band_key, query_id) for every hot ticket.
+New tickets are indexed in the same transaction that inserts them, and
+real deletes drop their keys by trigger (archive moves keep them). A lookup
+is one statement: BANDS primary-key seeks of CANDIDATES_PER_BAND newest ids
+each, counted per ticket. An opened ticket reuses its stored keys, so only
+a submission pays for hashing its text.
+
+Batch indexing and clustering hash many tickets at once with numpy when
+it is installed (it comes with pandas), and fall back to plain Python:
+
+    python duplicates.py --cluster
+    python duplicates.py --rebuild
+"""
+import random
+import re
+import sys
+import zlib
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+CANDIDATES_PER_BAND = 20
+INDEX_CHUNK = 5000
+
+OPEN_STATUSES = ('Open', 'In Progress')
+
+_MASK = (1 << 64) - 1
+_FOLD = 0x100000001B3  # FNV-1a prime, folds a band's values into one key
+
+# Permutations are h(x) = (a * x + b) mod PRIME over the 32-bit shingle hashes
+PRIME = (1 << 61) - 1
+
+# Fixed seed: band keys are stored, so every process must hash the same way
+_rng = random.Random(20250226)
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(PRIME)) for _ in range(NUM_PERM)]
+
+_WORD = re.compile(r"\w+")
+
+_BAND = "SELECT query_id FROM query_lsh WHERE band_key = ? ORDER BY query_id DESC LIMIT ?"
+_CLIENT_BAND = (
+    "SELECT query_id FROM query_lsh WHERE band_key = ? AND client_name = ? "
+    "ORDER BY query_id DESC LIMIT ?"
+)
+
+
+def _similar_sql(band):
+    candidates = " UNION ALL ".join(f"SELECT * FROM ({band})" for _ in range(BANDS))
+    return f"""
+        SELECT query_id, q.client_name, q.query_heading, q.status, q.priority, COUNT(*) AS bands
+        FROM ({candidates}) JOIN client_queries AS q USING (query_id)
+        WHERE query_id IS NOT ?
+        GROUP BY query_id
+        ORDER BY bands DESC, query_id DESC LIMIT ?
+    """
+
+
+SELECT_SIMILAR = _similar_sql(_BAND)
+SELECT_SIMILAR_FOR_CLIENT = _similar_sql(_CLIENT_BAND)
+SELECT_KEYS = "SELECT band_key FROM query_lsh WHERE query_id = ?"
+INSERT_KEY = "INSERT OR IGNORE INTO query_lsh (band_key, query_id, client_name) VALUES (?, ?, ?)"
+SELECT_TEXT_AFTER = """
+    SELECT query_id, client_name, query_heading, query_description FROM client_queries
+    WHERE query_id > ? ORDER BY query_id LIMIT ?
+"""
+
+
+def shingles(heading, description):
+    """CRC32 hashes of the text's character shingles"""
+    text = " ".join(_WORD.findall(f"{heading or ''} {description or ''}".lower()))
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())} if text else set()
+    return {zlib.crc32(text[i:i + SHINGLE_SIZE].encode())
+            for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(heading, description):
+    """NUM_PERM MinHash values of one ticket's shingles (None if it has no text)"""
+    hashes = list(shingles(heading, description))
+    if not hashes:
+        return None
+    return [min([(a * x + b) % PRIME for x in hashes]) for a, b in PERMUTATIONS]
+
+
+def band_keys(values):
+    """Signed 64-bit key per band of a signature, as stored in query_lsh"""
+    keys = []
+    for band in range(BANDS):
+        key = band
+        for value in values[band * ROWS:(band + 1) * ROWS]:
+            key = (key * _FOLD + value) & _MASK
+        keys.append(key - (1 << 64) if key >> 63 else key)
+    return keys
+
+
+def batch_band_keys(texts):
+    """Band keys for many (heading, description) pairs; None for empty texts.
+
+    Repeated texts are hashed once, and the rest are vectorised over all
+    shingles at once with numpy if available.
+    """
+    unique = list(dict.fromkeys(texts))
+    keys = dict(zip(unique, _band_keys_of(unique)))
+    return [keys[text] for text in texts]
+
+
+def _permute(np, x, a, b):
+    """(a * x + b) mod PRIME for 32-bit x, exactly, without 128-bit products.
+
+    a is split at bit 32: x * a_low fits in 64 bits, x * a_high in 61, and
+    multiplying by 2**32 modulo the Mersenne prime is a 61-bit rotation.
+    """
+    prime = np.uint64(PRIME)
+    value = x * np.uint64(a >> 32)
+    carry = value >> np.uint64(29)
+    value &= np.uint64((1 << 29) - 1)
+    value <<= np.uint64(32)
+    value += carry
+    low = x * np.uint64(a & 0xFFFFFFFF)
+    np.right_shift(low, np.uint64(61), out=carry)
+    low &= prime
+    value += low
+    value += carry
+    value += np.uint64(b)
+    np.right_shift(value, np.uint64(61), out=carry)
+    value &= prime
+    value += carry
+    value -= prime * (value >= prime)
+    return value
+
+
+def _band_keys_of(texts):
+    try:
+        import numpy as np
+    except ImportError:
+        return [band_keys(sig) if sig else None
+                for sig in (signature(h, d) for h, d in texts)]
+
+    sets = [shingles(h, d) for h, d in texts]
+    sizes = np.fromiter((len(s) for s in sets), dtype=np.int64, count=len(sets))
+    present = sizes > 0
+    if not present.any():
+        return [None] * len(texts)
+    flat = np.fromiter((x for s in sets for x in s), dtype=np.uint64, count=int(sizes.sum()))
+    starts = np.concatenate(([0], np.cumsum(sizes[present])[:-1]))
+    mins = np.empty((NUM_PERM, int(present.sum())), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for i, (a, b) in enumerate(PERMUTATIONS):
+            mins[i] = np.minimum.reduceat(_permute(np, flat, a, b), starts)
+        keys = np.empty((BANDS, mins.shape[1]), dtype=np.uint64)
+        for band in range(BANDS):
+            key = np.full(mins.shape[1], band, dtype=np.uint64)
+            for row in mins[band * ROWS:(band + 1) * ROWS]:
+                key = key * np.uint64(_FOLD) + row
+            keys[band] = key
+    columns = iter(keys.view(np.int64).T.tolist())
+    return [next(columns) if ok else None for ok in present.tolist()]
+
+
+def index_tickets(db, tickets):
+    """Add [(query_id, client_name, heading, description), ...] to query_lsh"""
+    keys = batch_band_keys([(heading, description) for _, _, heading, description in tickets])
+    # Band keys are random; inserting them in key order walks the primary key
+    # B-tree once instead of touching a random page per row
+    db.executemany(INSERT_KEY, sorted(
+        (key, query_id, client_name)
+        for (query_id, client_name, _, _), ticket_keys in zip(tickets, keys) if ticket_keys
+        for key in ticket_keys
+    ))
+
+
+def index_after(db, query_id, chunk=INDEX_CHUNK):
+    """Index every ticket with a larger query_id; returns the last id seen"""
+    while True:
+        rows = db.execute(SELECT_TEXT_AFTER, (query_id or 0, chunk)).fetchall()
+        if not rows:
+            return query_id
+        index_tickets(db, rows)
+        query_id = rows[-1][0]
+
+
+def rebuild(db):
+    """Re-index every hot ticket (caller commits)"""
+    db.execute("DELETE FROM query_lsh")
+    index_after(db, 0)
+
+
+def _similar(db, keys, client_name, exclude, limit):
+    if client_name is None:
+        params = [v for key in keys for v in (key, CANDIDATES_PER_BAND)]
+        sql = SELECT_SIMILAR
+    else:
+        params = [v for key in keys for v in (key, client_name, CANDIDATES_PER_BAND)]
+        sql = SELECT_SIMILAR_FOR_CLIENT
+    return [
+        {'query_id': query_id, 'client_name': owner, 'heading': heading,
+         'status': status, 'priority': priority, 'score': bands / BANDS}
+        for query_id, owner, heading, status, priority, bands
+        in db.execute(sql, params + [exclude, limit])
+    ]
+
+
+def similar(db, heading, description, client_name=None, exclude=None, limit=5):
+    """Likely duplicates of the given text, best first.
+
+    score is the fraction of bands shared, a coarse similarity estimate.
+    Pass client_name to only search that client's tickets.
+    """
+    values = signature(heading, description)
+    if values is None:
+        return []
+    return _similar(db, band_keys(values), client_name, exclude, limit)
+
+
+def similar_to(db, query_id, client_name=None, limit=5):
+    """Likely duplicates of an indexed ticket, from its stored band keys"""
+    keys = [key for (key,) in db.execute(SELECT_KEYS, (query_id,))]
+    if len(keys) != BANDS:
+        return []
+    return _similar(db, keys, client_name, query_id, limit)
+
+
+def clusters(db, statuses=OPEN_STATUSES, min_size=2):
+    """Group tickets with the given statuses into near-duplicate clusters.
+
+    Hashes the whole backlog in one batch and joins tickets that share a
+    band key (union-find). Returns lists of query_ids, largest first.
+    """
+    where = f"WHERE status IN ({', '.join('?' * len(statuses))})" if statuses else ""
+    rows = db.execute(
+        f"SELECT query_id, query_heading, query_description FROM client_queries {where}",
+        tuple(statuses)
+    ).fetchall()
+    keys = batch_band_keys([(heading, description) for _, heading, description in rows])
+
+    parent = list(range(len(rows)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    first_in_bucket = {}
+    for i, ticket_keys in enumerate(keys):
+        for band, key in enumerate(ticket_keys or ()):
+            j = first_in_bucket.setdefault((band, key), i)
+            if j != i:
+                parent[find(i)] = find(j)
+
+    groups = {}
+    for i, (query_id, _, _) in enumerate(rows):
+        groups.setdefault(find(i), []).append(query_id)
+    return sorted((g for g in groups.values() if len(g) >= min_size), key=len, reverse=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from db_connection import create_tables, db_session
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate tickets")
+    parser.add_argument("--rebuild", action="store_true", help="re-index every ticket")
+    parser.add_argument("--cluster", action="store_true", help="cluster the open backlog")
+    parser.add_argument("--all", action="store_true", help="cluster resolved tickets too")
+    parser.add_argument("--top", type=int, default=10, help="clusters to print")
+    args = parser.parse_args()
+
+    if not create_tables():
+        sys.exit(1)
+    with db_session() as db:
+        if args.rebuild:
+            start = time.perf_counter()
+            db.execute("BEGIN IMMEDIATE")
+            rebuild(db)
+            print(f"✅ Duplicate index rebuilt in {time.perf_counter() - start:.2f}s")
+        if args.cluster or not args.rebuild:
+            start = time.perf_counter()
+            found = clusters(db, () if args.all else OPEN_STATUSES)
+            elapsed = time.perf_counter() - start
+            print(f"🔁 {len(found)} clusters covering {sum(map(len, found))} tickets "
+                  f"({elapsed:.2f}s)")
+            for group in found[:args.top]:
+                heading, description = db.execute(
+                    "SELECT query_heading, query_description FROM client_queries "
+                    "WHERE query_id = ?", (group[0],)
+                ).fetchone()
+                print(f"  {len(group):>6} × {heading}: {description}")
@@ -0,0 +1,167 @@
+"""Bulk import of CSV exports (synthetic_client_queries.csv format) into client_queries.
+
+Rows are streamed from the file, mapped onto the client_queries schema and
+written with executemany in large transactions. Every imported row keeps its
+CSV query_id in client_queries.source_ref (unique), so re-running an import
+skips tickets that are already loaded. Those rows are dropped before the
+INSERT: a conflict under OR IGNORE still uses up an AUTOINCREMENT id, so a
+re-import would otherwise move sqlite_sequence past every skipped row.
+
+    python import_csv.py synthetic_client_queries.csv
+    python import_csv.py export.csv --batch-size 20000 --priority Low
+"""
+import argparse
+import csv
+import sys
+import time
+
+from db_connection import create_tables, db_session
+import duplicates
+import timestamps
+
+BATCH_SIZE = 50000
+TRANSACTION_ROWS = 200000
+LOOKUP_CHUNK = 500
+# Page cache for the import connection (KiB), restored afterwards; index pages
+# of client_queries and query_lsh stay cached across batches
+IMPORT_CACHE_KIB = 262144
+
+# CSV status -> client_queries status
+STATUS_MAP = {
+    'closed': 'Resolved',
+    'resolved': 'Resolved',
+    'opened': 'Open',
+    'open': 'Open',
+    'in progress': 'In Progress',
+}
+
+# OR IGNORE only guards against another writer loading the same source_ref
+# between the lookup and the insert
+INSERT_SQL = """
+    INSERT OR IGNORE INTO client_queries
+    (client_name, mail_id, mobile_number, query_heading, query_description,
+     status, priority, query_created_time, query_closed_time, source_ref)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_LOADED = "SELECT source_ref FROM client_queries WHERE source_ref IN ({marks})"
+
+
+def map_row(row, client_names, priority):
+    """Map one CSV record onto the client_queries insert parameters"""
+    email = row['client_email'].strip()
+    status = STATUS_MAP.get(row['status'].strip().lower(), 'Open')
+    return (
+        client_names.get(email.lower(), email.split('@')[0]),
+        email,
+        row['client_mobile'].strip(),
+        row['query_heading'].strip(),
+        row['query_description'].strip(),
+        status,
+        priority,
+        timestamps.to_db(row['date_raised']),
+        timestamps.to_db(row['date_closed']) if status == 'Resolved' else None,
+        row['query_id'].strip(),
+    )
+
+
+def iter_batches(path, client_names, priority, batch_size):
+    with open(path, newline='', encoding='utf-8') as f:
+        batch = []
+        for row in csv.DictReader(f):
+            batch.append(map_row(row, client_names, priority))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def new_rows(db, batch):
+    """Rows of a mapped batch whose source_ref is neither loaded nor repeated earlier"""
+    refs = list(dict.fromkeys(row[-1] for row in batch))
+    loaded = set()
+    for start in range(0, len(refs), LOOKUP_CHUNK):
+        chunk = refs[start:start + LOOKUP_CHUNK]
+        loaded.update(ref for (ref,) in db.execute(
+            SELECT_LOADED.format(marks=", ".join("?" * len(chunk))), chunk
+        ))
+    rows = []
+    for row in batch:
+        if row[-1] not in loaded:
+            loaded.add(row[-1])
+            rows.append(row)
+    return rows
+
+
+def import_csv(path, batch_size=BATCH_SIZE, transaction_rows=TRANSACTION_ROWS,
+               priority='Medium', progress=None):
+    """Import a CSV file; returns a dict with read/inserted/skipped counts and rows_per_sec"""
+    start = time.perf_counter()
+    read = inserted = 0
+    with db_session() as db:
+        client_names = {
+            email.lower(): username
+            for username, email in db.execute(
+                "SELECT username, email FROM users WHERE email IS NOT NULL AND role = 'Client'"
+            )
+        }
+        pending = 0
+        # Everything past this id is new and gets added to the duplicate index
+        indexed = db.execute("SELECT MAX(query_id) FROM client_queries").fetchone()[0]
+        cache_size = db.execute("PRAGMA cache_size").fetchone()[0]
+        db.execute(f"PRAGMA cache_size=-{IMPORT_CACHE_KIB}")
+        try:
+            for batch in iter_batches(path, client_names, priority, batch_size):
+                rows = new_rows(db, batch)
+                if rows:
+                    cursor = db.executemany(INSERT_SQL, rows)
+                    indexed = duplicates.index_after(db, indexed)
+                    inserted += max(cursor.rowcount, 0)
+                read += len(batch)
+                pending += len(batch)
+                if pending >= transaction_rows:
+                    db.commit()
+                    pending = 0
+                if progress:
+                    progress(read, inserted, time.perf_counter() - start)
+        finally:
+            db.execute(f"PRAGMA cache_size={cache_size}")
+    seconds = time.perf_counter() - start
+    return {
+        'read': read,
+        'inserted': inserted,
+        'skipped': read - inserted,
+        'seconds': seconds,
+        'rows_per_sec': read / seconds if seconds else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a client queries CSV export")
+    parser.add_argument("path", help="CSV file with query_id, client_email, ... columns")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--transaction-rows", type=int, default=TRANSACTION_ROWS)
+    parser.add_argument("--priority", default="Medium", choices=["Low", "Medium", "High"])
+    args = parser.parse_args(argv)
+
+    if not create_tables():
+        return 1
+
+    def progress(read, inserted, seconds):
+        print(f"  {read:,} rows read, {inserted:,} inserted ({read / seconds:,.0f} rows/s)",
+              end="\r", flush=True)
+
+    try:
+        stats = import_csv(args.path, args.batch_size, args.transaction_rows,
+                           args.priority, progress)
+    except Exception as e:
+        print(f"\n❌ Import failed: {e}")
+        return 1
+    print(f"\n✅ Imported {stats['inserted']:,} of {stats['read']:,} rows "
+          f"({stats['skipped']:,} already present) in {stats['seconds']:.1f}s "
+          f"— {stats['rows_per_sec']:,.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
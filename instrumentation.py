@@ -0,0 +1,273 @@
+"""In-process timers, counters and histograms for the hot paths.
+
+Wrapped so far: borrowing a pooled connection (get_db), opening new
+connections, every statement run through a pooled connection, cached
+query loads, DataFrame construction, chart builds, CSV parsing and whole
+page renders. Each timing lands in a fixed-bucket histogram keyed on
+(metric name, labels), and the slowest individual statements are kept
+in a small heap for the Performance page.
+
+Export: to_openmetrics() renders the OpenMetrics text format. Set
+METRICS_FILE to have it rewritten every METRICS_INTERVAL seconds, and/or
+METRICS_PORT to serve it over HTTP at /metrics. METRICS_ENABLED=0 turns
+every timer into a no-op.
+"""
+import heapq
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+EXPORT_FILE = os.environ.get("METRICS_FILE")
+EXPORT_PORT = os.environ.get("METRICS_PORT")
+EXPORT_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "15"))
+
+# Histogram upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SLOWEST_KEPT = 50
+SQL_LABEL_LENGTH = 160
+
+
+@lru_cache(maxsize=1024)
+def sql_label(sql):
+    """Normalise a statement for use as a label.
+
+    Whitespace is collapsed and placeholder lists ("?, ?, ?" and
+    "(?, ?), (?, ?)") are folded, so chunked IN (...) queries of different
+    sizes share one histogram.
+    """
+    sql = " ".join(sql.split())
+    sql = re.sub(r"\?(?:, \?)+", "?...", sql)
+    sql = re.sub(r"\(\?\.\.\.\)(?:, \(\?\.\.\.\))+", "(?...)...", sql)
+    return sql if len(sql) <= SQL_LABEL_LENGTH else sql[:SQL_LABEL_LENGTH - 3] + "..."
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        i = 0
+        while i < len(BUCKETS) and value > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+            if n and seen + n >= rank:
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+            lower = upper
+        return self.max
+
+
+class Registry:
+    """Thread-safe store of counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> float
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._slowest = []     # min-heap of (seconds, seq, name, labels, at)
+        self._seq = 0
+        self.started = time.time()
+
+    def count(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, track_slowest=False, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+            if track_slowest and (len(self._slowest) < SLOWEST_KEPT or seconds > self._slowest[0][0]):
+                self._seq += 1
+                entry = (seconds, self._seq, name, key[1], time.time())
+                if len(self._slowest) < SLOWEST_KEPT:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heapreplace(self._slowest, entry)
+
+    @contextmanager
+    def timer(self, name, track_slowest=False, **labels):
+        """Time the with-block into the histogram name{labels}"""
+        if not ENABLED:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, track_slowest, **labels)
+
+    def start(self, name, **labels):
+        """Start a timer that is finished with .stop(), for spans that are not one block"""
+        return _Span(self, name, labels)
+
+    def histograms(self):
+        """[(name, labels dict, count, sum, avg, p50, p95, max), ...] by total time"""
+        with self._lock:
+            rows = [
+                (name, dict(labels), h.count, h.sum, h.sum / h.count,
+                 h.quantile(0.5), h.quantile(0.95), h.max)
+                for (name, labels), h in self._histograms.items()
+            ]
+        return sorted(rows, key=lambda row: -row[3])
+
+    def counters(self):
+        with self._lock:
+            return [(name, dict(labels), value) for (name, labels), value in self._counters.items()]
+
+    def slowest(self, n=20):
+        """The n slowest tracked executions: [(seconds, name, labels dict, at), ...]"""
+        with self._lock:
+            entries = heapq.nlargest(n, self._slowest)
+        return [(seconds, name, dict(labels), at) for seconds, _, name, labels, at in entries]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._slowest.clear()
+            self.started = time.time()
+
+    def to_openmetrics(self):
+        """All metrics in the OpenMetrics text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, list(h.counts), h.count, h.sum) for key, h in self._histograms.items()
+            )
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}_total{_labels(labels)} {value}")
+        for (name, labels), counts, count, total in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+                lines.append(f"# UNIT {name} seconds")
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ('+Inf',), counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path):
+        """Atomically (re)write the export file"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_openmetrics())
+        os.replace(tmp, path)
+
+
+class _Span:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.begin = time.perf_counter()
+
+    def stop(self):
+        seconds = time.perf_counter() - self.begin
+        if ENABLED:
+            self.registry.observe(self.name, seconds, **self.labels)
+        return seconds
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{re.sub(r"[^a-zA-Z0-9_]", "_", k)}="{_escape(v)}"'
+                          for k, v in labels) + "}"
+
+
+registry = Registry()
+timer = registry.timer
+count = registry.count
+start = registry.start
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(path=EXPORT_FILE, port=EXPORT_PORT, interval=EXPORT_INTERVAL):
+    """Start the METRICS_FILE writer and/or METRICS_PORT endpoint once per process"""
+    global _exporter
+    if _exporter is not None or not (path or port):
+        return
+    with _exporter_lock:
+        if _exporter is not None:
+            return
+        _exporter = []
+        if path:
+            def write_forever():
+                while True:
+                    try:
+                        registry.write_openmetrics(path)
+                    except OSError:
+                        pass
+                    time.sleep(interval)
+
+            thread = threading.Thread(target=write_forever, name="metrics-file", daemon=True)
+            thread.start()
+            _exporter.append(thread)
+        if port:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.to_openmetrics().encode()
+                    self.send_response(200)
+                    self.send_header(
+                        "Content-Type",
+                        "application/openmetrics-text; version=1.0.0; charset=utf-8"
+                    )
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), MetricsHandler)
+            thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+            thread.start()
+            _exporter.append(thread)
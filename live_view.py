@@ -0,0 +1,88 @@
+"""A page of tickets kept current from the change feed.
+
+The pages keep one LiveView per session in st.session_state. It is loaded
+once per filter/page, then refresh() (run on an auto-refresh timer) polls
+repository.poll_changes() and patches only the rows that changed: updated
+tickets are replaced in place, tickets that were deleted or stopped
+matching are dropped, and new tickets are inserted if they belong on the
+first page. Only if the reader fell too far behind is the page reloaded.
+"""
+from typing import Optional
+
+import repository
+from query_builder import QueryFilter
+
+REFRESH_SECONDS = 5
+
+
+def _sort_key(ticket):
+    return ticket.query_created_time or '', ticket.query_id
+
+
+class LiveView:
+    def __init__(self, filters: QueryFilter, page_size: int = 50, after: Optional[tuple] = None):
+        self.filters = filters
+        self.page_size = page_size
+        self.after = after
+        self.reload()
+
+    @property
+    def key(self):
+        return self.filters.key(), self.page_size, self.after
+
+    def reload(self):
+        self.seq, self.tickets, self.next_cursor = repository.live_page(
+            self.filters, self.page_size, self.after
+        )
+        self.patches = 0
+
+    def _belongs(self, ticket):
+        # New tickets are only inserted on the first page, and only if they
+        # sort before the end of it (or the page is the whole result set)
+        if self.after is not None:
+            return False
+        if self.next_cursor is None or not self.tickets:
+            return True
+        return _sort_key(ticket) > _sort_key(self.tickets[-1])
+
+    def refresh(self) -> bool:
+        """Apply changes since the last poll; returns True if the page changed"""
+        batch, changed = repository.poll_changes(self.filters, self.seq)
+        if batch.overflow:
+            before = self.tickets
+            self.reload()
+            return self.tickets != before
+        self.seq = batch.cursor
+        if not batch.query_ids:
+            return False
+
+        rows = {ticket.query_id: ticket for ticket in self.tickets}
+        fresh = {ticket.query_id: ticket for ticket in changed}
+        for query_id in batch.query_ids:
+            ticket = fresh.get(query_id)
+            if ticket is None:
+                rows.pop(query_id, None)
+            elif query_id in rows or self._belongs(ticket):
+                rows[query_id] = ticket
+
+        tickets = sorted(rows.values(), key=_sort_key, reverse=True)
+        if len(tickets) > self.page_size:
+            tickets = tickets[:self.page_size]
+            self.next_cursor = (tickets[-1].query_created_time, tickets[-1].query_id)
+        if tickets == self.tickets:
+            return False
+        self.tickets = tickets
+        self.patches += 1
+        return True
+
+
+def get_view(state, name: str, filters: QueryFilter, page_size: int,
+             after: Optional[tuple]) -> LiveView:
+    """The session's LiveView for these filters and page, (re)loading it if needed"""
+    view = state.get(name)
+    if view is None or view.key != (filters.key(), page_size, after):
+        view = LiveView(filters, page_size, after)
+        state[name] = view
+    else:
+        view.refresh()
+    return view
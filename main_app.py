@@ -1,9 +1,13 @@
 import streamlit as st
-import hashlib
-from db_connection import get_db, create_tables
+from query_builder import QueryFilter
+import repository
+import startup
+import auth_service
+from auth_service import service as auth, RateLimited
+from passwords import PasswordServiceBusy
 
-# IMPORTANT: Setup tables first
-create_tables()
+# IMPORTANT: Setup tables first (once per process, not on every rerun)
+startup.ensure_started()
 
 # Page config
 st.set_page_config(
@@ -22,30 +26,33 @@ if "role" not in st.session_state:
     st.session_state.role = None
 if "email" not in st.session_state:
     st.session_state.email = None
+if "auth_token" not in st.session_state:
+    st.session_state.auth_token = None
 
-# Hash password function
-def hash_pw(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+# Logged-in sessions are re-validated on every rerun (signed token, idle timeout, max age)
+if st.session_state.logged_in and auth.validate(st.session_state.auth_token) is None:
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.role = None
+    st.session_state.email = None
+    st.session_state.auth_token = None
+    st.warning("⌛ Your session has expired. Please login again.")
+
+def client_address():
+    """Client IP for rate limiting (None if it cannot be trusted or is not exposed)"""
+    try:
+        context = st.context
+        return auth_service.client_address(
+            getattr(context, "ip_address", None), context.headers.get("X-Forwarded-For")
+        )
+    except Exception:
+        return None
 
 # Register function
 def register(username, password, role, email):
     try:
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute("SELECT * FROM users WHERE username=?", (username,))
-        if cursor.fetchone():
-            cursor.close()
-            db.close()
+        if not repository.register(username, password, role, email):
             return False, "❌ Username already exists!"
-        
-        hashed = hash_pw(password)
-        cursor.execute(
-            "INSERT INTO users (username, password, role, email) VALUES (?, ?, ?, ?)",
-            (username, hashed, role, email)
-        )
-        db.commit()
-        cursor.close()
-        db.close()
         return True, "✅ Registration successful! Please login."
     except Exception as e:
         return False, f"❌ Error: {str(e)}"
@@ -53,22 +60,19 @@ def register(username, password, role, email):
 # Login function
 def login(username, password, role):
     try:
-        db = get_db()
-        cursor = db.cursor()
-        hashed = hash_pw(password)
-        cursor.execute(
-            "SELECT username, role, email FROM users WHERE username=? AND password=? AND role=?",
-            (username, hashed, role)
-        )
-        result = cursor.fetchone()
-        cursor.close()
-        db.close()
-        if result:
-            return True, result[1], result[2]
-        return False, None, None
+        user, token = auth.login(username, password, role, client_address())
+        if user:
+            return True, user.role, user.email, token
+        return False, None, None, None
+    except RateLimited as e:
+        st.error(f"⏳ Too many login attempts. Try again in {e.retry_after:.0f} seconds.")
+        return False, None, None, None
+    except PasswordServiceBusy:
+        st.error("⏳ Too many login attempts right now, please try again in a moment.")
+        return False, None, None, None
     except Exception as e:
         st.error(f"Database error: {str(e)}")
-        return False, None, None
+        return False, None, None, None
 
 # CSS Styling
 st.markdown("""
@@ -111,13 +115,14 @@ if not st.session_state.logged_in:
             
             if st.button("🔓 Login", use_container_width=True):
                 if login_username and login_password:
-                    success, role, email = login(login_username, login_password, login_role)
+                    success, role, email, token = login(login_username, login_password, login_role)
                     if success:
                         # Set session state
                         st.session_state.logged_in = True
                         st.session_state.username = login_username
                         st.session_state.role = role
                         st.session_state.email = email
+                        st.session_state.auth_token = token
                         st.success(f"✅ Welcome {login_username}!")
                         st.balloons()
                         st.rerun()
@@ -165,6 +170,8 @@ else:
         st.write(f"**👥 Role:** {st.session_state.role}")
     with col3:
         if st.button("🚪 Logout", use_container_width=True):
+            auth.logout(st.session_state.auth_token)
+            st.session_state.auth_token = None
             st.session_state.logged_in = False
             st.session_state.username = None
             st.session_state.role = None
@@ -207,20 +214,10 @@ else:
     
     # Quick stats
     try:
-        db = get_db()
-        cursor = db.cursor()
-        
         if st.session_state.role == "Client":
-            cursor.execute(
-                "SELECT COUNT(*) FROM client_queries WHERE client_name=?",
-                (st.session_state.username,)
-            )
+            total = repository.count_queries(QueryFilter(client_name=st.session_state.username))
         else:
-            cursor.execute("SELECT COUNT(*) FROM client_queries")
-        
-        total = cursor.fetchone()[0]
-        cursor.close()
-        db.close()
+            total = repository.count_queries()
         
         st.metric("📊 Total Queries", total)
     except:
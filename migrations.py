@@ -0,0 +1,397 @@
+"""Versioned schema migrations for the query database.
+
+Migrations are applied in order at startup (see db_connection.create_tables)
+and recorded in the schema_version table, so each one runs exactly once per
+database file. To change the schema, append a new entry to MIGRATIONS; never
+edit one that has already shipped.
+
+Each migration is (version, name, steps) where every step is either a SQL
+string or a callable taking the open connection.
+"""
+import sys
+
+import archive
+import changes
+import counters
+import duplicates
+import rollups
+import sla
+import timestamps
+
+MIGRATIONS = [
+    (1, "client_queries secondary indexes", [
+        """CREATE INDEX IF NOT EXISTS idx_queries_client_created
+           ON client_queries (client_name, query_created_time)""",
+        """CREATE INDEX IF NOT EXISTS idx_queries_status_priority_created
+           ON client_queries (status, priority, query_created_time)""",
+        """CREATE INDEX IF NOT EXISTS idx_queries_priority_created
+           ON client_queries (priority, query_created_time)""",
+        """CREATE INDEX IF NOT EXISTS idx_queries_created
+           ON client_queries (query_created_time)""",
+    ]),
+    (2, "full-text search over heading, description and email", [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS client_queries_fts USING fts5(
+               query_heading, query_description, mail_id,
+               content='client_queries', content_rowid='query_id',
+               tokenize='unicode61 remove_diacritics 2'
+           )""",
+        """CREATE TRIGGER IF NOT EXISTS client_queries_fts_ai
+           AFTER INSERT ON client_queries BEGIN
+               INSERT INTO client_queries_fts (rowid, query_heading, query_description, mail_id)
+               VALUES (new.query_id, new.query_heading, new.query_description, new.mail_id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS client_queries_fts_ad
+           AFTER DELETE ON client_queries BEGIN
+               INSERT INTO client_queries_fts
+                   (client_queries_fts, rowid, query_heading, query_description, mail_id)
+               VALUES ('delete', old.query_id, old.query_heading, old.query_description, old.mail_id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS client_queries_fts_au
+           AFTER UPDATE OF query_heading, query_description, mail_id ON client_queries BEGIN
+               INSERT INTO client_queries_fts
+                   (client_queries_fts, rowid, query_heading, query_description, mail_id)
+               VALUES ('delete', old.query_id, old.query_heading, old.query_description, old.mail_id);
+               INSERT INTO client_queries_fts (rowid, query_heading, query_description, mail_id)
+               VALUES (new.query_id, new.query_heading, new.query_description, new.mail_id);
+           END""",
+        "INSERT INTO client_queries_fts (client_queries_fts) VALUES ('rebuild')",
+    ]),
+    (3, "external reference for imported tickets", [
+        "ALTER TABLE client_queries ADD COLUMN source_ref TEXT",
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_queries_source_ref
+           ON client_queries (source_ref) WHERE source_ref IS NOT NULL""",
+    ]),
+    (4, "maintained ticket counters per client and status", [
+        """CREATE TABLE IF NOT EXISTS query_counts (
+               client_name TEXT NOT NULL,
+               status TEXT NOT NULL,
+               n INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (client_name, status)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS query_counts_global (
+               status TEXT PRIMARY KEY,
+               n INTEGER NOT NULL DEFAULT 0
+           ) WITHOUT ROWID""",
+        """CREATE TRIGGER IF NOT EXISTS query_counts_ai
+           AFTER INSERT ON client_queries BEGIN
+               INSERT INTO query_counts (client_name, status, n)
+               VALUES (coalesce(new.client_name, ''), coalesce(new.status, ''), 1)
+               ON CONFLICT (client_name, status) DO UPDATE SET n = n + 1;
+               INSERT INTO query_counts_global (status, n)
+               VALUES (coalesce(new.status, ''), 1)
+               ON CONFLICT (status) DO UPDATE SET n = n + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS query_counts_ad
+           AFTER DELETE ON client_queries BEGIN
+               UPDATE query_counts SET n = n - 1
+               WHERE client_name = coalesce(old.client_name, '')
+                 AND status = coalesce(old.status, '');
+               UPDATE query_counts_global SET n = n - 1
+               WHERE status = coalesce(old.status, '');
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS query_counts_au
+           AFTER UPDATE OF client_name, status ON client_queries
+           WHEN coalesce(old.client_name, '') IS NOT coalesce(new.client_name, '')
+             OR coalesce(old.status, '') IS NOT coalesce(new.status, '')
+           BEGIN
+               UPDATE query_counts SET n = n - 1
+               WHERE client_name = coalesce(old.client_name, '')
+                 AND status = coalesce(old.status, '');
+               INSERT INTO query_counts (client_name, status, n)
+               VALUES (coalesce(new.client_name, ''), coalesce(new.status, ''), 1)
+               ON CONFLICT (client_name, status) DO UPDATE SET n = n + 1;
+               UPDATE query_counts_global SET n = n - 1
+               WHERE status = coalesce(old.status, '');
+               INSERT INTO query_counts_global (status, n)
+               VALUES (coalesce(new.status, ''), 1)
+               ON CONFLICT (status) DO UPDATE SET n = n + 1;
+           END""",
+        counters.rebuild,
+    ]),
+    (5, "row version for optimistic concurrency", [
+        "ALTER TABLE client_queries ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (6, "daily created/resolved rollups", [
+        """CREATE TABLE IF NOT EXISTS query_daily_rollup (
+               day TEXT NOT NULL,
+               priority TEXT NOT NULL,
+               status TEXT NOT NULL,
+               created INTEGER NOT NULL DEFAULT 0,
+               resolved INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (day, priority, status)
+           ) WITHOUT ROWID""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_daily_rollup_ai
+           AFTER INSERT ON client_queries BEGIN
+               {rollups.add_sql('new', 1)}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_daily_rollup_ad
+           AFTER DELETE ON client_queries BEGIN
+               {rollups.add_sql('old', -1)}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_daily_rollup_au
+           AFTER UPDATE OF status, priority, query_created_time, query_closed_time
+           ON client_queries BEGIN
+               {rollups.add_sql('old', -1)}
+               {rollups.add_sql('new', 1)}
+           END""",
+        rollups.rebuild,
+    ]),
+    (7, "resolution times for SLA analytics", [
+        """CREATE TABLE IF NOT EXISTS query_resolution (
+               query_id INTEGER PRIMARY KEY,
+               priority TEXT NOT NULL,
+               assigned_to TEXT,
+               seconds INTEGER NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_resolution_priority ON query_resolution(priority, seconds)",
+        "CREATE INDEX IF NOT EXISTS idx_resolution_assignee ON query_resolution(assigned_to, seconds)",
+        f"""CREATE TRIGGER IF NOT EXISTS query_resolution_ai
+           AFTER INSERT ON client_queries BEGIN
+               {sla.resolution_sql('new')}
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS query_resolution_ad
+           AFTER DELETE ON client_queries BEGIN
+               DELETE FROM query_resolution WHERE query_id = old.query_id;
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_resolution_au
+           AFTER UPDATE OF status, priority, assigned_to, query_created_time, query_closed_time
+           ON client_queries BEGIN
+               DELETE FROM query_resolution WHERE query_id = old.query_id;
+               {sla.resolution_sql('new')}
+           END""",
+        sla.rebuild,
+    ]),
+    (8, "change feed", [
+        """CREATE TABLE IF NOT EXISTS query_changes (
+               seq INTEGER PRIMARY KEY AUTOINCREMENT,
+               query_id INTEGER NOT NULL,
+               client_name TEXT,
+               op TEXT NOT NULL,
+               changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_changes_client_seq ON query_changes(client_name, seq)",
+        "CREATE INDEX IF NOT EXISTS idx_changes_changed_at ON query_changes(changed_at)",
+        f"""CREATE TRIGGER IF NOT EXISTS query_changes_ai
+           AFTER INSERT ON client_queries BEGIN
+               {changes.record_sql('new', 'insert')}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_changes_ad
+           AFTER DELETE ON client_queries BEGIN
+               {changes.record_sql('old', 'delete')}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_changes_au
+           AFTER UPDATE ON client_queries BEGIN
+               {changes.record_sql('new', 'update')}
+           END""",
+    ]),
+    (9, "archive tier for old resolved tickets", [
+        """CREATE TABLE IF NOT EXISTS query_archive (
+               query_id INTEGER PRIMARY KEY,
+               client_name TEXT,
+               mail_id TEXT NOT NULL,
+               mobile_number TEXT NOT NULL,
+               query_heading TEXT NOT NULL,
+               query_description TEXT NOT NULL,
+               status TEXT,
+               priority TEXT,
+               query_created_time DATETIME NOT NULL,
+               query_closed_time DATETIME,
+               assigned_to TEXT,
+               source_ref TEXT,
+               version INTEGER NOT NULL DEFAULT 0,
+               archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_archive_client_created "
+        "ON query_archive(client_name, query_created_time)",
+        "CREATE INDEX IF NOT EXISTS idx_archive_status_priority "
+        "ON query_archive(status, priority)",
+        "CREATE INDEX IF NOT EXISTS idx_queries_status_closed "
+        "ON client_queries(status, query_closed_time)",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS query_archive_fts USING fts5(
+               query_heading, query_description, mail_id,
+               content='query_archive', content_rowid='query_id',
+               tokenize='unicode61 remove_diacritics 2'
+           )""",
+        """CREATE TRIGGER IF NOT EXISTS query_archive_fts_ai
+           AFTER INSERT ON query_archive BEGIN
+               INSERT INTO query_archive_fts (rowid, query_heading, query_description, mail_id)
+               VALUES (new.query_id, new.query_heading, new.query_description, new.mail_id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS query_archive_fts_ad
+           AFTER DELETE ON query_archive BEGIN
+               INSERT INTO query_archive_fts
+                   (query_archive_fts, rowid, query_heading, query_description, mail_id)
+               VALUES ('delete', old.query_id, old.query_heading, old.query_description, old.mail_id);
+           END""",
+        # History-wide tables keep archived tickets: moving a ticket between
+        # tiers must not add or remove its rollup and resolution-time rows
+        "DROP TRIGGER IF EXISTS query_daily_rollup_ai",
+        "DROP TRIGGER IF EXISTS query_daily_rollup_ad",
+        "DROP TRIGGER IF EXISTS query_resolution_ai",
+        "DROP TRIGGER IF EXISTS query_resolution_ad",
+        f"""CREATE TRIGGER query_daily_rollup_ai
+           AFTER INSERT ON client_queries WHEN {archive.not_archived('new')} BEGIN
+               {rollups.add_sql('new', 1)}
+           END""",
+        f"""CREATE TRIGGER query_daily_rollup_ad
+           AFTER DELETE ON client_queries WHEN {archive.not_archived('old')} BEGIN
+               {rollups.add_sql('old', -1)}
+           END""",
+        f"""CREATE TRIGGER query_resolution_ai
+           AFTER INSERT ON client_queries WHEN {archive.not_archived('new')} BEGIN
+               {sla.resolution_sql('new')}
+           END""",
+        f"""CREATE TRIGGER query_resolution_ad
+           AFTER DELETE ON client_queries WHEN {archive.not_archived('old')} BEGIN
+               DELETE FROM query_resolution WHERE query_id = old.query_id;
+           END""",
+    ]),
+    (10, "canonical created/closed timestamps", [
+        f"""UPDATE {table} SET {column} = {timestamps.normalize_sql(column)}
+            WHERE {column} IS NOT NULL AND {column} NOT GLOB '{timestamps.CANONICAL_GLOB}'"""
+        for table in ("client_queries", "query_archive")
+        for column in ("query_created_time", "query_closed_time")
+    ] + [
+        "CREATE INDEX IF NOT EXISTS idx_queries_closed ON client_queries(query_closed_time)",
+    ]),
+    (11, "assignee queue index", [
+        """CREATE INDEX IF NOT EXISTS idx_queries_assignee_status
+           ON client_queries(assigned_to, status, query_created_time)""",
+    ]),
+    (12, "near-duplicate LSH index", [
+        """CREATE TABLE IF NOT EXISTS query_lsh (
+               band_key INTEGER NOT NULL,
+               query_id INTEGER NOT NULL,
+               client_name TEXT,
+               PRIMARY KEY (band_key, query_id)
+           ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_lsh_client ON query_lsh(band_key, client_name, query_id)",
+        "CREATE INDEX IF NOT EXISTS idx_lsh_query ON query_lsh(query_id)",
+        f"""CREATE TRIGGER IF NOT EXISTS query_lsh_ad
+           AFTER DELETE ON client_queries WHEN {archive.not_archived('old')} BEGIN
+               DELETE FROM query_lsh WHERE query_id = old.query_id;
+           END""",
+        duplicates.rebuild,
+    ]),
+    (13, "status/created index and archive counters", [
+        """CREATE INDEX IF NOT EXISTS idx_queries_status_created
+           ON client_queries(status, query_created_time)""",
+        """CREATE TABLE IF NOT EXISTS query_archive_counts (
+               client_name TEXT NOT NULL,
+               status TEXT NOT NULL,
+               n INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (client_name, status)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS query_archive_counts_global (
+               status TEXT PRIMARY KEY,
+               n INTEGER NOT NULL DEFAULT 0
+           ) WITHOUT ROWID""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_archive_counts_ai
+           AFTER INSERT ON query_archive BEGIN
+               {counters.archive_count_sql('new', 1)}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_archive_counts_ad
+           AFTER DELETE ON query_archive BEGIN
+               {counters.archive_count_sql('old', -1)}
+           END""",
+        counters.rebuild_archive,
+    ]),
+    (14, "resolution times scoped by tier", [
+        "ALTER TABLE query_resolution ADD COLUMN archived INTEGER NOT NULL DEFAULT 0",
+        "DROP INDEX IF EXISTS idx_resolution_priority",
+        "DROP INDEX IF EXISTS idx_resolution_assignee",
+        """CREATE INDEX IF NOT EXISTS idx_resolution_scope_priority
+           ON query_resolution(archived, priority, seconds)""",
+        """CREATE INDEX IF NOT EXISTS idx_resolution_scope_assignee
+           ON query_resolution(archived, assigned_to, seconds)""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_resolution_archive_ai
+           AFTER INSERT ON query_archive BEGIN
+               {sla.archived_sql('new', 1)}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_resolution_archive_ad
+           AFTER DELETE ON query_archive BEGIN
+               {sla.archived_sql('old', 0)}
+           END""",
+        sla.mark_archived,
+    ]),
+    (15, "resolution-time histograms", [
+        """CREATE TABLE IF NOT EXISTS query_resolution_hist (
+               archived INTEGER NOT NULL,
+               priority TEXT NOT NULL,
+               assigned_to TEXT NOT NULL,
+               bucket INTEGER NOT NULL,
+               n INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (archived, priority, assigned_to, bucket)
+           ) WITHOUT ROWID""",
+        # Percentiles by assignee come from the histogram now
+        "DROP INDEX IF EXISTS idx_resolution_scope_assignee",
+        f"""CREATE TRIGGER IF NOT EXISTS query_resolution_hist_ai
+           AFTER INSERT ON query_resolution BEGIN
+               {sla.histogram_sql('new', 1)}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_resolution_hist_ad
+           AFTER DELETE ON query_resolution BEGIN
+               {sla.histogram_sql('old', -1)}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS query_resolution_hist_au
+           AFTER UPDATE ON query_resolution BEGIN
+               {sla.histogram_sql('old', -1)}
+               {sla.histogram_sql('new', 1)}
+           END""",
+        sla.rebuild_histogram,
+    ]),
+    # Band keys now come from (a * x + b) mod PRIME permutations
+    (16, "near-duplicate keys from mod-prime permutations", [
+        duplicates.rebuild,
+    ]),
+]
+
+def current_version(db):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    row = db.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(db):
+    """Apply every pending migration, each in its own transaction"""
+    applied = []
+    for version, name, steps in MIGRATIONS:
+        if version <= current_version(db):
+            continue
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if version <= current_version(db):
+                db.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(db)
+                else:
+                    db.execute(step)
+            db.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (version, name)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from db_connection import create_tables, db_session
+
+    if not create_tables():
+        sys.exit(1)
+    with db_session() as db:
+        print(f"Schema version: {current_version(db)}")
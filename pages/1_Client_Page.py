@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
 import sys
 import os
 
@@ -9,9 +7,22 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from db_connection import get_db
+from query_builder import QueryFilter
+import repository
+import instrumentation
+import startup
+from live_view import REFRESH_SECONDS, get_view
+import write_queue
+from auth_service import service as auth
+import csv_loader
+import timestamps
 
 st.set_page_config(page_title="Client Page", page_icon="📝", layout="wide")
+startup.ensure_started()
+
+PAGE_SIZE = 50
+
+render = instrumentation.start("page_render_seconds", page="client")
 
 # Check if user is logged in
 if "logged_in" not in st.session_state:
@@ -19,7 +30,7 @@ if "logged_in" not in st.session_state:
     st.info("👉 Go back to the main page to login")
     st.stop()
 
-if not st.session_state.logged_in:
+if not st.session_state.logged_in or auth.validate(st.session_state.get("auth_token")) is None:
     st.warning("⚠️ You are not logged in!")
     st.info("👉 Go back to the main page to login")
     st.stop()
@@ -53,25 +64,23 @@ with col_left:
             if email and mobile and heading and description:
                 if "@" in email and mobile.isdigit() and len(mobile) >= 10:
                     try:
-                        db = get_db()
-                        cursor = db.cursor()
-                        
-                        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        
-                        cursor.execute("""
-                            INSERT INTO client_queries 
-                            (client_name, mail_id, mobile_number, query_heading, 
-                             query_description, status, priority, query_created_time)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (st.session_state.username, email, mobile, heading, 
-                              description, 'Open', priority, now))
-                        
-                        db.commit()
-                        query_id = cursor.lastrowid
-                        cursor.close()
-                        db.close()
+                        query_id = write_queue.create_query(
+                            st.session_state.username, email, mobile, heading,
+                            description, priority
+                        )
                         
                         st.success(f"✅ Query submitted successfully! Query ID: {query_id}")
+                        similar = repository.similar_tickets(
+                            heading, description, client_name=st.session_state.username,
+                            exclude=query_id, limit=3
+                        )
+                        if similar:
+                            st.info("🔁 This looks like queries you raised before:\n\n" + "\n\n".join(
+                                f"**#{hit['query_id']}** · {hit['heading']} · {hit['status']}"
+                                for hit in similar
+                            ))
+                    except write_queue.WriteQueueFull:
+                        st.warning("⏳ We're receiving a lot of queries right now. Please submit again in a moment.")
                     except Exception as e:
                         st.error(f"❌ Error: {str(e)}")
                 else:
@@ -83,27 +92,13 @@ with col_right:
     st.subheader("📊 Your Quick Stats")
     
     try:
-        db = get_db()
-        cursor = db.cursor()
-        cursor.execute(
-            "SELECT status FROM client_queries WHERE client_name=?",
-            (st.session_state.username,)
-        )
-        data = cursor.fetchall()
-        cursor.close()
-        db.close()
+        summary = repository.summary(QueryFilter(client_name=st.session_state.username))
         
-        if data:
-            df = pd.DataFrame(data, columns=['status'])
-            total = len(df)
-            open_count = len(df[df['status'] == 'Open'])
-            in_progress = len(df[df['status'] == 'In Progress'])
-            resolved = len(df[df['status'] == 'Resolved'])
-            
-            st.metric("📋 Total Queries", total)
-            st.metric("🔴 Open", open_count)
-            st.metric("🟡 In Progress", in_progress)
-            st.metric("🟢 Resolved", resolved)
+        if summary['Total']:
+            st.metric("📋 Total Queries", summary['Total'])
+            st.metric("🔴 Open", summary['Open'])
+            st.metric("🟡 In Progress", summary['In Progress'])
+            st.metric("🟢 Resolved", summary['Resolved'])
         else:
             st.info("No queries yet.\nSubmit your first query!")
     except Exception as e:
@@ -113,53 +108,60 @@ st.markdown("---")
 st.subheader("📂 Your Submitted Queries")
 
 try:
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT query_id, mail_id, mobile_number, query_heading, 
-               query_description, status, priority, query_created_time,
-               query_closed_time, assigned_to
-        FROM client_queries 
-        WHERE client_name=?
-        ORDER BY query_created_time DESC
-    """, (st.session_state.username,))
-    
-    data = cursor.fetchall()
-    cursor.close()
-    db.close()
+    client_filter = QueryFilter(client_name=st.session_state.username)
+    client_status_counts = repository.status_breakdown(client_filter)
+    total_queries = sum(client_status_counts.values())
     
-    if data:
-        df = pd.DataFrame(data, columns=[
-            'query_id', 'mail_id', 'mobile_number', 'query_heading', 
-            'query_description', 'status', 'priority', 'query_created_time',
-            'query_closed_time', 'assigned_to'
-        ])
-        
+    if total_queries:
         # Filters
         col1, col2 = st.columns(2)
         with col1:
-            status_options = df['status'].unique().tolist()
+            status_options = list(client_status_counts)
             status_filter = st.multiselect(
                 "🔍 Filter by Status",
                 status_options,
                 default=status_options
             )
         with col2:
-            priority_options = df['priority'].unique().tolist()
+            priority_options = list(repository.priority_breakdown(client_filter))
             priority_filter = st.multiselect(
                 "⚡ Filter by Priority",
                 priority_options,
                 default=priority_options
             )
         
-        filtered_df = df
-        if status_filter:
-            filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
-        if priority_filter:
-            filtered_df = filtered_df[filtered_df['priority'].isin(priority_filter)]
+        created_from, created_to = timestamps.picked_range(
+            st.date_input("📅 Created between", value=(), key="client_created_range")
+        )
+        
+        filters = QueryFilter(
+            client_name=st.session_state.username,
+            statuses=tuple(status_filter),
+            priorities=tuple(priority_filter),
+            created_from=created_from,
+            created_to=created_to
+        )
+        by_status = repository.status_breakdown(filters)
+        filtered_total = sum(by_status.values())
+        
+        # Keyset pagination: a stack of page cursors, reset when filters change
+        if st.session_state.get("client_filter_key") != filters.key():
+            st.session_state.client_filter_key = filters.key()
+            st.session_state.client_cursors = [None]
+        cursors = st.session_state.client_cursors
+        # The page is patched from the change feed on a timer instead of being re-queried
+        view = get_view(st.session_state, "client_view", filters, PAGE_SIZE, cursors[-1])
+        tickets, next_cursor = view.tickets, view.next_cursor
+        
+        @st.fragment(run_every=REFRESH_SECONDS if st.session_state.get("client_live", True) else None)
+        def watch_changes():
+            if st.session_state.client_view.refresh():
+                st.rerun()
+        
+        watch_changes()
         
-        if len(filtered_df) > 0:
-            st.write(f"**Showing {len(filtered_df)} of {len(df)} queries**")
+        if filtered_total > 0:
+            st.write(f"**Showing {filtered_total} of {total_queries} queries**")
             
             # Show pie chart and table
             col1, col2 = st.columns([1, 2])
@@ -167,24 +169,24 @@ try:
             with col1:
                 st.markdown("**📊 Status Distribution**")
                 try:
-                    import plotly.express as px
-                    status_counts = filtered_df['status'].value_counts()
-                    fig = px.pie(
-                        values=status_counts.values,
-                        names=status_counts.index,
-                        color=status_counts.index,
-                        color_discrete_map={
-                            'Open': '#ff4b4b',
-                            'In Progress': '#ffa500',
-                            'Resolved': '#00cc00'
-                        }
-                    )
-                    fig.update_traces(textposition='inside', textinfo='percent+label')
+                    px = startup.lazy_import("plotly.express")
+                    with instrumentation.timer("chart_build_seconds", chart="client_status_pie"):
+                        fig = px.pie(
+                            values=list(by_status.values()),
+                            names=list(by_status.keys()),
+                            color=list(by_status.keys()),
+                            color_discrete_map={
+                                'Open': '#ff4b4b',
+                                'In Progress': '#ffa500',
+                                'Resolved': '#00cc00'
+                            }
+                        )
+                        fig.update_traces(textposition='inside', textinfo='percent+label')
                     st.plotly_chart(fig, use_container_width=True)
                     
                     # Show counts
-                    for status, count in status_counts.items():
-                        pct = (count/len(filtered_df))*100
+                    for status, count in by_status.items():
+                        pct = (count/filtered_total)*100
                         if status == 'Open':
                             st.markdown(f"🔴 **Open:** {count} ({pct:.1f}%)")
                         elif status == 'Resolved':
@@ -193,44 +195,61 @@ try:
                             st.markdown(f"🟡 **In Progress:** {count} ({pct:.1f}%)")
                 except:
                     # If plotly doesn't work, show simple counts
-                    status_counts = filtered_df['status'].value_counts()
-                    for status, count in status_counts.items():
+                    for status, count in by_status.items():
                         st.write(f"**{status}:** {count}")
             
             with col2:
-                # Display table
-                display_df = filtered_df[['query_id', 'mail_id', 'query_heading', 
-                                         'status', 'priority', 'query_created_time']].copy()
+                # Display table (only the rows on this page become a DataFrame)
+                display_df = repository.to_frame(tickets, [
+                    'query_id', 'mail_id', 'query_heading',
+                    'status', 'priority', 'query_created_time'
+                ])
                 st.dataframe(display_df, use_container_width=True, hide_index=True)
+                
+                page_no = len(cursors)
+                nav1, nav2, nav3 = st.columns([1, 1, 2])
+                with nav1:
+                    if st.button("⬅️ Previous", disabled=page_no == 1, use_container_width=True):
+                        cursors.pop()
+                        st.rerun()
+                with nav2:
+                    if st.button("Next ➡️", disabled=next_cursor is None, use_container_width=True):
+                        cursors.append(next_cursor)
+                        st.rerun()
+                with nav3:
+                    st.caption(f"Page {page_no}")
+                    st.toggle("🔄 Live updates", value=True, key="client_live")
             
             # View details
             st.markdown("---")
             st.subheader("🔍 View Query Details")
             
-            query_ids = filtered_df['query_id'].tolist()
+            query_ids = [t.query_id for t in tickets]
             if query_ids:
                 selected_id = st.selectbox("Select Query ID to view details:", query_ids)
                 
                 if selected_id:
-                    row = filtered_df[filtered_df['query_id'] == selected_id].iloc[0]
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write(f"**Query ID:** {row['query_id']}")
-                        st.write(f"**Email:** {row['mail_id']}")
-                        st.write(f"**Mobile:** {row['mobile_number']}")
-                        st.write(f"**Status:** {row['status']}")
-                        st.write(f"**Priority:** {row['priority']}")
+                    row = repository.get_query(selected_id)
+                    if row:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.write(f"**Query ID:** {row.query_id}")
+                            st.write(f"**Email:** {row.mail_id}")
+                            st.write(f"**Mobile:** {row.mobile_number}")
+                            st.write(f"**Status:** {row.status}")
+                            st.write(f"**Priority:** {row.priority}")
                     
-                    with col2:
-                        st.write(f"**Created:** {row['query_created_time']}")
-                        if pd.notna(row['query_closed_time']):
-                            st.write(f"**Closed:** {row['query_closed_time']}")
-                        if pd.notna(row['assigned_to']):
-                            st.write(f"**Assigned To:** {row['assigned_to']}")
+                        with col2:
+                            st.write(f"**Created:** {row.query_created_time}")
+                            if row.query_closed_time:
+                                st.write(f"**Closed:** {row.query_closed_time}")
+                            if row.assigned_to:
+                                st.write(f"**Assigned To:** {row.assigned_to}")
                     
-                    st.info(f"**Query Heading:**\n{row['query_heading']}")
-                    st.text_area("**Query Description:**", row['query_description'], height=100, disabled=True, key=f"desc_{selected_id}")
+                        st.info(f"**Query Heading:**\n{row.query_heading}")
+                        st.text_area("**Query Description:**", row.query_description, height=100, disabled=True, key=f"desc_{selected_id}")
+                    else:
+                        st.info("ℹ️ This query is no longer available; it may have been archived.")
         else:
             st.info("No queries match the selected filters")
     else:
@@ -245,26 +264,35 @@ st.write("Below is a sample dataset of client queries:")
 
 try:
     csv_path = os.path.join(parent_dir, "synthetic_client_queries.csv")
-    df_synthetic = pd.read_csv(csv_path)
+    summary = csv_loader.status_summary(csv_path)
+    df_synthetic = csv_loader.preview(csv_path)
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("📋 Total Queries", len(df_synthetic))
+        st.metric("📋 Total Queries", summary['Total'])
     with col2:
-        st.metric("✅ Closed", len(df_synthetic[df_synthetic['status'] == 'Closed']))
+        st.metric("✅ Closed", summary['Closed'])
     with col3:
-        st.metric("🔴 Open", len(df_synthetic[df_synthetic['status'] == 'Open']))
+        st.metric("🔴 Open", summary['Open'])
     
     st.write("")
     
+    if summary['Total'] > len(df_synthetic):
+        st.caption(f"Showing the first {len(df_synthetic):,} of {summary['Total']:,} rows")
     st.dataframe(df_synthetic, use_container_width=True, hide_index=True)
     
-    st.download_button(
-        label="📥 Download CSV",
-        data=df_synthetic.to_csv(index=False),
-        file_name="client_queries.csv",
-        mime="text/csv"
-    )
+    csv_bytes = csv_loader.download_bytes(csv_path)
+    if csv_bytes is not None:
+        st.download_button(
+            label="📥 Download CSV",
+            data=csv_bytes,
+            file_name="client_queries.csv",
+            mime="text/csv"
+        )
+    else:
+        st.caption("📥 The file is too large to download from the browser.")
     
 except Exception as e:
-    st.error(f"❌ Error loading synthetic queries: {str(e)}")
\ No newline at end of file
+    st.error(f"❌ Error loading synthetic queries: {str(e)}")
+
+render.stop()
@@ -1,17 +1,29 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
 import sys
 import os
+from datetime import date
 
 # Add parent directory to path
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from db_connection import get_db
+from query_builder import QueryFilter, DISPLAY_COLUMNS
+import repository
+import write_queue
+import instrumentation
+import startup
+from live_view import REFRESH_SECONDS, get_view
+from sla import format_duration
+import timestamps
+from auth_service import service as auth
 
 st.set_page_config(page_title="Support Page", page_icon="🎧", layout="wide")
+startup.ensure_started()
+
+PAGE_SIZE = 50
+
+render = instrumentation.start("page_render_seconds", page="support")
 
 # Check login
 if "logged_in" not in st.session_state:
@@ -19,7 +31,7 @@ if "logged_in" not in st.session_state:
     st.info("👉 Go back to the main page to login")
     st.stop()
 
-if not st.session_state.logged_in:
+if not st.session_state.logged_in or auth.validate(st.session_state.get("auth_token")) is None:
     st.warning("⚠️ You are not logged in!")
     st.info("👉 Go back to the main page to login")
     st.stop()
@@ -32,40 +44,28 @@ else:
 st.write(f"**Welcome, {st.session_state.username}!** 👋")
 st.markdown("---")
 
-# Get all queries
+# Metrics and chart data are aggregated in SQL
 try:
-    db = get_db()
-    cursor = db.cursor()
-    cursor.execute("""
-        SELECT query_id, client_name, mail_id, mobile_number, query_heading,
-               query_description, status, priority, query_created_time,
-               query_closed_time, assigned_to
-        FROM client_queries
-        ORDER BY query_created_time DESC
-    """)
-    data = cursor.fetchall()
-    cursor.close()
-    db.close()
+    include_archive = st.toggle(
+        "🗄️ Include archived tickets in metrics and search", key="include_archive"
+    )
+    scope = QueryFilter(include_archive=True) if include_archive else None
+    summary = repository.summary(scope)
+    by_status = repository.status_breakdown(scope)
     
-    if data:
-        df = pd.DataFrame(data, columns=[
-            'query_id', 'client_name', 'mail_id', 'mobile_number', 'query_heading',
-            'query_description', 'status', 'priority', 'query_created_time',
-            'query_closed_time', 'assigned_to'
-        ])
-        
+    if summary['Total']:
         # System Metrics
         st.subheader("📊 System Metrics")
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("📋 Total Queries", len(df))
+            st.metric("📋 Total Queries", summary['Total'])
         with col2:
-            st.metric("🔴 Open", len(df[df['status'] == 'Open']))
+            st.metric("🔴 Open", summary['Open'])
         with col3:
-            st.metric("🟡 In Progress", len(df[df['status'] == 'In Progress']))
+            st.metric("🟡 In Progress", summary['In Progress'])
         with col4:
-            st.metric("🟢 Resolved", len(df[df['status'] == 'Resolved']))
+            st.metric("🟢 Resolved", summary['Resolved'])
         
         st.markdown("---")
         
@@ -77,41 +77,125 @@ try:
         with col1:
             st.markdown("**📊 Queries by Status**")
             try:
-                import plotly.express as px
-                status_counts = df['status'].value_counts()
-                fig = px.pie(
-                    values=status_counts.values,
-                    names=status_counts.index,
-                    color=status_counts.index,
-                    color_discrete_map={
-                        'Open': '#ff4b4b',
-                        'In Progress': '#ffa500',
-                        'Resolved': '#00cc00'
-                    }
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label')
+                px = startup.lazy_import("plotly.express")
+                with instrumentation.timer("chart_build_seconds", chart="support_status_pie"):
+                    fig = px.pie(
+                        values=list(by_status.values()),
+                        names=list(by_status.keys()),
+                        color=list(by_status.keys()),
+                        color_discrete_map={
+                            'Open': '#ff4b4b',
+                            'In Progress': '#ffa500',
+                            'Resolved': '#00cc00'
+                        }
+                    )
+                    fig.update_traces(textposition='inside', textinfo='percent+label')
                 st.plotly_chart(fig, use_container_width=True)
             except:
-                status_counts = df['status'].value_counts()
-                for status, count in status_counts.items():
+                for status, count in by_status.items():
                     st.write(f"**{status}:** {count}")
         
         with col2:
             st.markdown("**📅 Queries Over Time**")
+            granularity = st.radio(
+                "Granularity", ["Day", "Week", "Month"], horizontal=True,
+                key="trend_granularity", label_visibility="collapsed"
+            ).lower()
+            full_range = repository.trend(granularity)
+            if full_range:
+                first = date.fromisoformat(full_range[0][0])
+                last = date.fromisoformat(full_range[-1][0])
+                zoom = st.date_input(
+                    "Date range", value=(first, last), min_value=first, key="trend_range"
+                )
+                trend = repository.trend(granularity, *timestamps.picked_range(zoom))
+            else:
+                trend = []
+            pd = startup.lazy_import("pandas")
+            trend_frame = pd.DataFrame(
+                trend, columns=['date', 'Created', 'Resolved', 'Open at end']
+            ).set_index('date')
             try:
-                import plotly.express as px
-                df['date'] = pd.to_datetime(df['query_created_time']).dt.date
-                date_counts = df.groupby('date').size().reset_index(name='count')
-                fig = px.line(date_counts, x='date', y='count', markers=True)
-                fig.update_layout(showlegend=False)
+                px = startup.lazy_import("plotly.express")
+                with instrumentation.timer("chart_build_seconds", chart="support_trend"):
+                    fig = px.line(trend_frame, markers=True)
+                    fig.update_layout(legend_title_text=None, yaxis_title=None)
                 st.plotly_chart(fig, use_container_width=True)
             except:
-                df['date'] = pd.to_datetime(df['query_created_time']).dt.date
-                date_counts = df.groupby('date').size()
-                st.bar_chart(date_counts)
+                st.line_chart(trend_frame)
         
+        # Resolution times and SLA breaches
+        with st.expander("⏱️ Resolution Times & SLA"):
+            sla = repository.sla(scope)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**By Priority**")
+                st.dataframe(pd.DataFrame([
+                    {'Priority': priority, 'Resolved': stats['count'],
+                     **{name.upper(): format_duration(value)
+                        for name, value in stats.items() if name != 'count'}}
+                    for priority, stats in sla['by_priority'].items()
+                ]), hide_index=True, use_container_width=True)
+            with col2:
+                st.markdown("**By Assignee**")
+                st.dataframe(pd.DataFrame([
+                    {'Assignee': assignee or 'Unassigned', 'Resolved': stats['count'],
+                     **{name.upper(): format_duration(value)
+                        for name, value in stats.items() if name != 'count'}}
+                    for assignee, stats in sla['by_assignee'].items()
+                ]), hide_index=True, use_container_width=True)
+            
+            st.markdown("**📦 Open Ticket Age**")
+            st.bar_chart(pd.Series(sla['aging'], name='Open tickets'))
+            
+            st.markdown("**🚨 SLA Breaches**")
+            cols = st.columns(len(sla['breaches']))
+            for col, (priority, stats) in zip(cols, sla['breaches'].items()):
+                with col:
+                    st.metric(
+                        f"{priority} (target {stats['target_hours']}h)",
+                        f"{stats['open_breached']} open past due",
+                        f"{stats['resolved_late']}/{stats['resolved']} resolved late",
+                        delta_color="off"
+                    )
+            breaches = repository.sla_breaches(limit=20)
+            if breaches:
+                st.dataframe(pd.DataFrame(breaches, columns=[
+                    'query_id', 'client_name', 'priority', 'status',
+                    'query_created_time', 'assigned_to'
+                ]), hide_index=True, use_container_width=True)
+
         st.markdown("---")
-        
+
+        # My Queue: this agent's open tickets, read from the assignee index
+        if st.session_state.role == "Support":
+            st.subheader("📥 My Queue")
+            my_tickets, _ = repository.my_queue(st.session_state.username, PAGE_SIZE)
+            if my_tickets:
+                st.dataframe(
+                    repository.to_frame(my_tickets, DISPLAY_COLUMNS),
+                    use_container_width=True, hide_index=True
+                )
+            else:
+                st.info("ℹ️ No open tickets are assigned to you.")
+
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                if st.button("⚖️ Auto-assign unassigned", use_container_width=True):
+                    try:
+                        assigned = repository.auto_assign()
+                        st.success(f"✅ Assigned {assigned} tickets")
+                    except Exception as e:
+                        st.error(f"❌ Error assigning tickets: {str(e)}")
+            with col2:
+                workloads = repository.agent_workloads()
+                if workloads:
+                    st.caption("Weighted open workload: " + ", ".join(
+                        f"{agent} {load}" for agent, load in sorted(workloads.items())
+                    ))
+
+            st.markdown("---")
+
         # Manage Queries
         st.subheader("📂 Manage Queries")
         
@@ -131,26 +215,155 @@ try:
             )
         with col3:
             search_text = st.text_input("🔎 Search")
+        created_from, created_to = timestamps.picked_range(
+            st.date_input("📅 Created between", value=(), key="support_created_range")
+        )
+        
+        filters = QueryFilter(
+            status=status_filter,
+            # Every priority selected is no filter: counts come from the counters
+            priorities=() if set(priority_filter) == {'Low', 'Medium', 'High'} else tuple(priority_filter),
+            search=search_text.strip(),
+            created_from=created_from,
+            created_to=created_to
+        )
+        
+        # Keyset pagination: a stack of page cursors, reset when filters change
+        if st.session_state.get("support_filter_key") != filters.key():
+            st.session_state.support_filter_key = filters.key()
+            st.session_state.support_cursors = [None]
+        cursors = st.session_state.support_cursors
+        
+        matching = repository.count_queries(filters)
+        # The page is patched from the change feed on a timer instead of being re-queried
+        view = get_view(st.session_state, "support_view", filters, PAGE_SIZE, cursors[-1])
+        tickets, next_cursor = view.tickets, view.next_cursor
+        
+        @st.fragment(run_every=REFRESH_SECONDS if st.session_state.get("support_live", True) else None)
+        def watch_changes():
+            if st.session_state.support_view.refresh():
+                st.rerun()
+        
+        watch_changes()
+        
+        if filters.search:
+            best = repository.search_queries(
+                filters.search, limit=5, include_archive=include_archive
+            )
+            if best:
+                with st.expander("🔎 Best matches", expanded=True):
+                    for hit in best:
+                        archived = " · 🗄️ archived" if hit['archived'] else ""
+                        st.markdown(
+                            f"**#{hit['query_id']}** · {hit['status']} · {hit['priority']}"
+                            f"{archived} — {hit['snippet']}"
+                        )
         
-        # Apply filters
-        filtered_df = df.copy()
-        if status_filter != 'All':
-            filtered_df = filtered_df[filtered_df['status'] == status_filter]
-        if priority_filter:
-            filtered_df = filtered_df[filtered_df['priority'].isin(priority_filter)]
-        if search_text:
-            filtered_df = filtered_df[
-                filtered_df['query_heading'].str.contains(search_text, case=False, na=False) |
-                filtered_df['mail_id'].str.contains(search_text, case=False, na=False)
-            ]
-        
-        st.write(f"**Showing {len(filtered_df)} of {len(df)} queries**")
-        
-        if len(filtered_df) > 0:
-            # Display table
-            display_df = filtered_df[['query_id', 'client_name', 'mail_id', 'query_heading', 
-                                     'status', 'priority', 'query_created_time']].copy()
-            st.dataframe(display_df, use_container_width=True, hide_index=True)
+        page_no = len(cursors)
+        info, live = st.columns([4, 1])
+        with info:
+            st.write(f"**Showing {len(tickets)} of {matching} matching queries "
+                     f"({summary['Total']} total) — page {page_no}**")
+        with live:
+            st.toggle("🔄 Live updates", value=True, key="support_live")
+        
+        if tickets:
+            # Display table (select rows for bulk actions)
+            display_df = repository.to_frame(tickets, DISPLAY_COLUMNS + ['assigned_to'])
+            table = st.dataframe(
+                display_df, use_container_width=True, hide_index=True,
+                on_select="rerun", selection_mode="multi-row", key="support_table"
+            )
+            selected = [tickets[i] for i in table.selection.rows if i < len(tickets)]
+            
+            col1, col2, col3 = st.columns([1, 1, 4])
+            with col1:
+                if st.button("⬅️ Previous", disabled=page_no == 1, use_container_width=True):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                if st.button("Next ➡️", disabled=next_cursor is None, use_container_width=True):
+                    cursors.append(next_cursor)
+                    st.rerun()
+            
+            # Bulk actions on the selected rows
+            st.markdown("---")
+            st.subheader("🧰 Bulk Update")
+            st.write(f"**{len(selected)} selected** — tick rows in the table above")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                bulk_status = st.selectbox(
+                    "Set Status", ['(unchanged)', 'Open', 'In Progress', 'Resolved'],
+                    key="bulk_status"
+                )
+            with col2:
+                bulk_assignee = st.selectbox(
+                    "Assign To", ['(unchanged)', '(unassigned)'] + repository.list_support_agents(),
+                    key="bulk_assignee"
+                )
+            with col3:
+                st.write("")
+                st.write("")
+                if st.button("✅ Apply to Selected", disabled=not selected, use_container_width=True):
+                    changes = {}
+                    if bulk_status != '(unchanged)':
+                        changes['status'] = bulk_status
+                    if bulk_assignee != '(unchanged)':
+                        changes['assigned_to'] = None if bulk_assignee == '(unassigned)' else bulk_assignee
+                    if not changes:
+                        st.warning("⚠️ Choose a status or an assignee to apply.")
+                    else:
+                        try:
+                            result = write_queue.bulk_update(
+                                {t.query_id: t.version for t in selected}, **changes
+                            )
+                            st.success(f"✅ Updated {result.updated} of {result.requested} queries")
+                            if result.conflicts:
+                                st.warning(
+                                    "⚠️ Skipped queries changed by someone else since this page loaded: "
+                                    + ", ".join(str(i) for i in result.conflicts)
+                                )
+                        except write_queue.WriteQueueFull:
+                            st.warning("⏳ Too many pending updates right now. Please try again in a moment.")
+                        except Exception as e:
+                            st.error(f"❌ Error updating queries: {str(e)}")
+            
+            # View details (description is loaded only for the selected ticket)
+            st.markdown("---")
+            st.subheader("🔍 View Query Details")
+            
+            page_ids = [t.query_id for t in tickets]
+            selected_id = st.selectbox("Select Query ID to view details:", page_ids)
+            if selected_id:
+                detail = repository.get_query(selected_id)
+                if detail:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write(f"**Query ID:** {detail.query_id}")
+                        st.write(f"**Client:** {detail.client_name}")
+                        st.write(f"**Email:** {detail.mail_id}")
+                        st.write(f"**Mobile:** {detail.mobile_number}")
+                        st.write(f"**Status:** {detail.status}")
+                        st.write(f"**Priority:** {detail.priority}")
+                    with col2:
+                        st.write(f"**Created:** {detail.query_created_time}")
+                        if detail.query_closed_time:
+                            st.write(f"**Closed:** {detail.query_closed_time}")
+                        if detail.assigned_to:
+                            st.write(f"**Assigned To:** {detail.assigned_to}")
+                    
+                    st.info(f"**Query Heading:**\n{detail.query_heading}")
+                    st.text_area("**Query Description:**", detail.query_description, height=100, disabled=True, key=f"support_desc_{selected_id}")
+                    
+                    duplicates = repository.duplicates_of(selected_id)
+                    if duplicates:
+                        with st.expander(f"🔁 Possible duplicates ({len(duplicates)})"):
+                            for hit in duplicates:
+                                st.markdown(
+                                    f"**#{hit['query_id']}** · {hit['client_name']} · {hit['status']} · "
+                                    f"{hit['heading']} — {hit['score']:.0%} similar"
+                                )
             
             st.markdown("---")
             
@@ -164,7 +377,7 @@ try:
                     "Enter Query ID to Update",
                     min_value=1,
                     step=1,
-                    value=int(filtered_df['query_id'].iloc[0]) if len(filtered_df) > 0 else 1
+                    value=int(tickets[0].query_id)
                 )
             
             with col2:
@@ -177,36 +390,15 @@ try:
                 st.write("")
                 st.write("")
                 if st.button("✅ Update Query", use_container_width=True):
-                    if query_id_update in filtered_df['query_id'].values:
-                        try:
-                            db = get_db()
-                            cursor = db.cursor()
-                            
-                            if new_status == 'Resolved':
-                                now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                                cursor.execute("""
-                                    UPDATE client_queries 
-                                    SET status = ?, query_closed_time = ?
-                                    WHERE query_id = ?
-                                """, (new_status, now, query_id_update))
-                            else:
-                                cursor.execute("""
-                                    UPDATE client_queries 
-                                    SET status = ?
-                                    WHERE query_id = ?
-                                """, (new_status, query_id_update))
-                            
-                            db.commit()
+                    try:
+                        if write_queue.update_status(int(query_id_update), new_status, filters):
                             st.success(f"✅ Query {query_id_update} updated to {new_status}!")
-                        except Exception as e:
-                            st.error(f"❌ Error updating query: {str(e)}")
-                        finally:
-                            if cursor:
-                                cursor.close()
-                            if db:
-                                db.close()
-                    else:
-                        st.error("❌ Query ID not found in filtered results!")
+                        else:
+                            st.error("❌ Query ID not found in filtered results!")
+                    except write_queue.WriteQueueFull:
+                        st.warning("⏳ Too many pending updates right now. Please try again in a moment.")
+                    except Exception as e:
+                        st.error(f"❌ Error updating query: {str(e)}")
         else:
             st.info("ℹ️ No queries match the selected filters.")
     else:
@@ -214,3 +406,5 @@ try:
 
 except Exception as e:
     st.error(f"❌ Error loading queries: {str(e)}")
+
+render.stop()
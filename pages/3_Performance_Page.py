@@ -0,0 +1,140 @@
+import streamlit as st
+import sys
+import os
+import time
+from datetime import datetime
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import instrumentation
+import startup
+import db_connection
+from query_cache import cache
+from auth_service import service as auth, is_admin
+from write_queue import writer
+
+st.set_page_config(page_title="Performance", page_icon="⏱️", layout="wide")
+startup.ensure_started()
+
+# Admins only
+if "logged_in" not in st.session_state:
+    st.warning("⚠️ Please login first from the main page!")
+    st.info("👉 Go back to the main page to login")
+    st.stop()
+
+user = auth.validate(st.session_state.get("auth_token")) if st.session_state.logged_in else None
+if user is None:
+    st.warning("⚠️ You are not logged in!")
+    st.info("👉 Go back to the main page to login")
+    st.stop()
+
+if not is_admin(user):
+    st.error("🚫 Access Denied! This page is only for administrators.")
+    st.stop()
+
+registry = instrumentation.registry
+pd = startup.lazy_import("pandas")
+
+st.title("⏱️ Performance")
+uptime = time.time() - registry.started
+st.caption(f"In-process metrics for this server, collected over the last {uptime / 60:.0f} minutes")
+
+col1, col2, col3 = st.columns([1, 1, 4])
+with col1:
+    if st.button("🔄 Refresh", use_container_width=True):
+        st.rerun()
+with col2:
+    if st.button("🧹 Reset", use_container_width=True):
+        registry.reset()
+        st.rerun()
+with col3:
+    st.download_button(
+        "📥 Download OpenMetrics",
+        data=registry.to_openmetrics(),
+        file_name="metrics.txt",
+        mime="text/plain"
+    )
+
+st.markdown("---")
+
+histograms = registry.histograms()
+
+def timings_frame(rows, label):
+    return pd.DataFrame([
+        {
+            label: labels.get(label.lower(), ''),
+            'Calls': count,
+            'Total (s)': round(total, 3),
+            'Avg (ms)': round(avg * 1000, 2),
+            'p50 (ms)': round(p50 * 1000, 2),
+            'p95 (ms)': round(p95 * 1000, 2),
+            'Max (ms)': round(peak * 1000, 2),
+        }
+        for name, labels, count, total, avg, p50, p95, peak in rows
+    ])
+
+# Page renders
+st.subheader("🖥️ Page Render Times")
+pages = [row for row in histograms if row[0] == "page_render_seconds"]
+if pages:
+    st.dataframe(timings_frame(pages, 'Page'), hide_index=True, use_container_width=True)
+else:
+    st.info("ℹ️ No pages rendered yet.")
+
+# Slowest individual statements
+st.subheader("🐢 Slowest Queries")
+st.caption("Time spent in SQLite from execute until the last row was fetched.")
+slowest = registry.slowest(20)
+if slowest:
+    st.dataframe(pd.DataFrame([
+        {
+            'Time (ms)': round(seconds * 1000, 2),
+            'At': datetime.fromtimestamp(at).strftime('%H:%M:%S'),
+            'SQL': labels.get('sql', ''),
+        }
+        for seconds, name, labels, at in slowest
+    ]), hide_index=True, use_container_width=True)
+else:
+    st.info("ℹ️ No queries recorded yet.")
+
+# Statements by total time
+st.subheader("🗄️ Queries by Total Time")
+queries = [row for row in histograms if row[0] == "db_query_seconds"]
+if queries:
+    st.dataframe(timings_frame(queries[:50], 'SQL'), hide_index=True, use_container_width=True)
+
+# Everything else: connections, cached loads, DataFrames, charts, CSV
+st.subheader("🧩 Other Timings")
+other = [row for row in histograms if row[0] not in ("page_render_seconds", "db_query_seconds")]
+if other:
+    st.dataframe(pd.DataFrame([
+        {
+            'Metric': name,
+            'Labels': ", ".join(f"{k}={v}" for k, v in labels.items()),
+            'Calls': count,
+            'Total (s)': round(total, 3),
+            'Avg (ms)': round(avg * 1000, 2),
+            'p95 (ms)': round(p95 * 1000, 2),
+            'Max (ms)': round(peak * 1000, 2),
+        }
+        for name, labels, count, total, avg, p50, p95, peak in other
+    ]), hide_index=True, use_container_width=True)
+
+# Subsystem counters
+st.subheader("📊 Subsystems")
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.markdown("**Connection Pool**")
+    st.json(db_connection.get_pool().stats())
+with col2:
+    st.markdown("**Query Cache**")
+    st.json(cache.stats())
+with col3:
+    st.markdown("**Write Queue**")
+    st.json(writer.stats())
+with col4:
+    st.markdown("**Auth**")
+    st.json(auth.stats())
@@ -0,0 +1,206 @@
+"""Salted, tunable password hashing with transparent upgrades.
+
+Stored hashes carry their algorithm and cost, so the configured hasher can
+change (or its cost go up) without invalidating existing accounts:
+
+    scrypt$16384$8$1$<salt>$<hash>
+    pbkdf2_sha256$600000$<salt>$<hash>
+    <64 hex chars>                      legacy unsalted SHA-256 (verify only)
+
+After a successful login, repository.authenticate() calls needs_rehash()
+and stores a fresh hash if the stored one is legacy or uses another cost.
+Unknown usernames are checked against dummy_hash(), so they take as long
+to reject as a wrong password.
+
+Verification is CPU-bound and deliberately slow, so it runs in a small
+thread pool (hashlib releases the GIL) with a cap on queued work:
+a burst of logins costs at most MAX_WORKERS cores and fails fast with
+PasswordServiceBusy instead of piling up behind the Streamlit script thread.
+
+Configure with PASSWORD_HASHER (scrypt | pbkdf2_sha256), PASSWORD_SCRYPT_N
+and PASSWORD_PBKDF2_ITERATIONS.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+MAX_WORKERS = int(os.environ.get("PASSWORD_MAX_WORKERS", "4"))
+MAX_PENDING = int(os.environ.get("PASSWORD_MAX_PENDING", "64"))
+VERIFY_TIMEOUT = 10.0
+
+
+class PasswordServiceBusy(RuntimeError):
+    """Raised when too many verifications are already queued"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class ScryptHasher:
+    algorithm = 'scrypt'
+
+    def __init__(self, n=2 ** 14, r=8, p=1):
+        self.n, self.r, self.p = n, r, p
+
+    def _derive(self, password, salt, n, r, p):
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=n * r * 256 + 1024 * 1024, dklen=KEY_BYTES
+        )
+
+    def encode(self, password):
+        salt = os.urandom(SALT_BYTES)
+        key = self._derive(password, salt, self.n, self.r, self.p)
+        return f"{self.algorithm}${self.n}${self.r}${self.p}${_b64(salt)}${_b64(key)}"
+
+    def verify(self, password, encoded):
+        _, n, r, p, salt, key = encoded.split('$')
+        derived = self._derive(password, _unb64(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(derived, _unb64(key))
+
+    def is_current(self, encoded):
+        parts = encoded.split('$')
+        return parts[0] == self.algorithm and parts[1:4] == [str(self.n), str(self.r), str(self.p)]
+
+
+class PBKDF2Hasher:
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=600000):
+        self.iterations = iterations
+
+    def encode(self, password):
+        salt = os.urandom(SALT_BYTES)
+        key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, self.iterations, KEY_BYTES)
+        return f"{self.algorithm}${self.iterations}${_b64(salt)}${_b64(key)}"
+
+    def verify(self, password, encoded):
+        _, iterations, salt, key = encoded.split('$')
+        expected = _unb64(key)
+        derived = hashlib.pbkdf2_hmac(
+            'sha256', password.encode(), _unb64(salt), int(iterations), len(expected)
+        )
+        return hmac.compare_digest(derived, expected)
+
+    def is_current(self, encoded):
+        parts = encoded.split('$')
+        return parts[0] == self.algorithm and parts[1] == str(self.iterations)
+
+
+class LegacySHA256Hasher:
+    """The original unsalted hash; only used to verify and then upgrade"""
+    algorithm = 'sha256'
+
+    def verify(self, password, encoded):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), encoded)
+
+
+HASHERS = {
+    ScryptHasher.algorithm: ScryptHasher,
+    PBKDF2Hasher.algorithm: PBKDF2Hasher,
+}
+
+
+def default_hasher():
+    name = os.environ.get("PASSWORD_HASHER", "scrypt")
+    if name == ScryptHasher.algorithm and not hasattr(hashlib, 'scrypt'):
+        name = PBKDF2Hasher.algorithm
+    if name == ScryptHasher.algorithm:
+        return ScryptHasher(n=int(os.environ.get("PASSWORD_SCRYPT_N", str(2 ** 14))))
+    if name == PBKDF2Hasher.algorithm:
+        return PBKDF2Hasher(int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", "600000")))
+    raise ValueError(f"Unknown PASSWORD_HASHER: {name}")
+
+
+hasher = default_hasher()
+
+
+def _hasher_for(encoded):
+    if '$' not in encoded:
+        return LegacySHA256Hasher()
+    algorithm = encoded.split('$', 1)[0]
+    if algorithm == hasher.algorithm:
+        return hasher
+    if algorithm in HASHERS:
+        return HASHERS[algorithm]()
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+
+def hash_password(password):
+    """Hash a password with the configured hasher and a fresh salt"""
+    return hasher.encode(password)
+
+
+def verify_password(password, encoded):
+    """Check a password against any supported stored hash"""
+    if not encoded:
+        return False
+    try:
+        return _hasher_for(encoded).verify(password, encoded)
+    except (ValueError, TypeError):
+        return False
+
+
+_dummy_hash = None
+
+
+def dummy_hash():
+    """A hash with the configured cost that no password is checked against in earnest.
+
+    Verifying it for unknown usernames makes a failed login cost the same
+    whether or not the user exists.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(_b64(os.urandom(SALT_BYTES)))
+    return _dummy_hash
+
+
+def needs_rehash(encoded):
+    """True if the stored hash is legacy or uses a different algorithm/cost"""
+    return not hasher.is_current(encoded)
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="pwhash")
+_pending = threading.BoundedSemaphore(MAX_PENDING)
+
+
+def _run_bounded(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise PasswordServiceBusy("Too many password checks in progress")
+    try:
+        future = _executor.submit(fn, *args)
+    except Exception:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+def verify_password_async(password, encoded):
+    """Submit verify_password to the hashing pool; returns a Future[bool]"""
+    return _run_bounded(verify_password, password, encoded)
+
+
+def hash_password_async(password):
+    return _run_bounded(hash_password, password)
+
+
+def verify_in_pool(password, encoded, timeout=VERIFY_TIMEOUT):
+    """verify_password on the hashing pool, waiting up to timeout seconds"""
+    return verify_password_async(password, encoded).result(timeout)
+
+
+def hash_in_pool(password, timeout=VERIFY_TIMEOUT):
+    return hash_password_async(password).result(timeout)
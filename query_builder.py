@@ -0,0 +1,197 @@
+"""Build parameterized, paginated SELECTs over client_queries.
+
+The Support page turns its status radio, priority multiselect and search box
+into a QueryFilter; this module renders that into a WHERE clause and fetches
+one page at a time using keyset pagination on (query_created_time, query_id),
+so deep pages cost the same as the first one. Multi-value filters are read
+as one ordered index range per value, merged by UNION ALL (page_legs).
+"""
+from dataclasses import dataclass, replace
+
+from search import match_expression
+import timestamps
+
+# Columns shown in the ticket tables (no query_description)
+DISPLAY_COLUMNS = [
+    'query_id', 'client_name', 'mail_id', 'query_heading',
+    'status', 'priority', 'query_created_time'
+]
+
+# Columns fetched for list pages: displayed ones plus what bulk edits need
+LIST_COLUMNS = DISPLAY_COLUMNS + ['assigned_to', 'version']
+
+DETAIL_COLUMNS = [
+    'query_id', 'client_name', 'mail_id', 'mobile_number', 'query_heading',
+    'query_description', 'status', 'priority', 'query_created_time',
+    'query_closed_time', 'assigned_to', 'version'
+]
+
+ORDER_BY = "ORDER BY query_created_time DESC, query_id DESC"
+
+HOT_TABLE = "client_queries"
+ARCHIVE_TABLE = "query_archive"
+
+
+@dataclass(frozen=True)
+class QueryFilter:
+    """Filters selected on a page; empty values mean 'no filter'"""
+    status: str = 'All'
+    statuses: tuple = ()
+    priorities: tuple = ()
+    search: str = ''
+    client_name: str = None
+    include_archive: bool = False  # counts and searches also cover query_archive
+    created_from: str = None  # inclusive 'YYYY-MM-DD' bounds on query_created_time
+    created_to: str = None
+    assigned_to: str = None  # one agent's queue
+
+    def key(self):
+        return (self.status, tuple(sorted(self.statuses)), tuple(sorted(self.priorities)),
+                self.search, self.client_name, self.include_archive,
+                self.created_from, self.created_to, self.assigned_to)
+
+    def tables(self):
+        """Ticket tables these filters cover: the hot one, plus the archive if asked"""
+        return (HOT_TABLE, ARCHIVE_TABLE) if self.include_archive else (HOT_TABLE,)
+
+
+def escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def build_where(filters, table=HOT_TABLE):
+    """Return (where_sql, params) for the given QueryFilter over table"""
+    clauses = []
+    params = []
+    # A client's tickets are few: a unary + keeps SQLite on the client index
+    # instead of walking every ticket with the selected status or priority
+    plus = "+" if filters.client_name is not None else ""
+    if filters.client_name is not None:
+        clauses.append("client_name = ?")
+        params.append(filters.client_name)
+    if filters.assigned_to is not None:
+        clauses.append("assigned_to = ?")
+        params.append(filters.assigned_to)
+    if filters.status and filters.status != 'All':
+        clauses.append(f"{plus}status = ?")
+        params.append(filters.status)
+    if filters.statuses:
+        clauses.append(f"{plus}status IN ({', '.join('?' * len(filters.statuses))})")
+        params.extend(filters.statuses)
+    if filters.priorities:
+        clauses.append(f"{plus}priority IN ({', '.join('?' * len(filters.priorities))})")
+        params.extend(filters.priorities)
+    if filters.created_from or filters.created_to:
+        # Canonical timestamps sort as text, so this is an index range scan
+        start, end = timestamps.day_range(filters.created_from, filters.created_to)
+        if start:
+            clauses.append("query_created_time >= ?")
+            params.append(start)
+        if end:
+            clauses.append("query_created_time < ?")
+            params.append(end)
+    if filters.search:
+        expression = match_expression(filters.search)
+        if expression is not None:
+            clauses.append(
+                f"query_id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)"
+            )
+            params.append(expression)
+        else:
+            # Punctuation-only input has no FTS tokens; fall back to a substring match
+            pattern = f"%{escape_like(filters.search)}%"
+            clauses.append("(query_heading LIKE ? ESCAPE '\\' OR mail_id LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def _statuses(filters):
+    if filters.statuses:
+        return tuple(filters.statuses)
+    return () if filters.status in (None, '', 'All') else (filters.status,)
+
+
+def page_legs(filters):
+    """Split IN-list filters into one QueryFilter per combination of values.
+
+    `priority IN (...) ORDER BY query_created_time` cannot be read in order
+    from the (status, priority, created) index, so SQLite sorts every match.
+    Each leg is instead one equality range on a composite index that is
+    already in created order, and the legs are merged with UNION ALL.
+    Client pages (client/created index), text search and created ranges
+    stay a single statement.
+    """
+    statuses = _statuses(filters)
+    both_status_filters = filters.statuses and filters.status not in (None, '', 'All')
+    if filters.client_name is not None or filters.search or filters.created_from \
+            or filters.created_to or both_status_filters:
+        return [filters]
+    if filters.assigned_to is not None:
+        # (assigned_to, status, created): one leg per status, priorities filtered in place
+        return [replace(filters, status=status, statuses=()) for status in statuses] or [filters]
+    if statuses and filters.priorities:
+        return [replace(filters, status=status, statuses=(), priorities=(priority,))
+                for status in statuses for priority in filters.priorities]
+    if len(statuses) > 1:
+        return [replace(filters, status=status, statuses=()) for status in statuses]
+    if len(filters.priorities) > 1:
+        return [replace(filters, priorities=(priority,)) for priority in filters.priorities]
+    return [filters]
+
+
+def build_page_query(filters, page_size, after=None, columns=LIST_COLUMNS):
+    """Return (sql, params) for one page, starting after the (created, id) cursor"""
+    selects = []
+    params = []
+    for leg in page_legs(filters):
+        where, leg_params = build_where(leg)
+        if after is not None:
+            keyset = "(query_created_time, query_id) < (?, ?)"
+            where = f"{where} AND {keyset}" if where else f"WHERE {keyset}"
+            leg_params = leg_params + [after[0], after[1]]
+        selects.append(f"SELECT {', '.join(columns)} FROM client_queries {where}")
+        params.extend(leg_params)
+    sql = f"{' UNION ALL '.join(selects)} {ORDER_BY} LIMIT ?"
+    return sql, params + [page_size]
+
+
+def fetch_page(db, filters, page_size=50, after=None, columns=LIST_COLUMNS):
+    """Fetch one page of rows plus the cursor for the next page (None at the end)"""
+    sql, params = build_page_query(filters, page_size + 1, after, columns)
+    rows = db.execute(sql, params).fetchall()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_more:
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = (last['query_created_time'], last['query_id'])
+    return rows, next_cursor
+
+
+def fetch_ids(db, filters, query_ids, columns=LIST_COLUMNS):
+    """Rows among query_ids that pass the given filters, in no particular order"""
+    where, params = build_where(filters)
+    rows = []
+    for start in range(0, len(query_ids), 500):
+        chunk = list(query_ids[start:start + 500])
+        clause = f"query_id IN ({', '.join('?' * len(chunk))})"
+        sql_where = f"{where} AND {clause}" if where else f"WHERE {clause}"
+        rows.extend(db.execute(
+            f"SELECT {', '.join(columns)} FROM client_queries {sql_where}", params + chunk
+        ).fetchall())
+    return rows
+
+
+def count_matching(db, filters):
+    where, params = build_where(filters)
+    return db.execute(f"SELECT COUNT(*) FROM client_queries {where}", params).fetchone()[0]
+
+
+def matches(db, filters, query_id):
+    """True if query_id exists and passes the given filters"""
+    where, params = build_where(filters)
+    clause = f"{where} AND query_id = ?" if where else "WHERE query_id = ?"
+    row = db.execute(f"SELECT 1 FROM client_queries {clause}", params + [query_id]).fetchone()
+    return row is not None
+
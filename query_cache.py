@@ -0,0 +1,134 @@
+"""Process-wide cache for read queries, with write-through invalidation.
+
+Entries are keyed on a query name plus its parameters and tagged with the
+data they depend on: "client:<name>" for one client's tickets, "all" for
+queries over every ticket. Writes call invalidate_client(), which drops
+exactly the entries that could have changed, and bump a per-tag generation
+so a load that was already running when the write landed is returned to its
+caller but not stored. Eviction is LRU with a TTL;
+the TTL also bounds staleness for writes made by other processes
+(e.g. import_csv.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from db_connection import db_session
+import instrumentation
+
+MAX_ENTRIES = 2048
+TTL_SECONDS = 60.0
+
+ALL = "all"
+
+
+def client_tag(client_name):
+    return f"client:{client_name}"
+
+
+def tags_for(filters):
+    """Tags a query over the given QueryFilter depends on"""
+    if filters is not None and filters.client_name is not None:
+        return (client_tag(filters.client_name),)
+    return (ALL,)
+
+
+class QueryCache:
+    """Thread-safe LRU/TTL cache with tag-based invalidation and counters"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._lock = threading.Lock()
+        # tag -> invalidation count, so a load that overlapped a write is not stored
+        self._generations = {}
+        self._epoch = 0  # bumped by clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_loads = 0
+
+    def get_or_load(self, key, loader, tags=(ALL,)):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            seen = self._generation(tags)
+        value = loader()
+        with self._lock:
+            if self._generation(tags) != seen:
+                # Invalidated while loading: the value may predate the write
+                self.stale_loads += 1
+                return value
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def _generation(self, tags):
+        return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags"""
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[1] & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_client(self, client_name):
+        """Call after a write to one of client_name's tickets"""
+        return self.invalidate(ALL, client_tag(client_name))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'stale_loads': self.stale_loads,
+            }
+
+
+cache = QueryCache()
+
+
+def cached(name, params, loader, tags=(ALL,)):
+    """Return loader() through the process-wide cache, keyed on (name, params)"""
+    return cache.get_or_load((name, params), loader, tags)
+
+
+def cached_read(fn, filters=None, *args):
+    """Run fn(db, filters, *args) on a pooled connection, through the cache"""
+    def load():
+        with instrumentation.timer("query_load_seconds", loader=fn.__name__), db_session() as db:
+            return fn(db, filters, *args)
+
+    key = (fn.__module__, fn.__name__, filters.key() if filters is not None else None, args)
+    return cache.get_or_load(key, load, tags_for(filters))
@@ -0,0 +1,433 @@
+"""Data-access layer for users and client queries.
+
+The Streamlit pages call these functions instead of issuing SQL, so every
+hot path can be cached, batched, profiled and load-tested without starting
+Streamlit. Each function borrows a pooled connection (db_connection), uses
+module-level SQL constants so sqlite3's per-connection statement cache
+reuses the prepared statements, and maps rows onto Ticket / User objects.
+Reads go through the process-wide query cache; writes invalidate it.
+"""
+import sqlite3
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from db_connection import db_session
+import assignment
+import changes
+import duplicates
+import instrumentation
+import passwords
+import timestamps
+from aggregations import (
+    dashboard_summary, status_counts, priority_counts, daily_created_counts, total_count,
+    time_series
+)
+from query_builder import (
+    ORDER_BY, QueryFilter, DETAIL_COLUMNS, LIST_COLUMNS, build_where, fetch_ids, fetch_page,
+    matches
+)
+from query_cache import cache, cached_read
+from search import search
+from sla import open_breaches, sla_report
+
+STATUSES = ('Open', 'In Progress', 'Resolved')
+
+SELECT_USER = "SELECT username, role, email, password FROM users WHERE username=? AND role=?"
+UPDATE_PASSWORD = "UPDATE users SET password=? WHERE username=? AND password=?"
+USER_EXISTS = "SELECT 1 FROM users WHERE username=?"
+INSERT_USER = "INSERT INTO users (username, password, role, email) VALUES (?, ?, ?, ?)"
+
+INSERT_QUERY = """
+    INSERT INTO client_queries
+    (client_name, mail_id, mobile_number, query_heading,
+     query_description, status, priority, query_created_time)
+    VALUES (?, ?, ?, ?, ?, 'Open', ?, ?)
+"""
+SELECT_OWNER = "SELECT client_name FROM client_queries WHERE query_id = ?"
+RESOLVE_QUERY = """
+    UPDATE client_queries
+    SET status = ?, query_closed_time = ?, version = version + 1
+    WHERE query_id = ?
+"""
+UPDATE_QUERY_STATUS = """
+    UPDATE client_queries
+    SET status = ?, version = version + 1
+    WHERE query_id = ?
+"""
+SELECT_SUPPORT_AGENTS = "SELECT username FROM users WHERE role = 'Support' ORDER BY username"
+
+# Bulk updates are chunked to stay well below SQLite's bound-parameter limit
+BULK_CHUNK = 400
+
+UNCHANGED = object()
+
+
+class User(NamedTuple):
+    username: str
+    role: str
+    email: Optional[str]
+
+
+class Ticket(NamedTuple):
+    """One client_queries row.
+
+    A NamedTuple is a plain tuple underneath: no per-instance __dict__, and
+    immutable, so cached lists of tickets can be shared between sessions.
+    Columns a query did not select are None.
+    """
+    query_id: int
+    client_name: Optional[str] = None
+    mail_id: Optional[str] = None
+    mobile_number: Optional[str] = None
+    query_heading: Optional[str] = None
+    query_description: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    query_created_time: Optional[str] = None
+    query_closed_time: Optional[str] = None
+    assigned_to: Optional[str] = None
+    version: Optional[int] = None
+
+
+class BulkResult(NamedTuple):
+    requested: int
+    updated: int
+    conflicts: List[int]  # ids changed by someone else (or deleted) since they were read
+
+
+def _tickets(columns: Sequence[str], rows) -> List[Ticket]:
+    if tuple(columns) == Ticket._fields:
+        return [Ticket._make(row) for row in rows]
+    positions = [Ticket._fields.index(column) for column in columns]
+    template = [None] * len(Ticket._fields)
+    tickets = []
+    for row in rows:
+        values = template[:]
+        for position, value in zip(positions, row):
+            values[position] = value
+        tickets.append(Ticket._make(values))
+    return tickets
+
+
+def to_frame(tickets: Sequence[Ticket], columns: Sequence[str] = Ticket._fields):
+    """Build a DataFrame of just the given tickets and columns, for display"""
+    import pandas as pd
+
+    with instrumentation.timer("frame_build_seconds"):
+        positions = [Ticket._fields.index(column) for column in columns]
+        return pd.DataFrame(
+            [[ticket[p] for p in positions] for ticket in tickets], columns=list(columns)
+        )
+
+
+# Users
+
+def authenticate(username: str, password: str, role: str) -> Optional[User]:
+    """Return the User if username/password/role match, else None.
+
+    The hash is checked on the passwords thread pool; a stored hash that is
+    legacy or uses an outdated cost is replaced after a successful login.
+    """
+    with db_session() as db:
+        row = db.execute(SELECT_USER, (username, role)).fetchone()
+    # Unknown users pay for a full hash check too, so timing does not reveal them
+    stored = row[3] if row is not None else passwords.dummy_hash()
+    if not passwords.verify_in_pool(password, stored) or row is None:
+        return None
+    if passwords.needs_rehash(row[3]):
+        upgraded = passwords.hash_in_pool(password)
+        with db_session() as db:
+            db.execute(UPDATE_PASSWORD, (upgraded, username, row[3]))
+    return User(*row[:3])
+
+
+def get_user(username: str, role: str) -> Optional[User]:
+    """The user with this name and role, or None (no password check)"""
+    with db_session() as db:
+        row = db.execute(SELECT_USER, (username, role)).fetchone()
+    return User(*row[:3]) if row else None
+
+
+def register(username: str, password: str, role: str, email: Optional[str]) -> bool:
+    """Create a user; returns False if the username is already taken"""
+    with db_session() as db:
+        if db.execute(USER_EXISTS, (username,)).fetchone():
+            return False
+    hashed = passwords.hash_in_pool(password)
+    with db_session() as db:
+        try:
+            db.execute(INSERT_USER, (username, hashed, role, email))
+        except sqlite3.IntegrityError:
+            return False
+    if role == 'Support':
+        assignment.engine.invalidate()
+    return True
+
+
+# Tickets
+
+def create_query(client_name: str, mail_id: str, mobile_number: str, heading: str,
+                 description: str, priority: str = 'Medium') -> int:
+    """Insert a new Open ticket, route it to the least-loaded agent and return its query_id"""
+    try:
+        with db_session() as db:
+            query_id = db.execute(INSERT_QUERY, (
+                client_name, mail_id, mobile_number, heading, description,
+                priority, timestamps.now()
+            )).lastrowid
+            assignment.assign_new(db, [(query_id, priority)])
+            duplicates.index_tickets(db, [(query_id, client_name, heading, description)])
+    except Exception:
+        assignment.engine.invalidate()
+        raise
+    cache.invalidate_client(client_name)
+    return query_id
+
+
+def _load_client_tickets(db, filters) -> List[Ticket]:
+    where, params = build_where(filters)
+    rows = db.execute(
+        f"SELECT {', '.join(DETAIL_COLUMNS)} FROM client_queries {where} {ORDER_BY}",
+        params
+    ).fetchall()
+    return _tickets(DETAIL_COLUMNS, rows)
+
+
+def list_queries_for_client(client_name: str, statuses: Sequence[str] = (),
+                            priorities: Sequence[str] = ()) -> List[Ticket]:
+    """All of one client's tickets, newest first"""
+    filters = QueryFilter(client_name=client_name, statuses=tuple(statuses),
+                          priorities=tuple(priorities))
+    return cached_read(_load_client_tickets, filters)
+
+
+def _load_page(db, filters, page_size, after) -> Tuple[List[Ticket], Optional[tuple]]:
+    rows, next_cursor = fetch_page(db, filters, page_size, after)
+    return _tickets(LIST_COLUMNS, rows), next_cursor
+
+
+def list_queries(filters: Optional[QueryFilter] = None, page_size: int = 50,
+                 after: Optional[tuple] = None) -> Tuple[List[Ticket], Optional[tuple]]:
+    """One page of tickets matching filters, plus the cursor of the next page"""
+    return cached_read(_load_page, filters or QueryFilter(), page_size, after)
+
+
+def _load_live_page(db, filters, page_size, after) -> Tuple[int, List[Ticket], Optional[tuple]]:
+    # Read the feed position first: anything committed after it is replayed by poll_changes
+    seq = changes.latest(db)
+    tickets, next_cursor = _load_page(db, filters, page_size, after)
+    return seq, tickets, next_cursor
+
+
+def live_page(filters: Optional[QueryFilter] = None, page_size: int = 50,
+              after: Optional[tuple] = None) -> Tuple[int, List[Ticket], Optional[tuple]]:
+    """Like list_queries, plus the change-feed cursor the page is current as of"""
+    return cached_read(_load_live_page, filters or QueryFilter(), page_size, after)
+
+
+def poll_changes(filters: QueryFilter, since: int) -> Tuple[changes.ChangeBatch, List[Ticket]]:
+    """Changes after the since cursor, and those changed tickets that pass filters.
+
+    Changed ids missing from the returned tickets were deleted or no longer
+    match. Not cached: it is a short index range read on query_changes.
+    """
+    with db_session() as db:
+        batch = changes.since(db, since, filters.client_name)
+        if batch.overflow or not batch.query_ids:
+            return batch, []
+        return batch, _tickets(LIST_COLUMNS, fetch_ids(db, filters, batch.query_ids))
+
+
+def count_queries(filters: Optional[QueryFilter] = None) -> int:
+    return cached_read(total_count, filters)
+
+
+def get_query(query_id: int, include_archive: bool = False) -> Optional[Ticket]:
+    """Full ticket including its description, falling back to the archive if asked"""
+    tables = QueryFilter(include_archive=include_archive).tables()
+    with db_session() as db:
+        for table in tables:
+            row = db.execute(
+                f"SELECT {', '.join(DETAIL_COLUMNS)} FROM {table} WHERE query_id = ?",
+                (query_id,)
+            ).fetchone()
+            if row:
+                return _tickets(DETAIL_COLUMNS, [row])[0]
+    return None
+
+
+def update_status(query_id: int, status: str,
+                  filters: Optional[QueryFilter] = None) -> bool:
+    """Set a ticket's status (stamping query_closed_time on Resolved).
+
+    If filters are given the ticket must also match them. Returns False if
+    no such ticket exists.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    with db_session() as db:
+        if filters is not None and not matches(db, filters, query_id):
+            return False
+        owner = db.execute(SELECT_OWNER, (query_id,)).fetchone()
+        if owner is None:
+            return False
+        if status == 'Resolved':
+            db.execute(RESOLVE_QUERY, (status, timestamps.now(), query_id))
+        else:
+            db.execute(UPDATE_QUERY_STATUS, (status, query_id))
+    cache.invalidate_client(owner[0])
+    return True
+
+
+def _bulk_where(chunk):
+    """WHERE clause and params matching [(query_id, version), ...] exactly"""
+    # The plain query_id IN (...) lets SQLite seek by primary key
+    where = (
+        f"WHERE query_id IN ({', '.join('?' * len(chunk))}) "
+        f"AND (query_id, version) IN (VALUES {', '.join('(?, ?)' for _ in chunk)})"
+    )
+    return where, [query_id for query_id, _ in chunk] + [v for item in chunk for v in item]
+
+
+def bulk_plan(expected_versions: dict, status: Optional[str] = None,
+              assigned_to=UNCHANGED) -> Tuple[list, List[str], list]:
+    """Validate a bulk change: ([(query_id, version), ...], SET clauses, SET params).
+
+    No SET clauses means there is nothing to change.
+    """
+    if status is not None and status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    assignments = []
+    params = []
+    if status is not None:
+        assignments.append("status = ?")
+        params.append(status)
+        if status == 'Resolved':
+            assignments.append("query_closed_time = ?")
+            params.append(timestamps.now())
+    if assigned_to is not UNCHANGED:
+        assignments.append("assigned_to = ?")
+        params.append(assigned_to)
+    items = [(int(query_id), int(version)) for query_id, version in expected_versions.items()]
+    if assignments:
+        assignments.append("version = version + 1")
+    return items, assignments, params
+
+
+def apply_bulk(db, items, assignments, params) -> Tuple[BulkResult, set]:
+    """Run a bulk_plan() inside the caller's transaction; returns (result, owners touched)"""
+    if not assignments or not items:
+        return BulkResult(len(items), 0, []), set()
+    updated = 0
+    matched = set()
+    owners = set()
+    for start in range(0, len(items), BULK_CHUNK):
+        where, keys = _bulk_where(items[start:start + BULK_CHUNK])
+        for query_id, owner in db.execute(
+            f"SELECT query_id, client_name FROM client_queries {where}", keys
+        ):
+            matched.add(query_id)
+            owners.add(owner)
+        updated += db.execute(
+            f"UPDATE client_queries SET {', '.join(assignments)} {where}",
+            params + keys
+        ).rowcount
+    conflicts = [query_id for query_id, _ in items if query_id not in matched]
+    return BulkResult(len(items), updated, conflicts), owners
+
+
+def bulk_update(expected_versions: dict, status: Optional[str] = None,
+                assigned_to=UNCHANGED) -> BulkResult:
+    """Update status and/or assigned_to for many tickets in one transaction.
+
+    expected_versions maps query_id -> the version the caller last saw; a
+    ticket is only changed if its version still matches (optimistic
+    concurrency), so two agents triaging the same tickets cannot silently
+    overwrite each other. Resolving stamps query_closed_time. Pass
+    assigned_to=None to unassign; leave it out to keep current assignees.
+    Pages use write_queue.bulk_update, which group-commits the same change.
+    """
+    plan = bulk_plan(expected_versions, status, assigned_to)
+    with db_session() as db:
+        db.execute("BEGIN IMMEDIATE")
+        result, owners = apply_bulk(db, *plan)
+    for owner in owners:
+        cache.invalidate_client(owner)
+    return result
+
+
+def my_queue(agent: str, page_size: int = 50,
+             after: Optional[tuple] = None) -> Tuple[List[Ticket], Optional[tuple]]:
+    """One page of an agent's open tickets, newest first, from the assignee index"""
+    filters = QueryFilter(assigned_to=agent, statuses=assignment.OPEN_STATUSES)
+    return cached_read(_load_page, filters, page_size, after)
+
+
+def auto_assign(limit: Optional[int] = None) -> int:
+    """Route unassigned open tickets to the least-loaded agents; returns how many"""
+    return assignment.assign_unassigned(limit)
+
+
+def agent_workloads() -> dict:
+    """{agent: weighted open workload} as the assignment engine sees it"""
+    return assignment.engine.loads()
+
+
+def similar_tickets(heading: str, description: str, client_name: Optional[str] = None,
+                    exclude: Optional[int] = None, limit: int = 5) -> List[dict]:
+    """Likely duplicates of the given text, best first (only client_name's if given)"""
+    with db_session() as db:
+        return duplicates.similar(db, heading, description, client_name, exclude, limit)
+
+
+def duplicates_of(query_id: int, limit: int = 5) -> List[dict]:
+    """Likely duplicates of an existing ticket, best first"""
+    with db_session() as db:
+        return duplicates.similar_to(db, query_id, limit=limit)
+
+
+def list_support_agents() -> List[str]:
+    with db_session() as db:
+        return [row[0] for row in db.execute(SELECT_SUPPORT_AGENTS)]
+
+
+def search_queries(text: str, limit: int = 10, client_name: Optional[str] = None,
+                   include_archive: bool = False) -> List[dict]:
+    """Best full-text matches with highlighted snippets, best first"""
+    with db_session() as db:
+        return search(db, text, limit=limit, client_name=client_name,
+                      include_archive=include_archive)
+
+
+# Dashboard aggregates
+
+def summary(filters: Optional[QueryFilter] = None) -> dict:
+    return cached_read(dashboard_summary, filters)
+
+
+def status_breakdown(filters: Optional[QueryFilter] = None) -> dict:
+    return cached_read(status_counts, filters)
+
+
+def priority_breakdown(filters: Optional[QueryFilter] = None) -> dict:
+    return cached_read(priority_counts, filters)
+
+
+def daily_counts(filters: Optional[QueryFilter] = None) -> list:
+    return cached_read(daily_created_counts, filters)
+
+
+def trend(granularity: str = 'day', start: Optional[str] = None, end: Optional[str] = None,
+          filters: Optional[QueryFilter] = None) -> list:
+    """Created/resolved/open-at-end per day, week or month, from the rollup table"""
+    return cached_read(time_series, filters, granularity, start, end)
+
+
+def sla(filters: Optional[QueryFilter] = None) -> dict:
+    """Resolution-time percentiles, open-ticket aging and SLA breach counts"""
+    return cached_read(sla_report, filters)
+
+
+def sla_breaches(limit: int = 100) -> list:
+    """Open tickets past their priority's SLA, oldest first"""
+    with db_session() as db:
+        return open_breaches(db, limit)
@@ -0,0 +1,139 @@
+"""Daily created/resolved rollups behind the "Queries Over Time" chart.
+
+query_daily_rollup (migration 6) holds, per day, priority and current
+status, how many tickets were created that day and how many were resolved
+that day (counted on the ticket's query_closed_time, only while it is
+Resolved). Triggers keep it current on insert, delete and any change of
+status, priority or timestamps, and rebuild() backfills it from history.
+
+Charts read only this table, which has at most days x priorities x statuses
+rows, so week/month buckets and date-range zoom never rescan client_queries.
+"Open at end of period" is the running total of created minus resolved.
+"""
+import sys
+
+import archive
+
+GRANULARITIES = ('day', 'week', 'month')
+
+_BUCKETS = {
+    'day': "day",
+    'week': "date(day, '-6 days', 'weekday 1')",
+    'month': "substr(day, 1, 7) || '-01'",
+}
+
+
+def add_sql(row, sign):
+    """Trigger body adding (sign=1) or removing (sign=-1) one ticket's contribution"""
+    return f"""
+        INSERT INTO query_daily_rollup (day, priority, status, created, resolved)
+        VALUES (substr({row}.query_created_time, 1, 10), coalesce({row}.priority, ''),
+                coalesce({row}.status, ''), {sign}, 0)
+        ON CONFLICT (day, priority, status) DO UPDATE SET created = created + ({sign});
+        INSERT INTO query_daily_rollup (day, priority, status, created, resolved)
+        SELECT substr({row}.query_closed_time, 1, 10), coalesce({row}.priority, ''),
+               'Resolved', 0, {sign}
+        WHERE {row}.status = 'Resolved' AND {row}.query_closed_time IS NOT NULL
+        ON CONFLICT (day, priority, status) DO UPDATE SET resolved = resolved + ({sign});"""
+
+
+def rebuild(db):
+    """Recompute the rollup from hot and archived tickets (caller commits)"""
+    source = archive.all_tickets(db)
+    db.execute("DELETE FROM query_daily_rollup")
+    db.execute(f"""
+        INSERT INTO query_daily_rollup (day, priority, status, created, resolved)
+        SELECT day, priority, status, SUM(created), SUM(resolved) FROM (
+            SELECT substr(query_created_time, 1, 10) AS day,
+                   coalesce(priority, '') AS priority, coalesce(status, '') AS status,
+                   1 AS created, 0 AS resolved
+            FROM {source}
+            UNION ALL
+            SELECT substr(query_closed_time, 1, 10), coalesce(priority, ''), 'Resolved', 0, 1
+            FROM {source}
+            WHERE status = 'Resolved' AND query_closed_time IS NOT NULL
+        )
+        GROUP BY day, priority, status
+    """)
+
+
+def _where(priorities, statuses):
+    clauses, params = [], []
+    if priorities:
+        clauses.append(f"priority IN ({', '.join('?' * len(priorities))})")
+        params.extend(priorities)
+    if statuses:
+        clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+        params.extend(statuses)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def series(db, granularity='day', start=None, end=None, priorities=(), statuses=()):
+    """Return [(bucket_start, created, resolved, open_at_end), ...] oldest first.
+
+    start/end are inclusive 'YYYY-MM-DD' strings; open_at_end still counts
+    everything before start, so zooming does not change the backlog line.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    where, params = _where(priorities, statuses)
+    rows = db.execute(f"""
+        SELECT bucket, created, resolved,
+               SUM(created - resolved) OVER (ORDER BY bucket) AS open_at_end
+        FROM (
+            SELECT {_BUCKETS[granularity]} AS bucket,
+                   SUM(created) AS created, SUM(resolved) AS resolved
+            FROM query_daily_rollup {where}
+            GROUP BY bucket
+        )
+        ORDER BY bucket
+    """, params).fetchall()
+    return [
+        row for row in rows
+        if (start is None or row[0] >= start) and (end is None or row[0] <= end)
+    ]
+
+
+def daily_created(db):
+    """[(day, created), ...] for all tickets, oldest first"""
+    return db.execute("""
+        SELECT day, SUM(created) FROM query_daily_rollup
+        GROUP BY day HAVING SUM(created) > 0 ORDER BY day
+    """).fetchall()
+
+
+def check_consistency(db):
+    """Return rollup rows that differ from a fresh recomputation"""
+    db.execute("SAVEPOINT rollup_check")
+    try:
+        stored = set(db.execute(
+            "SELECT * FROM query_daily_rollup WHERE created != 0 OR resolved != 0"
+        ))
+        rebuild(db)
+        fresh = set(db.execute("SELECT * FROM query_daily_rollup"))
+    finally:
+        db.execute("ROLLBACK TO rollup_check")
+        db.execute("RELEASE rollup_check")
+    return sorted(stored ^ fresh)
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_connection import create_tables, db_session
+
+    parser = argparse.ArgumentParser(description="Check or backfill the daily rollups")
+    parser.add_argument("--rebuild", action="store_true", help="backfill from client_queries")
+    args = parser.parse_args()
+
+    if not create_tables():
+        sys.exit(1)
+    with db_session() as db:
+        if args.rebuild:
+            db.execute("BEGIN IMMEDIATE")
+            rebuild(db)
+            print("✅ Rollups rebuilt")
+        problems = check_consistency(db)
+    if problems:
+        print(f"❌ {len(problems)} rollup rows differ from client_queries")
+        sys.exit(1)
+    print("✅ Rollups are consistent")
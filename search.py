@@ -0,0 +1,61 @@
+"""Ranked full-text search over client_queries using SQLite FTS5.
+
+client_queries_fts (migration 2) indexes query_heading, query_description
+and mail_id and is kept in sync by triggers. Search text is split into
+words and every word is matched as a prefix, so "valid form" finds
+"Form validation not working properly."
+
+Archived tickets have their own index, query_archive_fts (migration 9),
+which is searched too when include_archive is set.
+"""
+import re
+
+# bm25 column weights: heading, description, email
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+SNIPPET_TOKENS = 12
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 MATCH expression, or None if it has no words"""
+    words = _WORD.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _search_table(db, table, expression, limit, client_name, mark):
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    sql = f"""
+        SELECT q.query_id, q.client_name, q.query_heading, q.status, q.priority,
+               q.query_created_time,
+               snippet({table}_fts, -1, ?, ?, '…', ?) AS snippet,
+               bm25({table}_fts, {weights}) AS rank
+        FROM {table}_fts
+        JOIN {table} q ON q.query_id = {table}_fts.rowid
+        WHERE {table}_fts MATCH ?
+    """
+    params = [mark[0], mark[1], SNIPPET_TOKENS, expression]
+    if client_name is not None:
+        sql += " AND q.client_name = ?"
+        params.append(client_name)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    cursor = db.execute(sql, params)
+    columns = [col[0] for col in cursor.description] + ['archived']
+    archived = table != "client_queries"
+    return [dict(zip(columns, row + (archived,))) for row in cursor.fetchall()]
+
+
+def search(db, text, limit=10, client_name=None, mark=("**", "**"), include_archive=False):
+    """Return the best matching tickets as dicts, with a highlighted snippet"""
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    hits = _search_table(db, "client_queries", expression, limit, client_name, mark)
+    if include_archive:
+        hits += _search_table(db, "query_archive", expression, limit, client_name, mark)
+        hits.sort(key=lambda hit: hit['rank'])
+    return hits[:limit]
@@ -0,0 +1,342 @@
+"""Resolution-time and SLA analytics.
+
+query_resolution (migration 7) holds one row per Resolved ticket with its
+resolution time in seconds, kept current by triggers on client_queries, so
+only tickets that are inserted, resolved, reopened or re-prioritised are
+ever recomputed. Archiving a ticket keeps its row and sets archived
+(migration 14), so a report covers hot tickets only unless include_archive
+is set.
+
+query_resolution_hist (migration 15) counts those rows per (archived,
+priority, assignee, bucket), where a bucket is the resolution time rounded
+down to BUCKET_DIGITS significant digits; triggers on query_resolution keep
+it current. Percentiles walk one group's cumulative bucket counts, so a
+report reads a few hundred histogram rows per group however many tickets
+were resolved, and the bucket midpoint it returns is within 5% of the
+exact nearest-rank value. Breach counts sum whole buckets and only count
+rows of the one bucket that straddles the target.
+
+Open-ticket aging and breach lists read the (status, priority, created)
+index, so they only touch the backlog, never the resolved history.
+"""
+import sys
+from datetime import datetime
+
+import archive
+import timestamps
+
+OPEN_STATUSES = ('Open', 'In Progress')
+
+# Resolution targets per priority, in hours
+SLA_HOURS = {'High': 24, 'Medium': 72, 'Low': 168}
+
+PERCENTILES = (50, 90, 95)
+
+# (label, minimum age in hours) for open tickets, youngest first
+AGING_BUCKETS = (
+    ('< 1 day', 0),
+    ('1-3 days', 24),
+    ('3-7 days', 72),
+    ('7-30 days', 168),
+    ('> 30 days', 720),
+)
+
+GROUP_COLUMNS = ('priority', 'assigned_to')
+
+# Histogram buckets keep this many significant digits of the seconds
+BUCKET_DIGITS = 2
+
+# One (status, priority, created) range per open status, merged in created order
+SELECT_OPEN_BREACHES = " UNION ALL ".join(
+    "SELECT query_id, client_name, priority, status, query_created_time, assigned_to "
+    "FROM client_queries WHERE status = ? AND priority = ? AND query_created_time < ?"
+    for _ in OPEN_STATUSES
+) + " ORDER BY query_created_time LIMIT ?"
+COUNT_OPEN_BREACHED = f"""
+    SELECT COUNT(*) FROM client_queries
+    WHERE status IN ({', '.join('?' * len(OPEN_STATUSES))})
+    AND priority = ? AND query_created_time < ?
+"""
+HISTOGRAM_SQL = """
+    SELECT {by}, bucket, SUM(n) FROM query_resolution_hist WHERE {where}
+    GROUP BY {by}, bucket HAVING SUM(n) > 0 ORDER BY {by}, bucket
+"""
+RESOLVED_SQL = """
+    SELECT coalesce(SUM(n), 0), coalesce(SUM(n) FILTER (WHERE bucket > ?), 0)
+    FROM query_resolution_hist WHERE {where} AND priority = ?
+"""
+BOUNDARY_LATE_SQL = """
+    SELECT COUNT(*) FROM query_resolution
+    WHERE {where} AND priority = ? AND seconds > ? AND seconds < ?
+"""
+
+
+def resolution_sql(row):
+    """Trigger body recording one ticket's resolution time if it is Resolved"""
+    return f"""
+        INSERT OR REPLACE INTO query_resolution (query_id, priority, assigned_to, seconds)
+        SELECT {row}.query_id, coalesce({row}.priority, ''), {row}.assigned_to,
+               CAST(round((julianday({row}.query_closed_time)
+                           - julianday({row}.query_created_time)) * 86400) AS INTEGER)
+        WHERE {row}.status = 'Resolved' AND {row}.query_closed_time IS NOT NULL;"""
+
+
+def rebuild(db):
+    """Recompute query_resolution from hot and archived tickets (caller commits)"""
+    source = archive.all_tickets(db)
+    db.execute("DELETE FROM query_resolution")
+    db.execute(f"""
+        INSERT INTO query_resolution (query_id, priority, assigned_to, seconds)
+        SELECT query_id, coalesce(priority, ''), assigned_to,
+               CAST(round((julianday(query_closed_time)
+                           - julianday(query_created_time)) * 86400) AS INTEGER)
+        FROM {source}
+        WHERE status = 'Resolved' AND query_closed_time IS NOT NULL
+    """)
+
+
+def archived_sql(row, archived):
+    """Trigger body following a ticket into (1) or out of (0) query_archive.
+
+    A ticket deleted from the archive without being restored is gone, and
+    so is its resolution time.
+    """
+    hot = f"EXISTS (SELECT 1 FROM client_queries WHERE query_id = {row}.query_id)"
+    if archived:
+        return f"UPDATE query_resolution SET archived = 1 WHERE query_id = {row}.query_id;"
+    return f"""
+        UPDATE query_resolution SET archived = 0 WHERE query_id = {row}.query_id AND {hot};
+        DELETE FROM query_resolution WHERE query_id = {row}.query_id AND NOT {hot};"""
+
+
+def bucket_sql(seconds):
+    """SQL for the histogram bucket of a seconds expression (see bucket())"""
+    text = f"CAST(max({seconds}, 0) AS TEXT)"
+    return (f"CAST(substr({text}, 1, {BUCKET_DIGITS}) || "
+            f"substr('{'0' * 20}', 1, length({text}) - {BUCKET_DIGITS}) AS INTEGER)")
+
+
+def bucket(seconds):
+    """seconds rounded down to BUCKET_DIGITS significant digits"""
+    text = str(max(int(seconds), 0))
+    return int(text[:BUCKET_DIGITS] + "0" * max(len(text) - BUCKET_DIGITS, 0))
+
+
+def bucket_width(start):
+    return 10 ** max(len(str(start)) - BUCKET_DIGITS, 0)
+
+
+def histogram_sql(row, delta):
+    """Trigger body adding delta to the histogram for one query_resolution row"""
+    return f"""
+        INSERT INTO query_resolution_hist (archived, priority, assigned_to, bucket, n)
+        VALUES ({row}.archived, {row}.priority, coalesce({row}.assigned_to, ''),
+                {bucket_sql(f'{row}.seconds')}, {delta})
+        ON CONFLICT (archived, priority, assigned_to, bucket) DO UPDATE SET n = n + ({delta});"""
+
+
+def rebuild_histogram(db):
+    """Recompute query_resolution_hist from query_resolution (caller commits)"""
+    db.execute("DELETE FROM query_resolution_hist")
+    db.execute(f"""
+        INSERT INTO query_resolution_hist (archived, priority, assigned_to, bucket, n)
+        SELECT archived, priority, coalesce(assigned_to, ''), {bucket_sql('seconds')}, COUNT(*)
+        FROM query_resolution GROUP BY 1, 2, 3, 4
+    """)
+
+
+def mark_archived(db):
+    """Flag the resolution times of archived tickets (caller commits)"""
+    if archive.archive_exists(db):
+        db.execute(
+            "UPDATE query_resolution SET archived = 1 "
+            "WHERE query_id IN (SELECT query_id FROM query_archive)"
+        )
+
+
+def _scope(filters):
+    """(archived values, priorities) a report over filters covers"""
+    archived = (0, 1) if filters is not None and filters.include_archive else (0,)
+    priorities = tuple(filters.priorities) if filters is not None else ()
+    return archived, priorities
+
+
+def _in(column, values):
+    return f"{column} IN ({', '.join('?' * len(values))})"
+
+
+def _scope_where(filters, by_priority=True):
+    """(where_sql, params) selecting the filters' histogram or resolution rows"""
+    archived, priorities = _scope(filters)
+    where, params = _in("archived", archived), list(archived)
+    if by_priority and priorities:
+        where += f" AND {_in('priority', priorities)}"
+        params += priorities
+    return where, params
+
+
+def _nearest_rank(buckets, percentiles):
+    """{'count': n, 'p50': seconds, ...} from [(bucket, n), ...] in bucket order"""
+    count = sum(n for _, n in buckets)
+    stats = {'count': count}
+    wanted = [(max(1, -(-p * count // 100)), p) for p in sorted(percentiles)]
+    seen = 0
+    for start, n in buckets:
+        seen += n
+        while wanted and wanted[0][0] <= seen:
+            stats[f'p{wanted.pop(0)[1]}'] = start + (bucket_width(start) - 1) // 2
+    return stats
+
+
+def resolution_percentiles(db, by='priority', percentiles=PERCENTILES, filters=None):
+    """Return {group: {'count': n, 'p50': seconds, ...}} of resolution times.
+
+    Nearest-rank percentiles estimated from query_resolution_hist: one
+    grouped read of the histogram, never of the resolved tickets.
+    """
+    if by not in GROUP_COLUMNS:
+        raise ValueError(f"Cannot group resolution times by {by}")
+    where, params = _scope_where(filters)
+    groups = {}
+    for group, start, n in db.execute(HISTOGRAM_SQL.format(by=by, where=where), params):
+        groups.setdefault(group, []).append((start, n))
+    if by == 'assigned_to' and '' in groups:
+        # The histogram stores unassigned as '' (it is part of the primary key)
+        groups[None] = groups.pop('')
+    return {group: _nearest_rank(buckets, percentiles) for group, buckets in groups.items()}
+
+
+def aging_buckets(db, now=None, filters=None):
+    """Return {bucket label: open ticket count} by time since creation"""
+    now = now or datetime.now()
+    _, priorities = _scope(filters)
+    cases = " ".join(
+        f"WHEN query_created_time <= ? THEN {i}"
+        for i in range(len(AGING_BUCKETS) - 1, 0, -1)
+    )
+    cutoffs = [timestamps.ago(hours=hours, now=now) for _, hours in reversed(AGING_BUCKETS[1:])]
+    where = _in("status", OPEN_STATUSES)
+    if priorities:
+        where += f" AND {_in('priority', priorities)}"
+    rows = dict(db.execute(
+        f"SELECT CASE {cases} ELSE 0 END AS bucket, COUNT(*) FROM client_queries "
+        f"WHERE {where} GROUP BY bucket",
+        cutoffs + list(OPEN_STATUSES) + list(priorities)
+    ).fetchall())
+    return {label: rows.get(i, 0) for i, (label, _) in enumerate(AGING_BUCKETS)}
+
+
+def open_breaches(db, limit=100, now=None):
+    """Open tickets already past their priority's SLA, oldest first.
+
+    Returns [(query_id, client_name, priority, status, query_created_time,
+    assigned_to), ...]. Each priority is one range over the status/priority/
+    created index; the small per-priority lists are merged in Python.
+    """
+    now = now or datetime.now()
+    breaches = []
+    for priority, hours in SLA_HOURS.items():
+        cutoff = timestamps.ago(hours=hours, now=now)
+        breaches.extend(db.execute(
+            SELECT_OPEN_BREACHES,
+            [v for status in OPEN_STATUSES for v in (status, priority, cutoff)] + [limit]
+        ).fetchall())
+    breaches.sort(key=lambda row: row[4])
+    return breaches[:limit]
+
+
+def breach_summary(db, now=None, filters=None):
+    """Return {priority: {'target_hours', 'open_breached', 'resolved', 'resolved_late'}}"""
+    now = now or datetime.now()
+    _, priorities = _scope(filters)
+    where, params = _scope_where(filters, by_priority=False)
+    summary = {}
+    for priority, hours in SLA_HOURS.items():
+        if priorities and priority not in priorities:
+            continue
+        open_breached = db.execute(
+            COUNT_OPEN_BREACHED,
+            list(OPEN_STATUSES) + [priority, timestamps.ago(hours=hours, now=now)]
+        ).fetchone()[0]
+        target = hours * 3600
+        edge = bucket(target)
+        resolved, late = db.execute(
+            RESOLVED_SQL.format(where=where), [edge] + params + [priority]
+        ).fetchone()
+        # Only the bucket holding the target needs its rows looked at
+        late += db.execute(
+            BOUNDARY_LATE_SQL.format(where=where),
+            params + [priority, target, edge + bucket_width(edge)]
+        ).fetchone()[0]
+        summary[priority] = {
+            'target_hours': hours,
+            'open_breached': open_breached,
+            'resolved': resolved,
+            'resolved_late': late,
+        }
+    return summary
+
+
+def sla_report(db, filters=None):
+    """Everything the SLA panel shows, in one cacheable dict.
+
+    Only include_archive (resolution times of archived tickets too) and
+    priorities apply; open tickets are never archived.
+    """
+    return {
+        'by_priority': resolution_percentiles(db, 'priority', filters=filters),
+        'by_assignee': resolution_percentiles(db, 'assigned_to', filters=filters),
+        'aging': aging_buckets(db, filters=filters),
+        'breaches': breach_summary(db, filters=filters),
+    }
+
+
+def format_duration(seconds):
+    """Human-readable duration such as '3d 4h' or '45m'"""
+    if seconds is None:
+        return "-"
+    minutes = int(seconds) // 60
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_connection import create_tables, db_session
+    from query_builder import QueryFilter
+
+    parser = argparse.ArgumentParser(description="Print resolution-time and SLA analytics")
+    parser.add_argument("--rebuild", action="store_true", help="backfill query_resolution")
+    parser.add_argument("--archive", action="store_true", help="include archived tickets")
+    args = parser.parse_args()
+
+    if not create_tables():
+        sys.exit(1)
+    with db_session() as db:
+        if args.rebuild:
+            db.execute("BEGIN IMMEDIATE")
+            rebuild(db)
+            mark_archived(db)
+            rebuild_histogram(db)
+            print("✅ Resolution times rebuilt")
+        report = sla_report(db, QueryFilter(include_archive=True) if args.archive else None)
+
+    for title, key in (("By priority", 'by_priority'), ("By assignee", 'by_assignee')):
+        print(f"\n⏱️ Resolution time {title.lower()}")
+        for group, stats in report[key].items():
+            times = "  ".join(f"{name}={format_duration(value)}"
+                              for name, value in stats.items() if name != 'count')
+            print(f"  {group or '(unassigned)':<15} n={stats['count']:<8} {times}")
+    print("\n📦 Open ticket age")
+    for label, count in report['aging'].items():
+        print(f"  {label:<10} {count}")
+    print("\n🚨 SLA breaches")
+    for priority, stats in report['breaches'].items():
+        print(f"  {priority:<7} target {stats['target_hours']}h: "
+              f"{stats['open_breached']} open past due, "
+              f"{stats['resolved_late']}/{stats['resolved']} resolved late")
@@ -0,0 +1,65 @@
+"""Process-level startup: schema setup once, heavy imports on demand.
+
+Streamlit re-executes main_app.py and the pages on every rerun, but
+imported modules live for the whole process. ensure_started() therefore
+runs create_tables() and the migrations once per process (and database
+path) instead of on every rerun of every session, and starts the metrics
+exporter, the background archiver (if ARCHIVE_AFTER_DAYS is set) and builds
+the auto-assignment workload heap.
+
+pandas and plotly dominate cold start, so pages ask lazy_import() for them
+only when a table or chart is actually drawn. A module that is not
+installed is remembered, so the fallback path does not search sys.path
+again on every rerun.
+"""
+import importlib
+import threading
+
+import archive
+import assignment
+import db_connection
+import instrumentation
+
+_ready = set()
+_lock = threading.Lock()
+_modules = {}
+
+
+def ensure_schema():
+    """Create tables and run migrations once per process for the current DB_PATH"""
+    path = db_connection.DB_PATH
+    if path in _ready:
+        return True
+    with _lock:
+        if path in _ready:
+            return True
+        with instrumentation.timer("startup_schema_seconds"):
+            ok = db_connection.create_tables()
+        if ok:
+            _ready.add(path)
+        return ok
+
+
+def ensure_started():
+    """Everything a page needs before its first query; cheap after the first call"""
+    ok = ensure_schema()
+    instrumentation.start_exporter()
+    if ok:
+        archive.start_archiver()
+        assignment.warm()
+    return ok
+
+
+def lazy_import(name):
+    """Import a heavy module on first use; raises ImportError if it is missing"""
+    module = _modules.get(name)
+    if module is None:
+        try:
+            with instrumentation.timer("lazy_import_seconds", module=name):
+                module = importlib.import_module(name)
+        except ImportError as e:
+            module = str(e)
+        _modules[name] = module
+    if isinstance(module, str):
+        raise ImportError(module)
+    return module
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import db_connection
+from query_cache import cache
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fresh, migrated database for one test"""
+    path = str(tmp_path / "test.sqlite")
+    monkeypatch.setattr(db_connection, "DB_PATH", path)
+    db_connection.get_pool().close_all()
+    cache.clear()
+    assert db_connection.create_tables()
+    yield path
+    db_connection.get_pool().close_all()
+    cache.clear()
@@ -0,0 +1,93 @@
+import archive
+import counters
+import db_connection
+import repository
+import rollups
+from query_builder import QueryFilter
+from search import search
+
+OLD = "2020-01-01 10:00:00"
+
+
+def _ticket(heading, status, closed=None):
+    query_id = repository.create_query(
+        "client1", "client1@example.com", "9876543210", heading, "Details", "High"
+    )
+    if status != 'Open':
+        repository.update_status(query_id, status)
+    if closed:
+        with db_connection.db_session() as db:
+            db.execute("UPDATE client_queries SET query_created_time = ?, query_closed_time = ? "
+                       "WHERE query_id = ?", ("2019-12-30 10:00:00", closed, query_id))
+    return query_id
+
+
+def _snapshot(db, query_id):
+    """History-wide rows that must survive a move between tiers"""
+    return (
+        db.execute("SELECT query_id, priority, assigned_to, seconds FROM query_resolution "
+                   "WHERE query_id = ?", (query_id,)).fetchall(),
+        sorted(db.execute("SELECT band_key FROM query_lsh WHERE query_id = ?", (query_id,))),
+        # Moves may leave emptied buckets behind; only counted rows matter
+        db.execute("SELECT * FROM query_resolution_hist WHERE n != 0 ORDER BY 1, 2, 3, 4")
+        .fetchall(),
+    )
+
+
+def _row(db, table, query_id):
+    columns = ", ".join(archive.COLUMNS)
+    return db.execute(f"SELECT {columns} FROM {table} WHERE query_id = ?", (query_id,)).fetchone()
+
+
+def test_archive_and_restore_keep_history(db_path):
+    old = _ticket("Archived printer jam", 'Resolved', OLD)
+    recent = _ticket("Recent printer jam", 'Resolved')
+    still_open = _ticket("Open printer jam", 'Open')
+    with db_connection.db_session() as db:
+        hot_row = _row(db, "client_queries", old)
+        history = _snapshot(db, old)
+        assert history[0] and len(history[1]) == 8
+
+    assert archive.archive_resolved(days=30) == 1
+    with db_connection.db_session() as db:
+        assert _row(db, "query_archive", old) == hot_row
+        assert _row(db, "client_queries", old) is None
+        assert {qid for (qid,) in db.execute("SELECT query_id FROM client_queries")} == {
+            recent, still_open
+        }
+        # The resolution row is only re-scoped to the archive tier
+        assert db.execute("SELECT archived FROM query_resolution WHERE query_id = ?",
+                          (old,)).fetchone() == (1,)
+        assert _snapshot(db, old)[:2] == history[:2]
+        assert {hit['query_id'] for hit in search(db, "printer")} == {recent, still_open}
+        assert old in {hit['query_id'] for hit in search(db, "archived", include_archive=True)}
+        assert counters.check_consistency(db) == []
+        assert rollups.check_consistency(db) == []
+    assert repository.get_query(old) is None
+    assert repository.get_query(old, include_archive=True).query_heading == "Archived printer jam"
+
+    assert archive.restore([old]) == 1
+    with db_connection.db_session() as db:
+        assert _row(db, "client_queries", old) == hot_row
+        assert _row(db, "query_archive", old) is None
+        assert _snapshot(db, old) == history
+        assert [hit['query_id'] for hit in search(db, "archived")] == [old]
+        assert counters.check_consistency(db) == []
+        assert rollups.check_consistency(db) == []
+
+
+def test_real_deletes_still_clear_history(db_path):
+    query_id = _ticket("Deleted ticket", 'Resolved', OLD)
+    with db_connection.db_session() as db:
+        db.execute("DELETE FROM client_queries WHERE query_id = ?", (query_id,))
+        assert _snapshot(db, query_id)[:2] == ([], [])
+        assert rollups.check_consistency(db) == []
+        assert counters.check_consistency(db) == []
+
+
+def test_archived_tickets_count_only_when_asked(db_path):
+    _ticket("Old one", 'Resolved', OLD)
+    _ticket("Open one", 'Open')
+    archive.archive_resolved(days=30)
+    assert repository.count_queries(QueryFilter()) == 1
+    assert repository.count_queries(QueryFilter(include_archive=True)) == 2
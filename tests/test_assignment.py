@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+import assignment
+import db_connection
+import repository
+
+AGENTS = ('agent1', 'agent2', 'agent3')
+PRIORITIES = tuple(assignment.PRIORITY_WEIGHTS)
+
+INSERT_USER = "INSERT INTO users (username, password, role) VALUES (?, 'x', ?)"
+INSERT = """
+    INSERT INTO client_queries (client_name, mail_id, mobile_number, query_heading,
+        query_description, status, priority, query_created_time, assigned_to)
+    VALUES ('client1', 'c@example.com', '9876543210', 'Heading', 'Details', ?, ?, ?, ?)
+"""
+
+
+@pytest.fixture
+def engine(db_path, monkeypatch):
+    """A fresh heap over three Support agents, plus users who must never be picked"""
+    fresh = assignment.AssignmentEngine()
+    monkeypatch.setattr(assignment, "engine", fresh)
+    monkeypatch.setattr(assignment, "ENABLED", True)
+    with db_connection.db_session() as db:
+        db.executemany(INSERT_USER, [(agent, 'Support') for agent in AGENTS]
+                       + [('client1', 'Client'), ('admin', 'Admin')])
+        db.commit()
+    return fresh
+
+
+def _db_loads():
+    with db_connection.db_session() as db:
+        rows = db.execute(assignment.SELECT_LOADS, assignment.OPEN_STATUSES).fetchall()
+    loads = dict.fromkeys(AGENTS, 0)
+    for agent, priority, n in rows:
+        loads[agent] += assignment.weight(priority) * n
+    return loads
+
+
+def _assert_balanced(loads):
+    assert set(loads) == set(AGENTS)
+    assert max(loads.values()) - min(loads.values()) <= max(assignment.PRIORITY_WEIGHTS.values())
+
+
+def test_new_tickets_spread_by_weight(engine):
+    rng = random.Random(7)
+    for i in range(60):
+        repository.create_query('client1', 'c@example.com', '9876543210',
+                                'Heading', f"Details {i}", rng.choice(PRIORITIES))
+        _assert_balanced(engine.loads())
+    assert engine.rebuilds == 1
+    assert engine.loads() == _db_loads()
+    # A rebuild from the database sees the same workload the heap tracked
+    with db_connection.db_session() as db:
+        engine.rebuild(db)
+    assert engine.loads() == _db_loads()
+
+
+def test_sweep_fills_the_least_loaded_first(engine):
+    with db_connection.db_session() as db:
+        db.executemany(INSERT, [('Open', 'High', f"2025-03-01 00:00:{i:02d}", 'agent1')
+                                for i in range(4)])
+        db.executemany(INSERT, [('Resolved', 'High', '2025-03-01 00:01:00', None)]
+                       + [('Open' if i % 2 else 'In Progress', PRIORITIES[i % 3],
+                           f"2025-03-01 00:02:{i:02d}", None) for i in range(30)])
+        db.commit()
+
+    assert repository.auto_assign() == 30
+    with db_connection.db_session() as db:
+        unassigned = db.execute(
+            "SELECT status FROM client_queries WHERE assigned_to IS NULL"
+        ).fetchall()
+        oldest = db.execute(
+            "SELECT assigned_to FROM client_queries "
+            "WHERE query_created_time >= '2025-03-01 00:02:00' "
+            "ORDER BY query_created_time LIMIT 4"
+        ).fetchall()
+    assert unassigned == [('Resolved',)]
+    # agent1 starts 12 ahead, so the oldest tickets go to the other two
+    assert {agent for (agent,) in oldest} == {'agent2', 'agent3'}
+    assert engine.loads() == _db_loads()
+    _assert_balanced(engine.loads())
+
+
+def test_sweep_in_batches(engine):
+    with db_connection.db_session() as db:
+        db.executemany(INSERT, [('Open', 'Low', f"2025-03-01 00:00:{i:02d}", None)
+                                for i in range(20)])
+        db.commit()
+    assert assignment.assign_unassigned(limit=10, batch_size=3) == 10
+    assert assignment.assign_unassigned(batch_size=3) == 10
+    assert sorted(engine.loads().values()) == [6, 7, 7]
+
+
+def test_new_agent_takes_the_next_tickets(engine):
+    for i in range(6):
+        repository.create_query('client1', 'c@example.com', '9876543210',
+                                'Heading', f"Details {i}", 'Medium')
+    assert repository.register('agent4', 'secret-password', 'Support', None)
+    repository.create_query('client1', 'c@example.com', '9876543210',
+                            'Heading', 'Details 6', 'High')
+    assert engine.loads()['agent4'] == assignment.PRIORITY_WEIGHTS['High']
+
+
+def test_no_agents_leaves_tickets_unassigned(db_path, monkeypatch):
+    monkeypatch.setattr(assignment, "engine", assignment.AssignmentEngine())
+    monkeypatch.setattr(assignment, "ENABLED", True)
+    query_id = repository.create_query('client1', 'c@example.com', '9876543210',
+                                       'Heading', 'Details', 'High')
+    with db_connection.db_session() as db:
+        assert db.execute(
+            "SELECT assigned_to FROM client_queries WHERE query_id = ?", (query_id,)
+        ).fetchone() == (None,)
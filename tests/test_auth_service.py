@@ -0,0 +1,66 @@
+import auth_service
+import repository
+from auth_service import AuthService
+
+SECRET = b"test secret"
+
+
+def _login(service):
+    assert repository.register("agent1", "hunter22", "Support", "agent1@example.com")
+    user, token = service.login("agent1", "hunter22", "Support")
+    assert user is not None
+    return user, token
+
+
+def test_signed_session_survives_restart(db_path):
+    user, token = _login(AuthService(secret=SECRET))
+
+    restarted = AuthService(secret=SECRET)
+    assert restarted.validate(token) == user
+    assert restarted.validate(token) == user
+    stats = restarted.stats()
+    assert (stats['session_restores'], stats['session_hits']) == (1, 1)
+
+
+def test_forged_or_old_tokens_are_refused(db_path):
+    _, token = _login(AuthService(secret=SECRET))
+
+    assert AuthService(secret=b"other secret").validate(token) is None
+    assert AuthService(secret=SECRET, max_age=0).validate(token) is None
+
+
+def test_logout_is_not_restored(db_path):
+    service = AuthService(secret=SECRET)
+    _, token = _login(service)
+
+    service.logout(token)
+    assert service.validate(token) is None
+
+
+def test_idle_timeout_slides_with_use(db_path, monkeypatch):
+    service = AuthService(secret=SECRET, session_ttl=60)
+    clock = [1000.0]
+    monkeypatch.setattr(auth_service.time, "monotonic", lambda: clock[0])
+    user, token = _login(service)
+
+    for _ in range(3):
+        clock[0] += 45
+        assert service.validate(token) == user
+    clock[0] += 61
+    assert service.validate(token) is None
+    # Going idle revokes the token, so the signature alone cannot bring it back
+    assert service.validate(token) is None
+
+
+def test_forwarded_for_is_only_trusted_behind_a_proxy():
+    assert auth_service.client_address("10.0.0.9", "1.2.3.4", trusted_hops=0) == "10.0.0.9"
+    assert auth_service.client_address(None, "1.2.3.4", trusted_hops=0) is None
+
+    # The client may send its own X-Forwarded-For; the proxy appends the real address
+    spoofed = "6.6.6.6, 203.0.113.7"
+    assert auth_service.client_address("10.0.0.9", spoofed, trusted_hops=1) == "203.0.113.7"
+    assert auth_service.client_address("10.0.0.9", spoofed + ", 10.0.0.2", trusted_hops=2) == (
+        "203.0.113.7"
+    )
+    assert auth_service.client_address("10.0.0.9", None, trusted_hops=1) is None
+    assert auth_service.client_address("10.0.0.9", "203.0.113.7", trusted_hops=2) is None
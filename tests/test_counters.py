@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import counters
+import db_connection
+import repository
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "counters.py")
+
+
+def _run(db_path, *args):
+    env = dict(os.environ, QUERY_DB_PATH=db_path)
+    return subprocess.run([sys.executable, SCRIPT, *args], env=env,
+                          capture_output=True, text=True)
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(db_path):
+    repository.create_query("client1", "client1@example.com", "9876543210",
+                            "Heading", "Details", "High")
+    db_connection.get_pool().close_all()
+    assert _run(db_path, "--check").returncode == 0
+
+    with db_connection.db_session() as db:
+        db.execute("UPDATE query_counts SET n = n + 5")
+        db.execute("INSERT INTO query_archive_counts_global (status, n) VALUES ('Resolved', 2)")
+        assert {scope for scope, *_ in counters.check_consistency(db)} == {
+            'client', 'archive global'
+        }
+    db_connection.get_pool().close_all()
+
+    checked = _run(db_path, "--check")
+    assert checked.returncode == 1
+    assert "stored 6, actual 1" in checked.stdout
+
+    assert _run(db_path, "--rebuild").returncode == 0
+    assert _run(db_path).returncode == 0
@@ -0,0 +1,15 @@
+import csv_loader
+
+
+def test_download_bytes_are_only_kept_for_small_files(tmp_path, monkeypatch):
+    path = tmp_path / "queries.csv"
+    path.write_text("query_id,status\nQ1,Closed\nQ2,Opened\n")
+    csv_loader.clear_cache()
+
+    assert csv_loader.download_bytes(str(path)) == path.read_bytes()
+    assert csv_loader.status_summary(str(path)) == {'Total': 2, 'Closed': 1, 'Open': 1}
+
+    monkeypatch.setattr(csv_loader, "DOWNLOAD_LIMIT_BYTES", 10)
+    assert csv_loader.download_bytes(str(path)) is None
+    assert [kind for kind, _ in csv_loader._cache] == ['summary']
+    csv_loader.clear_cache()
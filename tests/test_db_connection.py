@@ -0,0 +1,48 @@
+import time
+
+import db_connection
+import instrumentation
+
+
+def test_create_tables_returns_connection_on_error(db_path, monkeypatch):
+    def fail(db):
+        raise RuntimeError("migration failed")
+
+    monkeypatch.setattr(db_connection, "run_migrations", fail)
+    pool = db_connection.get_pool()
+    for _ in range(pool.size + 1):
+        assert not db_connection.create_tables()
+    stats = pool.stats()
+    assert stats["idle"] == stats["open"]
+
+
+def _query_seconds(sql):
+    label = instrumentation.sql_label(sql)
+    return [
+        (count, total) for name, labels, count, total, *_ in instrumentation.registry.histograms()
+        if name == "db_query_seconds" and labels["sql"] == label
+    ]
+
+
+def test_query_timer_covers_reading_the_rows(db_path):
+    sql = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 300000) "
+           "SELECT i, hex(randomblob(16)) FROM n")
+    with db_connection.db_session() as db:
+        start = time.perf_counter()
+        cursor = db.execute(sql)
+        first_row = time.perf_counter() - start
+        assert _query_seconds(sql) == []
+        assert len(cursor.fetchall()) == 300000
+        elapsed = time.perf_counter() - start
+    [(count, total)] = _query_seconds(sql)
+    assert count == 1
+    assert total > first_row and total > elapsed / 2
+
+
+def test_query_timer_records_abandoned_cursors(db_path):
+    sql = "SELECT name FROM sqlite_master WHERE type = 'table' AND name > ''"
+    with db_connection.db_session() as db:
+        for _ in db.execute(sql):
+            break
+        db.execute(sql).close()
+    assert [count for count, _ in _query_seconds(sql)] == [2]
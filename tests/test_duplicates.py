@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+import db_connection
+import duplicates
+import repository
+
+TEXTS = [
+    ("Login page not loading", "The login page shows a blank screen after I enter my password."),
+    ("Payment failed", "Card payment was declined twice although the balance is fine."),
+    ("Bug Report", "Tab focus jumps incorrectly."),
+    ("Ünïcode", "Crème brûlée — naïve café"),
+    ("", ""),
+    ("ab", None),
+]
+
+
+def _pure_keys(texts):
+    return [
+        duplicates.band_keys(values) if values else None
+        for values in (duplicates.signature(heading, text) for heading, text in texts)
+    ]
+
+
+def test_numpy_and_pure_python_keys_match():
+    np = pytest.importorskip("numpy")
+    rng = random.Random(7)
+    words = " ".join(description for _, description in TEXTS[:4]).split()
+    texts = TEXTS + [
+        ("Ticket", " ".join(rng.choice(words) for _ in range(rng.randint(1, 40))))
+        for _ in range(300)
+    ]
+    assert duplicates._band_keys_of(texts) == _pure_keys(texts)
+
+    x = np.array([0, 1, 12345, (1 << 32) - 1], dtype=np.uint64)
+    for a, b in ((1, 0), (duplicates.PRIME - 1, duplicates.PRIME - 1), (1 << 60, 5)):
+        assert duplicates._permute(np, x.copy(), a, b).tolist() == [
+            (a * v + b) % duplicates.PRIME for v in x.tolist()
+        ]
+
+
+def test_stored_keys_match_recomputed_keys(db_path):
+    ids = [
+        repository.create_query("client1", "client1@example.com", "9876543210", heading,
+                                description or "", "Medium")
+        for heading, description in TEXTS[:4]
+    ]
+    with db_connection.db_session() as db:
+        for query_id, (heading, description) in zip(ids, TEXTS):
+            stored = {key for (key,) in db.execute(duplicates.SELECT_KEYS, (query_id,))}
+            assert stored == set(duplicates.band_keys(duplicates.signature(heading, description)))
+        before = db.execute("SELECT band_key, query_id FROM query_lsh ORDER BY 1, 2").fetchall()
+        duplicates.rebuild(db)
+        assert db.execute("SELECT band_key, query_id FROM query_lsh ORDER BY 1, 2").fetchall() == (
+            before
+        )
+
+
+def test_similar_finds_a_near_duplicate(db_path):
+    heading, description = TEXTS[0]
+    original = repository.create_query(
+        "client1", "client1@example.com", "9876543210", heading, description, "High"
+    )
+    for other_heading, other_description in TEXTS[1:3]:
+        repository.create_query("client2", "client2@example.com", "9876543210",
+                                other_heading, other_description, "Low")
+
+    hits = repository.similar_tickets(
+        "Login page not loading", "The login page shows a blank screen after entering my password"
+    )
+    assert [hit['query_id'] for hit in hits] == [original]
+    assert repository.similar_tickets(heading, description, client_name="client2") == []
+
+
+def test_band_recall_follows_the_banding_formula():
+    # Pairs of texts with shingle Jaccard near 0.63, where the formula gives about 0.75
+    rng = random.Random(1)
+    words = " ".join(description for _, description in TEXTS[:3]).lower().split()
+    pairs = []
+    while len(pairs) < 400:
+        base = [rng.choice(words) for _ in range(rng.randint(12, 30))]
+        edited = list(base)
+        for _ in range(rng.randint(1, 4)):
+            edited[rng.randrange(len(edited))] = rng.choice(words)
+        a, b = " ".join(base), " ".join(edited)
+        sa, sb = ({text[i:i + duplicates.SHINGLE_SIZE]
+                   for i in range(len(text) - duplicates.SHINGLE_SIZE + 1)} for text in (a, b))
+        jaccard = len(sa & sb) / len(sa | sb)
+        if 0.58 <= jaccard <= 0.68:
+            pairs.append((a, b, jaccard))
+
+    keys = duplicates.batch_band_keys([("", text) for a, b, _ in pairs for text in (a, b)])
+    found = sum(
+        any(x == y for x, y in zip(keys[2 * i], keys[2 * i + 1])) for i in range(len(pairs))
+    )
+    expected = sum(
+        1 - (1 - j ** duplicates.ROWS) ** duplicates.BANDS for _, _, j in pairs
+    )
+    assert abs(found - expected) / len(pairs) < 0.07
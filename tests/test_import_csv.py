@@ -0,0 +1,51 @@
+import csv
+
+import db_connection
+import duplicates
+import import_csv
+
+FIELDS = ["query_id", "client_email", "client_mobile", "query_heading", "query_description",
+          "status", "date_raised", "date_closed"]
+
+
+def _write(path, query_ids):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for query_id in query_ids:
+            writer.writerow([query_id, "client1@example.com", "9876543210", "Bug Report",
+                             f"Details of {query_id}", "Opened", "2025-02-26", ""])
+
+
+def _sequence():
+    with db_connection.db_session() as db:
+        return db.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'client_queries'"
+        ).fetchone()[0]
+
+
+def test_reimport_keeps_autoincrement_ids(db_path, tmp_path):
+    path = tmp_path / "export.csv"
+    _write(path, ["Q1", "Q2", "Q2", "Q3"])
+    first = import_csv.import_csv(str(path), batch_size=2)
+    assert (first['inserted'], first['skipped']) == (3, 1)
+    assert _sequence() == 3
+
+    _write(path, ["Q1", "Q2", "Q3", "Q4"])
+    again = import_csv.import_csv(str(path), batch_size=2)
+    assert (again['inserted'], again['skipped']) == (1, 3)
+    assert _sequence() == 4
+    with db_connection.db_session() as db:
+        assert db.execute(
+            "SELECT COUNT(*) FROM query_lsh WHERE query_id = 4"
+        ).fetchone()[0] == duplicates.BANDS
+
+
+def test_import_restores_cache_size(db_path, tmp_path):
+    path = tmp_path / "export.csv"
+    _write(path, ["Q1"])
+    with db_connection.db_session() as db:
+        before = db.execute("PRAGMA cache_size").fetchone()[0]
+    import_csv.import_csv(str(path))
+    with db_connection.db_session() as db:
+        assert db.execute("PRAGMA cache_size").fetchone()[0] == before
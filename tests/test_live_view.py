@@ -0,0 +1,96 @@
+import db_connection
+import repository
+from live_view import LiveView, get_view
+from query_builder import QueryFilter
+from query_cache import cache
+
+OPEN = QueryFilter(status='Open')
+
+
+def _ticket(created, heading="Heading", client_name="client1"):
+    query_id = repository.create_query(
+        client_name, f"{client_name}@example.com", "9876543210", heading, "Details", "Medium"
+    )
+    _write("UPDATE client_queries SET query_created_time = ? WHERE query_id = ?",
+           (created, query_id))
+    return query_id
+
+
+def _write(sql, params=()):
+    with db_connection.db_session() as db:
+        db.execute(sql, params)
+    cache.clear()
+
+
+def _ids(view):
+    return [ticket.query_id for ticket in view.tickets]
+
+
+def test_refresh_patches_the_page_from_the_change_feed(db_path):
+    ids = [_ticket(f"2025-03-0{day} 09:00:00") for day in range(1, 7)]
+    view = LiveView(OPEN, page_size=3)
+    assert _ids(view) == ids[:2:-1]
+    assert view.refresh() is False
+
+    newest = _ticket("2025-03-09 09:00:00")
+    too_old = _ticket("2025-02-01 09:00:00")
+    assert view.refresh() is True
+    assert _ids(view) == [newest, ids[5], ids[4]]
+    assert too_old not in _ids(view)
+
+    _write("UPDATE client_queries SET query_heading = 'Renamed' WHERE query_id = ?", (ids[5],))
+    assert view.refresh() is True
+    assert view.tickets[1].query_heading == 'Renamed'
+
+    # Stopped matching the filter, or deleted: dropped without a reload
+    repository.update_status(ids[5], 'Resolved')
+    _write("DELETE FROM client_queries WHERE query_id = ?", (newest,))
+    assert view.refresh() is True
+    assert _ids(view) == [ids[4]]
+    assert view.patches == 3
+
+
+def test_later_pages_only_patch_rows_they_show(db_path):
+    ids = [_ticket(f"2025-03-0{day} 09:00:00") for day in range(1, 7)]
+    first = LiveView(OPEN, page_size=3)
+    second = LiveView(OPEN, page_size=3, after=first.next_cursor)
+    assert _ids(second) == ids[2::-1]
+
+    _ticket("2025-03-09 09:00:00")
+    assert second.refresh() is False
+    _write("UPDATE client_queries SET query_heading = 'Renamed' WHERE query_id = ?", (ids[1],))
+    assert second.refresh() is True
+    assert second.tickets[1].query_heading == 'Renamed'
+
+
+def test_client_view_only_sees_its_own_changes(db_path):
+    mine = _ticket("2025-03-01 09:00:00")
+    view = LiveView(QueryFilter(client_name="client1"), page_size=10)
+    _ticket("2025-03-02 09:00:00", client_name="client2")
+    assert view.refresh() is False
+    assert _ids(view) == [mine]
+
+
+def test_falling_too_far_behind_reloads(db_path, monkeypatch):
+    ids = [_ticket(f"2025-03-0{day} 09:00:00") for day in range(1, 4)]
+    view = LiveView(OPEN, page_size=10)
+    reloads = []
+    reload = view.reload
+    monkeypatch.setattr(view, "reload", lambda: reloads.append(1) or reload())
+    # 3 tickets x 200 updates is more than changes.MAX_CHANGES behind
+    with db_connection.db_session() as db:
+        for _ in range(200):
+            db.execute("UPDATE client_queries SET version = version + 1")
+    cache.clear()
+    assert view.refresh() is True
+    assert reloads == [1] and _ids(view) == ids[::-1]
+    assert {ticket.version for ticket in view.tickets} == {200}
+
+
+def test_get_view_keeps_one_view_per_filters_and_page(db_path):
+    _ticket("2025-03-01 09:00:00")
+    state = {}
+    view = get_view(state, "tickets", OPEN, 50, None)
+    assert get_view(state, "tickets", OPEN, 50, None) is view
+    other = get_view(state, "tickets", QueryFilter(), 50, None)
+    assert other is not view and state["tickets"] is other
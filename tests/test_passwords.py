@@ -0,0 +1,21 @@
+import passwords
+import repository
+
+
+def test_unknown_users_cost_a_full_hash_check(db_path, monkeypatch):
+    assert repository.register("agent1", "hunter22", "Support", "agent1@example.com")
+    checked = []
+    verify = passwords.verify_password
+
+    def recording_verify(password, encoded):
+        checked.append(encoded)
+        return verify(password, encoded)
+
+    monkeypatch.setattr(passwords, "verify_password", recording_verify)
+    assert repository.authenticate("nobody", "hunter22", "Support") is None
+    assert repository.authenticate("agent1", "hunter22", "Client") is None
+    assert checked == [passwords.dummy_hash()] * 2
+    assert passwords.needs_rehash(passwords.dummy_hash()) is False
+
+    assert repository.authenticate("agent1", "hunter22", "Support") is not None
+    assert len(checked) == 3 and checked[-1] != passwords.dummy_hash()
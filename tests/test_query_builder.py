@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+import db_connection
+from query_builder import QueryFilter, fetch_page, page_legs
+
+STATUSES = ('Open', 'In Progress', 'Resolved')
+PRIORITIES = ('Low', 'Medium', 'High')
+
+FILTERS = [
+    QueryFilter(),
+    QueryFilter(status='Open'),
+    QueryFilter(priorities=('Low', 'High')),
+    QueryFilter(statuses=('Open', 'In Progress')),
+    QueryFilter(statuses=('Open', 'In Progress'), priorities=('Medium', 'High')),
+    QueryFilter(status='Resolved', priorities=('Low', 'High')),
+    QueryFilter(assigned_to='agent1', statuses=('Open', 'In Progress'), priorities=('High',)),
+    QueryFilter(client_name='client1', statuses=('Open', 'Resolved')),
+    QueryFilter(created_from='2025-03-02', created_to='2025-03-03', priorities=('Low', 'High')),
+]
+
+
+def _matches(row, filters):
+    statuses = filters.statuses or (() if filters.status == 'All' else (filters.status,))
+    return ((not statuses or row['status'] in statuses)
+            and (not filters.priorities or row['priority'] in filters.priorities)
+            and filters.client_name in (None, row['client_name'])
+            and filters.assigned_to in (None, row['assigned_to'])
+            and (not filters.created_from or row['created'] >= filters.created_from)
+            and (not filters.created_to or row['created'][:10] <= filters.created_to))
+
+
+@pytest.fixture
+def tickets(db_path):
+    rng = random.Random(3)
+    rows = []
+    for i in range(300):
+        rows.append({
+            'client_name': f"client{i % 3}", 'status': rng.choice(STATUSES),
+            'priority': rng.choice(PRIORITIES), 'assigned_to': rng.choice(("agent1", None)),
+            # Few distinct times, so pages often end in the middle of a tie
+            'created': f"2025-03-0{1 + i % 4} 10:00:{rng.randrange(3):02d}",
+        })
+    with db_connection.db_session() as db:
+        for row in rows:
+            row['query_id'] = db.execute(
+                "INSERT INTO client_queries (client_name, mail_id, mobile_number, query_heading,"
+                " query_description, status, priority, query_created_time, assigned_to)"
+                " VALUES (?, 'c@example.com', '9876543210', 'Heading', 'Details', ?, ?, ?, ?)",
+                (row['client_name'], row['status'], row['priority'], row['created'],
+                 row['assigned_to'])
+            ).lastrowid
+    return rows
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=lambda f: repr(f.key()))
+def test_pages_walk_every_match_once_in_order(tickets, filters):
+    expected = [
+        row['query_id'] for row in sorted(
+            tickets, key=lambda row: (row['created'], row['query_id']), reverse=True
+        ) if _matches(row, filters)
+    ]
+    seen = []
+    after = None
+    with db_connection.db_session() as db:
+        while True:
+            rows, after = fetch_page(db, filters, 7, after, ['query_id', 'query_created_time'])
+            assert len(rows) <= 7
+            seen.extend(query_id for query_id, _ in rows)
+            if after is None:
+                break
+    assert expected and seen == expected
+
+
+def test_page_legs_split_in_lists_into_index_ranges():
+    legs = page_legs(QueryFilter(statuses=('Open', 'In Progress'), priorities=('Low', 'High')))
+    assert [(leg.status, leg.statuses, leg.priorities) for leg in legs] == [
+        ('Open', (), ('Low',)), ('Open', (), ('High',)),
+        ('In Progress', (), ('Low',)), ('In Progress', (), ('High',)),
+    ]
+    queue = page_legs(QueryFilter(assigned_to='agent1', statuses=('Open', 'In Progress'),
+                                  priorities=('Low', 'High')))
+    assert [(leg.status, leg.priorities) for leg in queue] == [
+        ('Open', ('Low', 'High')), ('In Progress', ('Low', 'High'))
+    ]
+    for single in (QueryFilter(client_name='client1', statuses=('Open', 'Resolved')),
+                   QueryFilter(search='login', priorities=('Low', 'High')),
+                   QueryFilter(status='Open', statuses=('Open', 'Resolved'))):
+        assert page_legs(single) == [single]
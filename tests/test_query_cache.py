@@ -0,0 +1,30 @@
+from query_cache import QueryCache, client_tag
+
+
+def test_load_overlapping_invalidation_is_not_cached():
+    cache = QueryCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) == 1:
+            # A write lands while the first load is still reading
+            cache.invalidate_client("client1")
+            return "before write"
+        return "after write"
+
+    tags = (client_tag("client1"),)
+    assert cache.get_or_load("key", loader, tags) == "before write"
+    assert cache.get_or_load("key", loader, tags) == "after write"
+    assert cache.stats()['stale_loads'] == 1
+
+
+def test_unrelated_invalidation_keeps_entry():
+    cache = QueryCache()
+
+    def loader():
+        cache.invalidate(client_tag("someone else"))
+        return 1
+
+    cache.get_or_load("key", loader, (client_tag("client1"),))
+    assert cache.get_or_load("key", lambda: 2, (client_tag("client1"),)) == 1
@@ -0,0 +1,191 @@
+"""EXPLAIN QUERY PLAN checks for the statements the pages run.
+
+Statements are built with the same builders and constants the app uses, so
+the check follows the code. A plan fails if it scans a table or a whole
+index, or sorts rows in a temp B-tree. The few plans that legitimately do
+one of those are listed in ALLOWED with the reason.
+
+No ANALYZE is run here, just as the app never runs it.
+"""
+import re
+
+import pytest
+
+import aggregations
+import archive
+import assignment
+import changes
+import db_connection
+import duplicates
+import repository
+import sla
+from query_builder import (
+    DETAIL_COLUMNS, LIST_COLUMNS, ORDER_BY, QueryFilter, build_page_query, build_where
+)
+
+AFTER = ("2025-03-01 00:00:00", 1000)
+DAY = ("2025-03-01", "2025-03-31")
+OPEN = assignment.OPEN_STATUSES
+
+# Filters the Support, Client and My Queue pages can produce
+PAGE_FILTERS = {
+    "all": QueryFilter(),
+    "status": QueryFilter(status="Open"),
+    "priority": QueryFilter(priorities=("High",)),
+    "priorities": QueryFilter(priorities=("Low", "High")),
+    "status and priorities": QueryFilter(status="Open", priorities=("Low", "High")),
+    "statuses": QueryFilter(statuses=OPEN),
+    "statuses and priority": QueryFilter(statuses=OPEN, priorities=("High",)),
+    "search": QueryFilter(search="login page"),
+    "search and status": QueryFilter(search="login", status="Open"),
+    "punctuation search": QueryFilter(search="%%"),
+    "created range": QueryFilter(created_from=DAY[0], created_to=DAY[1]),
+    "status and created range": QueryFilter(status="Open", created_from=DAY[0], created_to=DAY[1]),
+    "client": QueryFilter(client_name="client1"),
+    "client and status": QueryFilter(client_name="client1", status="Open"),
+    "client and filters": QueryFilter(client_name="client1", statuses=OPEN, priorities=("High",)),
+    "client and created range": QueryFilter(client_name="client1", created_from=DAY[0]),
+    "my queue": QueryFilter(assigned_to="agent1", statuses=OPEN),
+}
+
+# label -> plan lines that may scan or sort, and why
+ALLOWED = {
+    # Newest-first walk of the created index, stopped by LIMIT after one page
+    "page all": {"SCAN client_queries USING INDEX idx_queries_created"},
+    # LIKE fallback for input without words: nothing to seek on, LIMIT stops the walk
+    "page punctuation search": {"SCAN client_queries USING INDEX idx_queries_created"},
+    # Only the full-text matches are sorted
+    "page search": {"USE TEMP B-TREE FOR ORDER BY"},
+    "page search next": {"USE TEMP B-TREE FOR ORDER BY"},
+    # At most BANDS * CANDIDATES_PER_BAND candidate rows are grouped and sorted
+    "duplicates similar": {"USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY"},
+    "duplicates similar for client": {
+        "USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY"
+    },
+}
+
+# Aggregates read every matching row anyway, so grouping them in a temp B-tree is fine
+AGGREGATE_ALLOWED = {"USE TEMP B-TREE FOR GROUP BY"}
+
+_TABLE_SCAN = re.compile(r"^SCAN \w+( USING (COVERING )?INDEX \w+)?$")
+
+
+def _statements():
+    for name, filters in PAGE_FILTERS.items():
+        yield f"page {name}", build_page_query(filters, 51)
+        yield f"page {name} next", build_page_query(filters, 51, AFTER)
+
+    for name in ("client", "client and status", "client and filters"):
+        where, params = build_where(PAGE_FILTERS[name])
+        yield f"client list {name}", (
+            f"SELECT {', '.join(DETAIL_COLUMNS)} FROM client_queries {where} {ORDER_BY}", params
+        )
+
+    ids = [1, 2, 3]
+    for name in ("status", "statuses and priority", "search", "client and status"):
+        where, params = build_where(PAGE_FILTERS[name])
+        yield f"changed rows {name}", (
+            f"SELECT {', '.join(LIST_COLUMNS)} FROM client_queries {where} "
+            f"AND query_id IN (?, ?, ?)", params + ids
+        )
+
+    yield "owner", (repository.SELECT_OWNER, (1,))
+    yield "resolve", (repository.RESOLVE_QUERY, ("Resolved", "2025-03-01 00:00:00", 1))
+    yield "update status", (repository.UPDATE_QUERY_STATUS, ("Open", 1))
+    where, keys = repository._bulk_where([(1, 0), (2, 0)])
+    yield "bulk select", (f"SELECT query_id, client_name FROM client_queries {where}", keys)
+    yield "bulk update", (
+        f"UPDATE client_queries SET status = ?, version = version + 1 {where}",
+        ["Resolved"] + keys
+    )
+    yield "login", (repository.SELECT_USER, ("agent1", "Support"))
+
+    yield "changes since", (changes.SELECT_SINCE, (0, 501))
+    yield "client changes since", (changes.SELECT_CLIENT_SINCE, ("client1", 0, 501))
+
+    keys = range(duplicates.BANDS)
+    yield "duplicates similar", (
+        duplicates.SELECT_SIMILAR,
+        [v for key in keys for v in (key, duplicates.CANDIDATES_PER_BAND)] + [None, 5]
+    )
+    yield "duplicates similar for client", (
+        duplicates.SELECT_SIMILAR_FOR_CLIENT,
+        [v for key in keys for v in (key, "client1", duplicates.CANDIDATES_PER_BAND)] + [None, 5]
+    )
+    yield "duplicates band keys", (duplicates.SELECT_KEYS, (1,))
+
+    yield "assignment unassigned", (assignment.SELECT_UNASSIGNED, OPEN + (500,))
+    yield "archive candidates", (archive.SELECT_CANDIDATES, ("2025-01-01 00:00:00", 500))
+
+    cutoff = "2025-01-01 00:00:00"
+    yield "sla open breaches", (
+        sla.SELECT_OPEN_BREACHES, [v for status in OPEN for v in (status, "High", cutoff)] + [100]
+    )
+    where, params = sla._scope_where(QueryFilter(include_archive=True), by_priority=False)
+    yield "sla late within target bucket", (
+        sla.BOUNDARY_LATE_SQL.format(where=where), params + ["High", 86400, 87000]
+    )
+
+
+def _aggregates():
+    # Support page match count, and the Client page breakdowns
+    for name in ("status", "priorities", "status and priorities", "search",
+                 "created range", "client", "client and filters"):
+        where, params = build_where(PAGE_FILTERS[name])
+        yield f"count {name}", (
+            aggregations.COUNT_SQL.format(table="client_queries", where=where), params
+        )
+    where, params = build_where(PAGE_FILTERS["client"])
+    for column in ("status", "priority"):
+        yield f"client {column} breakdown", (aggregations.GROUPED_SQL.format(
+            column=column, table="client_queries", where=where), params)
+    yield "assignment loads", (assignment.SELECT_LOADS, OPEN)
+
+    for filters in (None, QueryFilter(include_archive=True, priorities=("High",))):
+        scope = "all" if filters is None else "scoped"
+        where, params = sla._scope_where(filters)
+        for by in sla.GROUP_COLUMNS:
+            yield f"sla histogram by {by} {scope}", (
+                sla.HISTOGRAM_SQL.format(by=by, where=where), params
+            )
+        where, params = sla._scope_where(filters, by_priority=False)
+        yield f"sla resolved {scope}", (
+            sla.RESOLVED_SQL.format(where=where), [86000] + params + ["High"]
+        )
+    yield "sla open breached", (sla.COUNT_OPEN_BREACHED, OPEN + ("High", "2025-01-01 00:00:00"))
+
+
+def _bad_lines(db, sql, params, allowed):
+    plan = [row[3] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    return [
+        line for line in plan
+        if (_TABLE_SCAN.match(line) or "USE TEMP B-TREE" in line) and line not in allowed
+    ]
+
+
+@pytest.fixture
+def db(db_path):
+    with db_connection.db_session() as db:
+        yield db
+
+
+@pytest.mark.parametrize("label,statement", [
+    pytest.param(label, statement, id=label) for label, statement in _statements()
+])
+def test_statement_seeks(db, label, statement):
+    sql, params = statement
+    assert _bad_lines(db, sql, params, ALLOWED.get(label, ())) == []
+
+
+@pytest.mark.parametrize("label,statement", [
+    pytest.param(label, statement, id=label) for label, statement in _aggregates()
+])
+def test_aggregate_reads_only_matching_rows(db, label, statement):
+    sql, params = statement
+    assert _bad_lines(db, sql, params, AGGREGATE_ALLOWED) == []
+
+
+def test_client_filters_use_the_client_index(db):
+    sql, params = build_page_query(PAGE_FILTERS["client and filters"], 51)
+    plan = " ".join(row[3] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert "idx_queries_client_created" in plan
@@ -0,0 +1,87 @@
+import random
+
+import archive
+import db_connection
+import rollups
+
+STATUSES = ('Open', 'In Progress', 'Resolved')
+PRIORITIES = ('Low', 'Medium', 'High')
+
+INSERT = """
+    INSERT INTO client_queries (client_name, mail_id, mobile_number, query_heading,
+        query_description, status, priority, query_created_time, query_closed_time)
+    VALUES ('client1', 'c@example.com', '9876543210', 'Heading', 'Details', ?, ?, ?, ?)
+"""
+
+
+def _day(rng):
+    return f"2025-0{rng.randint(1, 3)}-{rng.randint(10, 28)}"
+
+
+def _insert(db, status, priority, created, closed=None):
+    return db.execute(INSERT, (status, priority, created, closed)).lastrowid
+
+
+def test_triggers_match_a_rebuild_through_every_kind_of_change(db_path):
+    rng = random.Random(11)
+    with db_connection.db_session() as db:
+        ids = []
+        for _ in range(200):
+            status = rng.choice(STATUSES)
+            closed = f"{_day(rng)} 12:00:00" if status == 'Resolved' else None
+            ids.append(_insert(db, status, rng.choice(PRIORITIES), f"{_day(rng)} 09:00:00",
+                               closed))
+        for query_id in rng.sample(ids, 60):
+            status = rng.choice(STATUSES)
+            db.execute(
+                "UPDATE client_queries SET status = ?, priority = ?, query_closed_time = ? "
+                "WHERE query_id = ?",
+                (status, rng.choice(PRIORITIES),
+                 f"{_day(rng)} 15:00:00" if status == 'Resolved' else None, query_id)
+            )
+        for query_id in rng.sample(ids, 20):
+            db.execute("UPDATE client_queries SET query_created_time = ? WHERE query_id = ?",
+                       (f"{_day(rng)} 08:00:00", query_id))
+        db.execute(f"DELETE FROM client_queries WHERE query_id IN ({ids[0]}, {ids[1]})")
+        assert rollups.check_consistency(db) == []
+        before = db.execute("SELECT * FROM query_daily_rollup ORDER BY 1, 2, 3").fetchall()
+
+    # Archiving and restoring move tickets between tiers without changing history
+    with db_connection.db_session() as db:
+        moved, _ = archive.archive_batch(db, "2100-01-01 00:00:00", batch_size=30)
+    assert moved == 30
+    with db_connection.db_session() as db:
+        restored = db.execute("SELECT query_id FROM query_archive LIMIT 10").fetchall()
+        archive.restore_tickets(db, [query_id for (query_id,) in restored])
+    with db_connection.db_session() as db:
+        assert db.execute("SELECT * FROM query_daily_rollup ORDER BY 1, 2, 3").fetchall() == (
+            before
+        )
+        assert rollups.check_consistency(db) == []
+
+
+def test_series_buckets_and_backlog(db_path):
+    with db_connection.db_session() as db:
+        _insert(db, 'Open', 'High', "2025-03-03 09:00:00")            # Monday
+        _insert(db, 'Resolved', 'Low', "2025-03-04 09:00:00", "2025-03-11 10:00:00")
+        _insert(db, 'Open', 'Low', "2025-03-11 09:00:00")
+        _insert(db, 'In Progress', 'High', "2025-04-01 09:00:00")
+
+        assert rollups.series(db, 'day') == [
+            ("2025-03-03", 1, 0, 1), ("2025-03-04", 1, 0, 2),
+            ("2025-03-11", 1, 1, 2), ("2025-04-01", 1, 0, 3),
+        ]
+        assert rollups.series(db, 'week') == [
+            ("2025-03-03", 2, 0, 2), ("2025-03-10", 1, 1, 2), ("2025-03-31", 1, 0, 3),
+        ]
+        assert rollups.series(db, 'month') == [("2025-03-01", 3, 1, 2), ("2025-04-01", 1, 0, 3)]
+        # Zooming in keeps the backlog carried in from before the range
+        assert rollups.series(db, 'day', start="2025-03-11") == [
+            ("2025-03-11", 1, 1, 2), ("2025-04-01", 1, 0, 3),
+        ]
+        assert rollups.series(db, 'day', priorities=('Low',)) == [
+            ("2025-03-04", 1, 0, 1), ("2025-03-11", 1, 1, 1),
+        ]
+        assert rollups.daily_created(db) == [
+            ("2025-03-03", 1), ("2025-03-04", 1), ("2025-03-11", 1), ("2025-04-01", 1),
+        ]
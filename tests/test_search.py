@@ -0,0 +1,58 @@
+import db_connection
+import repository
+from search import match_expression, search
+
+
+def _ticket(heading, description, client_name="client1"):
+    return repository.create_query(
+        client_name, f"{client_name}@example.com", "9876543210", heading, description, "Medium"
+    )
+
+
+def _ids(db, text, **kwargs):
+    return [hit['query_id'] for hit in search(db, text, **kwargs)]
+
+
+def _integrity_check(db):
+    # rank = 1 also compares the index against the client_queries content
+    db.execute("INSERT INTO client_queries_fts (client_queries_fts, rank) "
+               "VALUES ('integrity-check', 1)")
+
+
+def test_triggers_keep_the_index_in_sync(db_path):
+    form = _ticket("Form validation not working properly", "The signup form accepts anything")
+    cafe = _ticket("Menu typo", "Café is spelled wrong on the menu")
+    with db_connection.db_session() as db:
+        assert _ids(db, "valid form") == [form]
+        assert _ids(db, "cafe") == [cafe]
+
+        db.execute("UPDATE client_queries SET query_heading = 'Checkout button broken' "
+                   "WHERE query_id = ?", (form,))
+        assert _ids(db, "validation") == []
+        assert _ids(db, "checkout") == [form]
+        # Updates to other columns leave the index alone
+        db.execute("UPDATE client_queries SET status = 'Resolved' WHERE query_id = ?", (form,))
+        assert _ids(db, "checkout") == [form]
+
+        db.execute("DELETE FROM client_queries WHERE query_id = ?", (cafe,))
+        assert _ids(db, "cafe") == []
+        _integrity_check(db)
+
+
+def test_heading_matches_rank_above_description_matches(db_path):
+    in_description = _ticket("Account question", "After the password reset my login fails")
+    in_heading = _ticket("Login fails", "Nothing happens after I press the button")
+    _ticket("Login fails", "Another client's ticket", client_name="client2")
+    with db_connection.db_session() as db:
+        hits = search(db, "login", client_name="client1", mark=("[", "]"))
+        assert [hit['query_id'] for hit in hits] == [in_heading, in_description]
+        assert hits[0]['rank'] < hits[1]['rank']
+        assert "[login]" in hits[1]['snippet'].lower()
+        assert len(_ids(db, "login")) == 3
+
+
+def test_input_without_words_has_no_expression(db_path):
+    assert match_expression("%% --") is None
+    assert match_expression('say "hi"') == '"say"* "hi"*'
+    with db_connection.db_session() as db:
+        assert search(db, "%%") == []
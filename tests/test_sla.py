@@ -0,0 +1,97 @@
+import random
+
+import archive
+import db_connection
+import repository
+import sla
+from query_builder import QueryFilter
+
+
+def _resolved(priority, created):
+    query_id = repository.create_query(
+        "client1", "client1@example.com", "9876543210", "Heading", "Details", priority
+    )
+    with db_connection.db_session() as db:
+        db.execute(
+            "UPDATE client_queries SET query_created_time = ? WHERE query_id = ?",
+            (created, query_id)
+        )
+    repository.update_status(query_id, 'Resolved')
+    return query_id
+
+
+def test_report_scope_follows_include_archive_and_priorities(db_path):
+    archived = _resolved('High', "2020-01-01 00:00:00")
+    _resolved('High', "2021-01-01 00:00:00")
+    _resolved('Low', "2022-01-01 00:00:00")
+    with db_connection.db_session() as db:
+        archive.archive_batch(db, "2100-01-01 00:00:00", batch_size=1)
+        assert db.execute("SELECT query_id FROM query_archive").fetchall() == [(archived,)]
+
+    hot = repository.sla()
+    assert {p: s['count'] for p, s in hot['by_priority'].items()} == {'High': 1, 'Low': 1}
+    assert hot['breaches']['High']['resolved'] == 1
+
+    everything = repository.sla(QueryFilter(include_archive=True))
+    assert everything['by_priority']['High']['count'] == 2
+    assert everything['breaches']['High']['resolved_late'] == 2
+
+    high = repository.sla(QueryFilter(include_archive=True, priorities=('High',)))
+    assert list(high['by_priority']) == ['High']
+    assert list(high['breaches']) == ['High']
+
+
+def test_restored_ticket_counts_as_hot_again(db_path):
+    query_id = _resolved('Medium', "2020-01-01 00:00:00")
+    with db_connection.db_session() as db:
+        archive.archive_batch(db, "2100-01-01 00:00:00")
+    assert repository.sla()['by_priority'] == {}
+    archive.restore([query_id])
+    assert repository.sla()['by_priority']['Medium']['count'] == 1
+
+
+def _seed_resolved(db, durations):
+    db.executemany("""
+        INSERT INTO client_queries
+        (client_name, mail_id, mobile_number, query_heading, query_description,
+         status, priority, query_created_time, query_closed_time, assigned_to)
+        VALUES ('client1', 'client1@example.com', '9876543210', 'Heading', 'Details',
+                'Resolved', ?, '2025-01-01 00:00:00',
+                datetime('2025-01-01 00:00:00', '+' || ? || ' seconds'), ?)
+    """, [(priority, seconds, agent) for priority, seconds, agent in durations])
+
+
+def test_histogram_percentiles_are_within_five_percent(db_path):
+    rng = random.Random(7)
+    durations = [(rng.choice(['Low', 'High']), int(rng.lognormvariate(11, 1.2)),
+                  rng.choice(['agent1', None])) for _ in range(3000)]
+    with db_connection.db_session() as db:
+        _seed_resolved(db, durations)
+        report = sla.resolution_percentiles(db, 'priority')
+        by_assignee = sla.resolution_percentiles(db, 'assigned_to')
+
+    assert set(by_assignee) == {'agent1', None}
+    for priority, stats in report.items():
+        times = sorted(seconds for p, seconds, _ in durations if p == priority)
+        assert stats['count'] == len(times)
+        for p in sla.PERCENTILES:
+            exact = times[max(1, -(-p * len(times) // 100)) - 1]
+            assert abs(stats[f'p{p}'] - exact) <= exact * 0.05
+
+
+def test_histogram_follows_changes_and_exact_late_counts(db_path):
+    target = sla.SLA_HOURS['High'] * 3600
+    with db_connection.db_session() as db:
+        # Both sides of the target fall in the same histogram bucket
+        _seed_resolved(db, [('High', target - 1, None), ('High', target + 1, None),
+                            ('High', target * 2, 'agent1'), ('Low', 60, None)])
+        reopened = db.execute("SELECT MAX(query_id) FROM client_queries").fetchone()[0]
+    repository.update_status(reopened, 'Open')
+
+    with db_connection.db_session() as db:
+        stats = sla.breach_summary(db)['High']
+        assert (stats['resolved'], stats['resolved_late']) == (3, 2)
+        stored = db.execute("SELECT * FROM query_resolution_hist WHERE n != 0").fetchall()
+        sla.rebuild_histogram(db)
+        assert sorted(stored) == sorted(db.execute("SELECT * FROM query_resolution_hist"))
+        db.rollback()
@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+import pytest
+
+import db_connection
+import migrations
+import timestamps
+from query_builder import QueryFilter, count_matching
+from query_cache import cache
+
+INSERT = """
+    INSERT INTO client_queries (client_name, mail_id, mobile_number, query_heading,
+        query_description, status, query_created_time, query_closed_time)
+    VALUES ('client1', 'c@example.com', '9876543210', 'Heading', 'Details', ?, ?, ?)
+"""
+
+# (stored before migration 10, created after, closed before, closed after)
+LEGACY = [
+    ('2025-02-26', '2025-02-26 00:00:00', None, None),
+    ('2025-02-26T09:30:00', '2025-02-26 09:30:00', '2025-02-27', '2025-02-27 00:00:00'),
+    ('2025-02-26 23:59', '2025-02-26 23:59:00', '2025-02-27T08:00', '2025-02-27 08:00:00'),
+    ('2025-02-27 00:00:00', '2025-02-27 00:00:00', None, None),
+    ('2025-02-25T23:59:59', '2025-02-25 23:59:59', None, None),
+    ('not a date', 'not a date', None, None),
+]
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """A database stopped at version 9, holding pre-migration-10 timestamps"""
+    monkeypatch.setattr(db_connection, "DB_PATH", str(tmp_path / "legacy.sqlite"))
+    db_connection.get_pool().close_all()
+    cache.clear()
+    full = migrations.MIGRATIONS
+    monkeypatch.setattr(migrations, "MIGRATIONS", [m for m in full if m[0] < 10])
+    assert db_connection.create_tables()
+    with db_connection.db_session() as db:
+        db.executemany(INSERT, [
+            ('Resolved' if closed else 'Open', created, closed)
+            for created, _, closed, _ in LEGACY
+        ])
+        db.commit()
+    monkeypatch.setattr(migrations, "MIGRATIONS", full)
+    assert db_connection.create_tables()
+    yield
+    db_connection.get_pool().close_all()
+    cache.clear()
+
+
+def test_to_db_and_day_range():
+    assert timestamps.to_db('2025-02-26') == '2025-02-26 00:00:00'
+    assert timestamps.to_db(' 2025-02-26T09:30 ') == '2025-02-26 09:30:00'
+    assert timestamps.to_db(date(2025, 2, 26)) == '2025-02-26 00:00:00'
+    assert timestamps.to_db(datetime(2025, 2, 26, 9, 30, 5, 999)) == '2025-02-26 09:30:05'
+    assert timestamps.to_db('') is None and timestamps.to_db(None) is None
+    assert timestamps.day_range('2025-02-26', '2025-02-28 12:00:00') == (
+        '2025-02-26 00:00:00', '2025-03-01 00:00:00')
+    assert timestamps.day_range(None, date(2024, 12, 31)) == (None, '2025-01-01 00:00:00')
+
+
+def test_migration_rewrites_legacy_values(legacy_db):
+    with db_connection.db_session() as db:
+        rows = db.execute("""
+            SELECT query_created_time, query_closed_time FROM client_queries ORDER BY query_id
+        """).fetchall()
+        # Only values SQLite cannot parse are left as they were
+        odd = db.execute(f"""
+            SELECT COUNT(*) FROM client_queries
+            WHERE query_created_time NOT GLOB '{timestamps.CANONICAL_GLOB}'
+        """).fetchone()[0]
+    assert rows == [(created, closed) for _, created, _, closed in LEGACY]
+    assert odd == 1
+
+
+def test_created_range_after_migration(legacy_db):
+    def count(start, end):
+        with db_connection.db_session() as db:
+            return count_matching(db, QueryFilter(created_from=start, created_to=end))
+
+    # Date-only and 'T'-separated values fall on the right day
+    assert count('2025-02-26', '2025-02-26') == 3
+    assert count('2025-02-25', '2025-02-26') == 4
+    assert count('2025-02-27', '2025-02-27') == 1
+    assert count(None, '2025-02-25') == 1
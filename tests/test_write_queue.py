@@ -0,0 +1,58 @@
+import pytest
+
+import db_connection
+import repository
+import write_queue
+from query_builder import QueryFilter
+
+
+def test_status_update_honors_filters(db_path):
+    query_id = repository.create_query(
+        "client1", "client1@example.com", "9876543210", "Heading", "Details", "High"
+    )
+    assert not write_queue.update_status(query_id, 'Resolved', QueryFilter(status='Resolved'))
+    assert not write_queue.update_status(query_id + 1, 'Resolved')
+    assert write_queue.update_status(query_id, 'Resolved', QueryFilter(priorities=('High',)))
+    with db_connection.db_session() as db:
+        status, closed = db.execute(
+            "SELECT status, query_closed_time FROM client_queries WHERE query_id = ?",
+            (query_id,)
+        ).fetchone()
+    assert status == 'Resolved' and closed is not None
+
+
+def _versions(*query_ids):
+    with db_connection.db_session() as db:
+        return dict(db.execute(
+            f"SELECT query_id, version FROM client_queries "
+            f"WHERE query_id IN ({', '.join('?' * len(query_ids))})", query_ids
+        ).fetchall())
+
+
+def _tickets(n):
+    return [
+        repository.create_query(
+            "client1", "client1@example.com", "9876543210", f"Heading {i}", "Details", "Low"
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("bulk_update", [repository.bulk_update, write_queue.bulk_update])
+def test_bulk_update_skips_stale_versions(db_path, bulk_update):
+    first, second = _tickets(2)
+    seen = _versions(first, second)
+    assert bulk_update(seen, status='In Progress') == (2, 2, [])
+
+    # Another agent changed first since it was read; the stale version is refused
+    fresh = _versions(first)
+    assert bulk_update(fresh, assigned_to="agent1") == (1, 1, [])
+    result = bulk_update(_versions(second) | {first: fresh[first]}, status='Resolved')
+    assert (result.updated, result.conflicts) == (1, [first])
+
+    with db_connection.db_session() as db:
+        rows = db.execute(
+            "SELECT query_id, status, assigned_to FROM client_queries ORDER BY query_id"
+        ).fetchall()
+    assert rows == [(first, 'In Progress', "agent1"), (second, 'Resolved', None)]
+    assert bulk_update({first + 99: 0}, status='Open') == (1, 0, [first + 99])
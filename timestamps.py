@@ -0,0 +1,78 @@
+"""Canonical timestamp format for query_created_time and query_closed_time.
+
+Both columns hold ISO-8601 text in one fixed-width format,
+'YYYY-MM-DD HH:MM:SS' (local time). Fixed width means string order is
+time order, so the created-time indexes answer date ranges, keyset
+cursors and rollup day keys directly, and SQLite's date functions
+(julianday, strftime) parse the values without help. Migration 10
+rewrote older values that were date-only or used a 'T' separator.
+
+Everything that writes or compares these columns goes through the
+helpers here instead of formatting its own strings.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple, Union
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# GLOB pattern matching a canonical value
+CANONICAL_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+
+
+def now() -> str:
+    """The current local time in the canonical format"""
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def to_db(value: Union[str, date, datetime, None]) -> Optional[str]:
+    """Canonical text for a datetime, date or ISO string ('2025-02-26' -> '2025-02-26 00:00:00')"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    if isinstance(value, date):
+        return f"{value.isoformat()} 00:00:00"
+    value = value.strip()
+    if not value:
+        return None
+    return datetime.fromisoformat(value).strftime(TIMESTAMP_FORMAT)
+
+
+def from_db(value: Optional[str]) -> Optional[datetime]:
+    return datetime.strptime(value, TIMESTAMP_FORMAT) if value else None
+
+
+def ago(days: float = 0, hours: float = 0, now: Optional[datetime] = None) -> str:
+    """Canonical timestamp for the given time before now"""
+    return ((now or datetime.now()) - timedelta(days=days, hours=hours)).strftime(TIMESTAMP_FORMAT)
+
+
+def day_range(start: Union[str, date, None],
+              end: Union[str, date, None]) -> Tuple[Optional[str], Optional[str]]:
+    """Half-open [start 00:00:00, day after end 00:00:00) bounds for inclusive dates"""
+    if isinstance(start, str):
+        start = date.fromisoformat(start[:10])
+    if isinstance(end, str):
+        end = date.fromisoformat(end[:10])
+    return (
+        to_db(start) if start else None,
+        to_db(end + timedelta(days=1)) if end else None,
+    )
+
+
+def normalize_sql(column: str) -> str:
+    """SQL rewriting column to the canonical format (unparseable values are kept)"""
+    return f"coalesce(strftime('%Y-%m-%d %H:%M:%S', {column}), {column})"
+
+
+def picked_range(value) -> Tuple[Optional[str], Optional[str]]:
+    """('YYYY-MM-DD' | None, 'YYYY-MM-DD' | None) from a st.date_input range value.
+
+    While a range is being picked the widget returns a single date (or a
+    1-tuple); treat that as a one-day range.
+    """
+    if not isinstance(value, (tuple, list)):
+        value = (value,) if value else ()
+    if not value:
+        return None, None
+    return value[0].isoformat(), value[-1].isoformat()
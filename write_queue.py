@@ -0,0 +1,190 @@
+"""Background writer that group-commits ticket submissions and status changes.
+
+SQLite allows one writer at a time, so a spike of commit-per-row INSERTs
+from many sessions turns into lock waits and "database is locked" errors.
+Instead, pages hand writes to a single writer thread through a bounded
+queue. The writer drains whatever is queued (up to MAX_BATCH), applies it
+in one transaction and commits once, then resolves each caller's Future
+with its result (the new query_id for submissions, a BulkResult for bulk
+updates). New tickets are routed
+to agents by the assignment engine and added to the duplicate index inside
+the same transaction. When the queue is full submit_* blocks up to
+ENQUEUE_TIMEOUT and then raises WriteQueueFull, which is the backpressure
+signal.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+import assignment
+import changes
+import db_connection
+import duplicates
+from query_builder import matches
+from query_cache import cache
+import repository
+import timestamps
+
+QUEUE_SIZE = 10000
+MAX_BATCH = 500
+ENQUEUE_TIMEOUT = 2.0
+RESULT_TIMEOUT = 10.0
+
+# Trim the change feed on the first batch and then every PRUNE_EVERY batches
+PRUNE_EVERY = 1000
+
+
+class WriteQueueFull(RuntimeError):
+    """The writer is saturated; the caller should retry later"""
+
+
+class WriteQueue:
+    def __init__(self, maxsize=QUEUE_SIZE, max_batch=MAX_BATCH):
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="ticket-writer", daemon=True
+                    )
+                    self._thread.start()
+
+    def _put(self, op, args):
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put((op, args, future), timeout=ENQUEUE_TIMEOUT)
+        except queue.Full:
+            raise WriteQueueFull("Too many pending writes, please retry")
+        return future
+
+    def submit_query(self, client_name, mail_id, mobile_number, heading, description,
+                     priority='Medium'):
+        """Queue a new ticket; the Future resolves to its query_id"""
+        return self._put('insert', (
+            client_name, mail_id, mobile_number, heading, description,
+            priority, timestamps.now()
+        ))
+
+    def submit_status(self, query_id, status, filters=None):
+        """Queue a status change; the Future resolves to True if the ticket exists.
+
+        With filters the ticket must also match them when the writer applies it.
+        """
+        if status not in repository.STATUSES:
+            raise ValueError(f"Unknown status: {status}")
+        return self._put('status', (query_id, status, timestamps.now(), filters))
+
+    def submit_bulk(self, expected_versions, status=None, assigned_to=repository.UNCHANGED):
+        """Queue a repository.bulk_update; the Future resolves to its BulkResult"""
+        return self._put('bulk', repository.bulk_plan(expected_versions, status, assigned_to))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply(batch)
+
+    def _apply_one(self, db, op, args):
+        """Apply one write; returns (result, client_names whose cached reads it changes)"""
+        if op == 'insert':
+            return db.execute(repository.INSERT_QUERY, args).lastrowid, (args[0],)
+        if op == 'bulk':
+            return repository.apply_bulk(db, *args)
+        query_id, status, now, filters = args
+        if filters is not None and not matches(db, filters, query_id):
+            return False, ()
+        owner = db.execute(repository.SELECT_OWNER, (query_id,)).fetchone()
+        if owner is None:
+            return False, ()
+        if status == 'Resolved':
+            db.execute(repository.RESOLVE_QUERY, (status, now, query_id))
+        else:
+            db.execute(repository.UPDATE_QUERY_STATUS, (status, query_id))
+        return True, (owner[0],)
+
+    def _apply(self, batch):
+        # Each write gets a savepoint so one bad row fails only its own Future
+        outcomes = []
+        touched = set()
+        try:
+            with db_connection.db_session() as db:
+                db.execute("BEGIN IMMEDIATE")
+                for op, args, _ in batch:
+                    db.execute("SAVEPOINT write")
+                    try:
+                        result, client_names = self._apply_one(db, op, args)
+                    except Exception as e:
+                        db.execute("ROLLBACK TO write")
+                        outcomes.append((False, e))
+                    else:
+                        touched.update(client_names)
+                        outcomes.append((True, result))
+                    db.execute("RELEASE write")
+                # Route and index the batch's new tickets in the same transaction
+                inserted = [
+                    (result, args)
+                    for (op, args, _), (ok, result) in zip(batch, outcomes)
+                    if op == 'insert' and ok
+                ]
+                assignment.assign_new(db, [(query_id, args[5]) for query_id, args in inserted])
+                duplicates.index_tickets(db, [
+                    (query_id, args[0], args[3], args[4]) for query_id, args in inserted
+                ])
+                if self.batches % PRUNE_EVERY == 0:
+                    changes.prune(db)
+        except Exception as e:
+            assignment.engine.invalidate()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for client_name in touched:
+            cache.invalidate_client(client_name)
+        self.batches += 1
+        self.writes += len(batch)
+        for (_, _, future), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'batches': self.batches,
+            'writes': self.writes,
+            'avg_batch': self.writes / self.batches if self.batches else 0.0,
+        }
+
+
+writer = WriteQueue()
+
+
+def create_query(client_name, mail_id, mobile_number, heading, description,
+                 priority='Medium', timeout=RESULT_TIMEOUT):
+    """Group-committed equivalent of repository.create_query"""
+    return writer.submit_query(
+        client_name, mail_id, mobile_number, heading, description, priority
+    ).result(timeout)
+
+
+def update_status(query_id, status, filters=None, timeout=RESULT_TIMEOUT):
+    """Group-committed equivalent of repository.update_status"""
+    return writer.submit_status(query_id, status, filters).result(timeout)
+
+
+def bulk_update(expected_versions, status=None, assigned_to=repository.UNCHANGED,
+                timeout=RESULT_TIMEOUT):
+    """Group-committed equivalent of repository.bulk_update"""
+    return writer.submit_bulk(expected_versions, status, assigned_to).result(timeout)